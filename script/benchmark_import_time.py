@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+CLI 启动时间基准
+
+用 `python -X importtime` 运行若干 CLI 命令（如 `rosbag info --help`），统计：
+- 墙钟时间（多次运行取中位数）
+- importtime 报告的顶层模块累计导入时间
+- 是否导入了不该在该命令中出现的重量级依赖（cv2 / rosbags.highlevel / reportlab / pyx）
+
+超出 --budget-ms 或加载了重量级依赖时以非零状态退出，可用于 CI 检查启动时间预算。
+
+用法:
+    python script/benchmark_import_time.py --runs 5 --budget-ms 500
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# 命令 -> 该命令不应导入的模块
+COMMANDS = {
+    "--help": ["cv2", "rosbags", "reportlab", "pyx"],
+    "rosbag --help": ["cv2", "rosbags.highlevel", "reportlab", "pyx"],
+    "rosbag info --help": ["cv2", "rosbags.highlevel", "reportlab", "pyx"],
+    "rosbag save --help": ["cv2", "rosbags.highlevel", "reportlab", "pyx"],
+    "pointcloud convert --help": ["cv2", "rosbags", "numpy", "reportlab", "pyx"],
+    "sync files --help": ["cv2", "rosbags", "numpy", "reportlab", "pyx"],
+}
+
+
+def run_command(args: list, env: dict) -> tuple:
+    """运行一次命令，返回 (墙钟毫秒, importtime 输出)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "lovely_utils.cli", *args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    return (time.perf_counter() - start) * 1000, result.stderr
+
+
+def parse_importtime(report: str) -> dict:
+    """解析 -X importtime 输出，返回 {模块名: 累计微秒}"""
+    modules = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def top_level_total_ms(report: str) -> float:
+    """顶层导入（无缩进）的累计时间之和"""
+    total = 0
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI 启动时间基准")
+    parser.add_argument("--runs", type=int, default=5, help="每条命令运行次数")
+    parser.add_argument(
+        "--budget-ms", type=float, default=500.0, help="每条命令墙钟时间中位数上限（毫秒）"
+    )
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+
+    failed = False
+    for command, forbidden in COMMANDS.items():
+        walls = []
+        report = ""
+        for _ in range(args.runs):
+            wall, report = run_command(command.split(), env)
+            walls.append(wall)
+        wall = statistics.median(walls)
+        modules = parse_importtime(report)
+        loaded = [m for m in forbidden if m in modules]
+
+        status = "OK"
+        if wall > args.budget_ms or loaded:
+            status = "FAIL"
+            failed = True
+        print(
+            f"[{status}] lovely_utils {command:<26} "
+            f"wall {wall:7.1f} ms  imports {top_level_total_ms(report):7.1f} ms"
+            + (f"  heavy: {', '.join(loaded)}" if loaded else "")
+        )
+
+    print(f"budget: {args.budget_ms:.0f} ms")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,21 @@
-import shutil
-from pathlib import Path
-import bisect
-
-
-def parse_timestamp(filename: str) -> int:
-    """
-    从文件名解析时间戳
-    1768372206_973804235_sensor_msgs__msg__PointCloud2.pcd
-    -> ns timestamp
-    """
-    parts = filename.split("_")
-    sec = int(parts[0])
-    nsec = int(parts[1])
-    return sec * 1_000_000_000 + nsec
-
-
-def build_image_index(image_dir: Path):
-    """
-    构建 image timestamp 索引
-    """
-    image_files = sorted(image_dir.glob("*.jpg"))
-
-    timestamps = []
-    paths = []
-
-    for f in image_files:
-        ts = parse_timestamp(f.name)
-        timestamps.append(ts)
-        paths.append(f)
+"""
+点云与相机图像按文件名时间戳同步（单相机示例）。
 
-    return timestamps, paths
-
-
-def find_nearest(ts_list, target):
-    """
-    二分查找最近时间
-    """
-    idx = bisect.bisect_left(ts_list, target)
+只索引 pcd_dir 下的 *.pcd 和 image_dir 下的 *.jpg（目录中有 index.npy 时直接读取索引），
+匹配到的图像以点云文件名保存为 output_dir/<点云文件名>.jpg（与旧版输出相同，
+用硬链接代替复制，跨文件系统时退化为复制）。
 
-    if idx == 0:
-        return 0
-    if idx == len(ts_list):
-        return len(ts_list) - 1
+同步逻辑位于 lovely_utils.sync，多相机、偏移、一对一匹配请使用命令行（输出布局为
+output_dir/<数据流名>/ 下的硬链接加 output_dir/sync.csv 清单）：
+    lovely_utils sync files --reference <pcd 目录> --stream front=<图像目录> --output <输出目录>
+"""
 
-    before = ts_list[idx - 1]
-    after = ts_list[idx]
+import os
+import shutil
+from pathlib import Path
 
-    if abs(before - target) < abs(after - target):
-        return idx - 1
-    else:
-        return idx
+from lovely_utils.sync.files import index_directory
+from lovely_utils.sync.matcher import sync_streams
 
 
 def sync_images(pcd_dir, image_dir, output_dir, max_diff_ns=100_000_000):
@@ -59,55 +25,35 @@ def sync_images(pcd_dir, image_dir, output_dir, max_diff_ns=100_000_000):
     max_diff_ns:
         最大允许时间差 (默认100ms)
     """
-
-    pcd_dir = Path(pcd_dir)
-    image_dir = Path(image_dir)
     output_dir = Path(output_dir)
-
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    print("Building image index...")
-    img_ts, img_paths = build_image_index(image_dir)
-
+    pcd_ts, pcd_paths = index_directory(pcd_dir, "*.pcd")
+    img_ts, img_paths = index_directory(image_dir, "*.jpg")
     print(f"Total images: {len(img_paths)}")
+    print(f"Total pcd: {len(pcd_paths)}")
 
-    pcd_files = sorted(pcd_dir.glob("*.pcd"))
-    print(f"Total pcd: {len(pcd_files)}")
-
-    matched = 0
-    skipped = 0
-    errors = []
-
-    for pcd in pcd_files:
-
-        pcd_ts = parse_timestamp(pcd.name)
-
-        idx = find_nearest(img_ts, pcd_ts)
-
-        img_ts_match = img_ts[idx]
-        img_path = img_paths[idx]
-
-        diff = abs(img_ts_match - pcd_ts)
-
-        if diff > max_diff_ns:
-            skipped += 1
-            continue
-
-        new_name = pcd.stem + ".jpg"
-        dst = output_dir / new_name
-
-        shutil.copy2(img_path, dst)
-
-        matched += 1
-        errors.append(diff)
+    result = sync_streams(pcd_ts, {"image": img_ts}, tolerance_ns=max_diff_ns)
+    for pcd_index, img_index in zip(result.reference, result.indices["image"]):
+        dst = output_dir / f"{pcd_paths[pcd_index].stem}.jpg"
+        _link_or_copy(img_paths[img_index], dst)
 
     print("\n==== Sync Result ====")
-    print("matched:", matched)
-    print("skipped:", skipped)
+    print("matched:", len(result))
+    print("skipped:", result.dropped)
+    stats = result.stats["image"]
+    if stats["matched"]:
+        print("max error (ms):", stats["max_error_ms"])
+        print("mean error (ms):", stats["mean_error_ms"])
+
 
-    if errors:
-        print("max error (ms):", max(errors) / 1e6)
-        print("mean error (ms):", sum(errors) / len(errors) / 1e6)
+def _link_or_copy(src: Path, dst: Path) -> None:
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
 
 
 if __name__ == "__main__":
@@ -116,4 +62,4 @@ if __name__ == "__main__":
     image_dir = "/home/ubuntu/Desktop/project/2601_3DLidar_object_detect/datasets/26-01-15-gaoxinhuayuan-lidar/msg_gaoxinhuayuan_26-01-15/rgbd_front_rgb0_image"
     output_dir = "/home/ubuntu/Desktop/project/2601_3DLidar_object_detect/datasets/26-01-15-gaoxinhuayuan-lidar/msg_gaoxinhuayuan_26-01-15/synced_images"
 
-    sync_images(pcd_dir, image_dir, output_dir)
\ No newline at end of file
+    sync_images(pcd_dir, image_dir, output_dir)
@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..detector.base_detector import BaseDetector
+
+
+@dataclass
+class DetectionResult:
+    """单张标定图像的检测结果"""
+
+    path: Path
+    image_size: Optional[Tuple[int, int]] = None  # (width, height)，图像无法读取时为 None
+    img_point: Optional[np.ndarray] = None  # 角点像素坐标，未检测到标定板时为 None
+    obj_point: Optional[np.ndarray] = None  # 对应的三维点
+    error: Optional[str] = None  # 读取失败等错误信息
+
+    @property
+    def found(self) -> bool:
+        return self.img_point is not None and self.obj_point is not None
+
+
+def detect_corners(
+    detector: BaseDetector,
+    images: List[Path],
+    num_workers: int = 1,
+    dir_save_detect_result: Path = None,
+) -> List[DetectionResult]:
+    """
+    对多张图像检测标定板角点，每张图像只读取一次
+    :param detector: 特征检测器（需可 pickle，多进程时复制到每个工作进程）
+    :param images: 图像路径列表
+    :param num_workers: 检测进程数，1 表示在当前进程内逐张检测
+    :param dir_save_detect_result: 保存绘制了检测结果的图像的目录（在工作进程内写出），None 表示不保存
+    :return: 与 images 一一对应、顺序一致的检测结果
+    """
+    detect = partial(_detect_one, detector, dir_save_detect_result=dir_save_detect_result)
+    if num_workers <= 1 or len(images) <= 1:
+        return [detect(path_img) for path_img in images]
+    # 每个进程一次领取若干张，减少进程间通信；map 按提交顺序返回，结果顺序与输入一致
+    chunksize = max(1, len(images) // (num_workers * 4))
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        return list(executor.map(detect, images, chunksize=chunksize))
+
+
+def _detect_one(
+    detector: BaseDetector, path_img: Path, dir_save_detect_result: Path = None
+) -> DetectionResult:
+    img = cv2.imread(str(path_img))
+    if img is None:
+        return DetectionResult(path_img, error=f"无法读取图像: {path_img}")
+    result = DetectionResult(path_img, image_size=img.shape[:2][::-1])
+    img_point, obj_point, image_with_corners = detector.detect(img)
+    if img_point is not None and obj_point is not None:
+        result.img_point = img_point
+        result.obj_point = obj_point
+        if dir_save_detect_result:
+            cv2.imwrite(str(dir_save_detect_result / path_img.name), image_with_corners)
+    return result
@@ -5,6 +5,8 @@ import cv2
 import numpy as np
 
 from .base_calibrator import BaseCalibrator
+from .corner_detection import detect_corners
+from .undistort import UndistortMaps, undistort_images
 from ..detector.base_detector import BaseDetector
 
 
@@ -12,6 +14,7 @@ class FisheyeCalibrator(BaseCalibrator):
     def __init__(self, intrinsic_detector: BaseDetector = None, extrinsic_detector: BaseDetector = None) -> None:
         super().__init__(intrinsic_detector, extrinsic_detector)
         self.image_size = None
+        self.images_without_corners = []  # 最近一次内参标定中未检测到标定板的图像
 
     def set_intrinsic_matrix(self, intrinsic_matrix: Any):
         """
@@ -49,14 +52,22 @@ class FisheyeCalibrator(BaseCalibrator):
         self.image_size = image_size
 
     def calibrate_intrinsic(
-        self, images: list[Path], dir_save_detect_result: Path = None, remove_unvalid_image: bool = True, **kwargs
+        self,
+        images: list[Path],
+        dir_save_detect_result: Path = None,
+        remove_unvalid_image: bool = False,
+        num_workers: int = 1,
+        **kwargs,
     ) -> None:
         """
         Calibrate the camera.
+        :param dir_save_detect_result: 保存角点检测结果图像的目录，None 表示不保存
+        :param remove_unvalid_image: 检测完成后是否删除未检测到标定板的图像；默认只报告，
+            未检测到标定板的图像记录在 self.images_without_corners
+        :param num_workers: 角点检测进程数，1 表示逐张检测；结果顺序与输入一致
         """
         images = [Path(img) for img in images]
         valid_images = []
-        images_without_corners = []
         img_points = []
         obj_points = []
 
@@ -75,23 +86,32 @@ class FisheyeCalibrator(BaseCalibrator):
             except OSError as e:
                 raise IOError(f"无法创建保存目录 {dir_save_detect_result}: {str(e)}")
 
-        self.img_size = cv2.imread(valid_images[0]).shape[:2][::-1]  # (width, height)
-        for path_img in valid_images:
-            img = cv2.imread(path_img)
-            img_point, obj_point, image_with_corners = self.intrinsic_detector.detect(img)
-            if img_point is not None and obj_point is not None:
-                obj_point = obj_point[:, np.newaxis, :]  # 关键修正
-                img_points.append(img_point)
-                obj_points.append(obj_point)
-                if dir_save_detect_result:
-                    cv2.imwrite(str(dir_save_detect_result / path_img.name), image_with_corners)
-            if img_point is None:
-                images_without_corners.append(path_img)
-
-        if remove_unvalid_image and images_without_corners:
-            for path_img in images_without_corners:
-                print(f"Removing image without corners: {path_img}")
-                os.remove(path_img)
+        # 3. 角点检测（可多进程），每张图像只读取一次
+        results = detect_corners(
+            self.intrinsic_detector, valid_images, num_workers, dir_save_detect_result
+        )
+        self.images_without_corners = []
+        self.img_size = None
+        for result in results:
+            if result.error:
+                print(f"Warning: {result.error}")
+                continue
+            if self.img_size is None:
+                self.img_size = result.image_size  # (width, height)
+            if not result.found:
+                self.images_without_corners.append(result.path)
+                continue
+            img_points.append(result.img_point)
+            obj_points.append(result.obj_point[:, np.newaxis, :])  # 关键修正
+
+        if self.images_without_corners:
+            print(f"Warning: no corners detected in {len(self.images_without_corners)} image(s):")
+            for path_img in self.images_without_corners:
+                print(f"  {path_img}")
+            if remove_unvalid_image:
+                for path_img in self.images_without_corners:
+                    print(f"Removing image without corners: {path_img}")
+                    os.remove(path_img)
 
         if not img_points or not obj_points:
             return None, None, None, None, None
@@ -104,23 +124,46 @@ class FisheyeCalibrator(BaseCalibrator):
         self.intrinsic_dist = dist
         return rms, mtx, dist, rvecs, tvecs
 
-    def apply_intrinsic(self, images: list[Path], dir_save: Path, **kwargs) -> None:
+    def apply_intrinsic(
+        self,
+        images: list[Path],
+        dir_save: Path,
+        alpha: float = 1.0,
+        cache_dir: Path = None,
+        num_threads: int = 0,
+        **kwargs,
+    ) -> tuple[list[Path], list[tuple[Path, str]]]:
         """
         Apply the intrinsic calibration to the camera.
+        每种图像尺寸的去畸变映射表只计算一次，逐帧只做 cv2.remap。
+        使用 cv2.fisheye 模型去畸变（旧实现误用针孔模型的 cv2.undistort），
+        默认 alpha=1 与旧实现一样保留全部原始像素
+        :param alpha: 即 fisheye 的 balance，0 只保留有效像素，1 保留全部原始像素
+        :param cache_dir: 映射表磁盘缓存目录，None 表示不落盘
+        :param num_threads: 读取/去畸变/编码的线程数，0 表示逐张处理
+        :param kwargs: 其余参数（max_pending / image_format / jpeg_quality / suffix）见 undistort_images
+        :return: (成功的输出路径列表, [(失败的输入路径, 错误信息)])
         """
-        images = [Path(img) for img in images]
-        for path_img in images:
-            img = cv2.imread(path_img)
-            # dst = cv2.undistort(img, self.intrinsic_matrix, self.dist_coeffs, None, self.intrinsic_matrix)
-            h, w = img.shape[:2]
-            newcameramtx1, roi = cv2.getOptimalNewCameraMatrix(
-                self.intrinsic_matrix, self.intrinsic_dist, (w, h), 1, (w, h)
-            )
-            dst1 = cv2.undistort(img, self.intrinsic_matrix, self.intrinsic_dist, None, newcameramtx1)
-            # newcameramtx2, roi = cv2.getOptimalNewCameraMatrix(self.intrinsic_matrix, self.dist_coeffs, (w,h), 0, (w,h))
-            # dst2 = cv2.undistort(img, self.intrinsic_matrix, self.dist_coeffs, None, newcameramtx2)
-            cv2.imwrite(str(dir_save / (path_img.stem + "_undistort" + path_img.suffix)), dst1)
-        return
+        return undistort_images(
+            images,
+            dir_save,
+            lambda image_size: self.get_undistort_maps(image_size, alpha=alpha, cache_dir=cache_dir),
+            num_threads=num_threads,
+            **kwargs,
+        )
+
+    def get_undistort_maps(
+        self, image_size: tuple[int, int], alpha: float = 1.0, cache_dir: Path = None
+    ) -> UndistortMaps:
+        """
+        获取当前内参下的去畸变映射表（按参数缓存）
+        :param image_size: 图像尺寸 (width, height)
+        :param alpha: 即 fisheye 的 balance，0 只保留有效像素，1 保留全部原始像素
+        :param cache_dir: 映射表磁盘缓存目录
+        """
+        return UndistortMaps.get(
+            self.intrinsic_matrix, self.intrinsic_dist, image_size, alpha, "fisheye", cache_dir
+        )
 
     def calibrate_extrinsic(self, img_points: Union[np.ndarray, Path], obj_points: np.ndarray, **kwargs):
         """
@@ -0,0 +1,278 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+class UndistortMaps:
+    """
+    预计算的去畸变查找表。
+
+    每组 (内参 K, 畸变系数 D, 图像尺寸, alpha) 只用 initUndistortRectifyMap 计算一次
+    定点 CV_16SC2 映射表，之后每帧只需一次 cv2.remap，避免 cv2.undistort 逐帧重建映射。
+    映射表可保存为 .npz 并在下次直接加载。
+    """
+
+    MODELS = ("pinhole", "fisheye")
+    # 进程内 LRU 缓存：缓存键 -> UndistortMaps，同一组参数在批处理和多次调用间共享；
+    # 每组映射表约 width * height * 6 字节，只保留最近使用的 CACHE_SIZE 组
+    CACHE_SIZE = 4
+    _cache: "OrderedDict[str, UndistortMaps]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(
+        self,
+        intrinsic_matrix: Any,
+        dist_coeffs: Any,
+        image_size: Tuple[int, int],
+        alpha: float = 1.0,
+        model: str = "pinhole",
+        maps: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    ) -> None:
+        """
+        :param intrinsic_matrix: 内参矩阵 (3x3)
+        :param dist_coeffs: 畸变系数
+        :param image_size: 图像尺寸 (width, height)
+        :param alpha: 自由缩放参数，0 只保留有效像素，1 保留全部原始像素
+            （pinhole 同 getOptimalNewCameraMatrix 的 alpha，fisheye 同 estimateNewCameraMatrixForUndistortRectify 的 balance）
+        :param model: 相机模型，"pinhole" 或 "fisheye"（D 为 4 个系数）
+        :param maps: 已计算的 (new_intrinsic_matrix, map1, map2)，为 None 时现场计算
+        """
+        if model not in self.MODELS:
+            raise ValueError(f"不支持的相机模型: {model}，可选: {', '.join(self.MODELS)}")
+        self.intrinsic_matrix = np.asarray(intrinsic_matrix, dtype=np.float64)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64)
+        self.image_size = (int(image_size[0]), int(image_size[1]))
+        self.alpha = float(alpha)
+        self.model = model
+        if maps is None:
+            maps = self._compute_maps()
+        self.new_intrinsic_matrix, self.map1, self.map2 = maps
+
+    @property
+    def key(self) -> str:
+        """参数摘要，用作缓存键和缓存文件名"""
+        return cache_key(
+            self.intrinsic_matrix, self.dist_coeffs, self.image_size, self.alpha, self.model
+        )
+
+    def _compute_maps(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self.model == "fisheye":
+            dist_coeffs = self.dist_coeffs.reshape(4, 1)
+            new_matrix = cv2.fisheye.estimateNewCameraMatrixForUndistortRectify(
+                self.intrinsic_matrix, dist_coeffs, self.image_size, np.eye(3), balance=self.alpha
+            )
+            map1, map2 = cv2.fisheye.initUndistortRectifyMap(
+                self.intrinsic_matrix,
+                dist_coeffs,
+                np.eye(3),
+                new_matrix,
+                self.image_size,
+                cv2.CV_16SC2,
+            )
+            return new_matrix, map1, map2
+        new_matrix, _ = cv2.getOptimalNewCameraMatrix(
+            self.intrinsic_matrix, self.dist_coeffs, self.image_size, self.alpha, self.image_size
+        )
+        map1, map2 = cv2.initUndistortRectifyMap(
+            self.intrinsic_matrix,
+            self.dist_coeffs,
+            None,
+            new_matrix,
+            self.image_size,
+            cv2.CV_16SC2,
+        )
+        return new_matrix, map1, map2
+
+    def undistort(self, img: np.ndarray, interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+        """对一幅图像去畸变"""
+        h, w = img.shape[:2]
+        if (w, h) != self.image_size:
+            raise ValueError(f"图像尺寸 {(w, h)} 与映射表尺寸 {self.image_size} 不一致")
+        return cv2.remap(img, self.map1, self.map2, interpolation)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """保存映射表（先写临时文件再替换，多个进程同时写入时不会读到半个文件）"""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                intrinsic_matrix=self.intrinsic_matrix,
+                dist_coeffs=self.dist_coeffs,
+                image_size=np.array(self.image_size),
+                alpha=np.array(self.alpha),
+                model=np.array(self.model),
+                new_intrinsic_matrix=self.new_intrinsic_matrix,
+                map1=self.map1,
+                map2=self.map2,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "UndistortMaps":
+        """加载 save 保存的映射表"""
+        with np.load(path) as data:
+            return cls(
+                data["intrinsic_matrix"],
+                data["dist_coeffs"],
+                tuple(data["image_size"].tolist()),
+                float(data["alpha"]),
+                str(data["model"]),
+                maps=(data["new_intrinsic_matrix"], data["map1"], data["map2"]),
+            )
+
+    @classmethod
+    def get(
+        cls,
+        intrinsic_matrix: Any,
+        dist_coeffs: Any,
+        image_size: Tuple[int, int],
+        alpha: float = 1.0,
+        model: str = "pinhole",
+        cache_dir: Optional[Union[str, Path]] = None,
+    ) -> "UndistortMaps":
+        """
+        取缓存的映射表：先查进程内缓存，再查 cache_dir 下的 .npz，都没有时计算并写入缓存
+        :param cache_dir: 映射表磁盘缓存目录，None 表示只在进程内缓存
+        """
+        key = cache_key(intrinsic_matrix, dist_coeffs, image_size, alpha, model)
+        with cls._cache_lock:
+            maps = cls._cache.get(key)
+            if maps is not None:
+                cls._cache.move_to_end(key)
+                return maps
+            path = Path(cache_dir) / f"undistort_{model}_{key}.npz" if cache_dir else None
+            if path is not None and path.exists():
+                maps = cls.load(path)
+            else:
+                maps = cls(intrinsic_matrix, dist_coeffs, image_size, alpha, model)
+                if path is not None:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    maps.save(path)
+            cls._cache[key] = maps
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+            return maps
+
+
+def cache_key(
+    intrinsic_matrix: Any, dist_coeffs: Any, image_size: Tuple[int, int], alpha: float, model: str
+) -> str:
+    """由相机参数生成映射表缓存键"""
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(intrinsic_matrix, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(dist_coeffs, dtype=np.float64).ravel().tobytes())
+    digest.update(f"{int(image_size[0])}x{int(image_size[1])}|{float(alpha)!r}|{model}".encode())
+    return digest.hexdigest()[:16]
+
+
+def undistort_images(
+    images: List[Path],
+    dir_save: Path,
+    get_maps: Callable[[Tuple[int, int]], UndistortMaps],
+    num_threads: int = 0,
+    max_pending: int = 0,
+    image_format: Optional[str] = None,
+    jpeg_quality: int = 95,
+    suffix: str = "_undistort",
+) -> Tuple[List[Path], List[Tuple[Path, str]]]:
+    """
+    批量去畸变：读取 -> remap -> 编码写盘，整条流水线在线程池中执行（OpenCV 调用释放 GIL）
+    :param images: 图像路径列表
+    :param dir_save: 输出目录，文件名为 <原文件名><suffix>.<扩展名>
+    :param get_maps: 图像尺寸 (width, height) -> UndistortMaps，如 calibrator.get_undistort_maps
+    :param num_threads: 线程数，0 表示在调用线程内逐张处理
+    :param max_pending: 最多同时在处理中的图像数（限制内存），0 表示 2 * num_threads
+    :param image_format: 输出扩展名（如 "png"），None 表示与输入相同
+    :param jpeg_quality: JPEG 质量（0-100），只用于 .jpg / .jpeg 输出
+    :return: (成功的输出路径列表, [(失败的输入路径, 错误信息)])，均按输入顺序
+    """
+    dir_save = Path(dir_save)
+    dir_save.mkdir(parents=True, exist_ok=True)
+
+    def process(path_img: Path) -> Path:
+        img = cv2.imread(str(path_img), cv2.IMREAD_UNCHANGED)
+        if img is None:
+            raise IOError(f"无法读取图像: {path_img}")
+        h, w = img.shape[:2]
+        dst = get_maps((w, h)).undistort(img)
+        ext = f".{image_format.lstrip('.')}" if image_format else path_img.suffix
+        path_save = dir_save / f"{path_img.stem}{suffix}{ext}"
+        if not cv2.imwrite(str(path_save), dst, _imwrite_params(ext, jpeg_quality)):
+            raise IOError(f"无法写入图像: {path_save}")
+        return path_save
+
+    images = [Path(img) for img in images]
+    results = [None] * len(images)
+    if num_threads <= 0:
+        for i, path_img in enumerate(images):
+            results[i] = _run(process, path_img)
+    else:
+        # 在处理中的图像数达到上限时阻塞提交，避免读取快于编码时内存无限增长
+        pending = threading.BoundedSemaphore(max_pending or 2 * num_threads)
+        with ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix="undistort") as executor:
+            futures = []
+            for path_img in images:
+                pending.acquire()
+                future = executor.submit(_run, process, path_img)
+                future.add_done_callback(lambda _: pending.release())
+                futures.append(future)
+            results = [future.result() for future in futures]
+
+    succeeded, failed = [], []
+    for path_img, (path_save, error) in zip(images, results):
+        if error is None:
+            succeeded.append(path_save)
+        else:
+            failed.append((path_img, error))
+    return succeeded, failed
+
+
+def _imwrite_params(ext: str, jpeg_quality: int) -> List[int]:
+    """按输出扩展名选择编码参数，其余格式使用 OpenCV 默认参数"""
+    if ext.lower() in (".jpg", ".jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+    return []
+
+
+def _run(process: Callable[[Path], Path], path_img: Path) -> Tuple[Optional[Path], Optional[str]]:
+    try:
+        return process(path_img), None
+    except Exception as e:
+        return None, str(e)
+
+
+def load_intrinsics(path: Union[str, Path]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    从 OpenCV FileStorage 文件（.yaml/.yml/.json/.xml）读取内参，节点名为 K 和 D，
+    取值可以是 opencv-matrix 或嵌套列表
+    :return: (内参矩阵 (3x3), 畸变系数)
+    """
+    fs = cv2.FileStorage(str(path), cv2.FILE_STORAGE_READ)
+    if not fs.isOpened():
+        raise FileNotFoundError(f"无法打开内参文件: {path}")
+    try:
+        nodes = {name: fs.getNode(name) for name in ("K", "D")}
+        missing = [name for name, node in nodes.items() if node.empty()]
+        if missing:
+            raise ValueError(f"内参文件 {path} 缺少节点: {', '.join(missing)}")
+        K = np.asarray(_read_matrix(nodes["K"]), dtype=np.float64).reshape(3, 3)
+        D = np.asarray(_read_matrix(nodes["D"]), dtype=np.float64).reshape(-1)
+    finally:
+        fs.release()
+    return K, D
+
+
+def _read_matrix(node) -> np.ndarray:
+    if node.isSeq():
+        return np.array(
+            [_read_matrix(node.at(i)) if node.at(i).isSeq() else node.at(i).real() for i in range(node.size())]
+        )
+    return node.mat()
@@ -1,3 +1,6 @@
+import os
+from pathlib import Path
+
 import typer
 
 from .calibration import calibration_cli
@@ -5,3 +8,60 @@ from .calibration import calibration_cli
 app = typer.Typer(name="camera")
 app.add_typer(calibration_cli.app, name="calibration")
 
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+
+@app.command()
+def undistort(
+    input: Path = typer.Option(..., help="Input image directory (first level only)"),
+    output: Path = typer.Option(..., help="Output directory"),
+    intrinsics: Path = typer.Option(
+        ..., help="OpenCV FileStorage file (.yaml/.json/.xml) with nodes K (3x3) and D"
+    ),
+    model: str = typer.Option("pinhole", help="Camera model: pinhole or fisheye", show_default=True),
+    alpha: float = typer.Option(
+        1.0,
+        help="Free scaling (fisheye: balance), 0 keeps valid pixels only, 1 keeps all source pixels",
+        show_default=True,
+    ),
+    suffix: str = typer.Option("_undistort", help="Suffix added to output file names", show_default=True),
+    image_format: str = typer.Option(None, help="Output extension, e.g. png [default: same as input]"),
+    jpeg_quality: int = typer.Option(95, min=0, max=100, help="JPEG quality", show_default=True),
+    workers: int = typer.Option(
+        0, min=0, help="Threads for read/remap/encode, 0 uses all CPU cores"
+    ),
+    cache_dir: Path = typer.Option(
+        None, help="Directory caching the remap tables (.npz) for reuse across runs"
+    ),
+):
+    """Undistort every image in a directory with precomputed remap tables."""
+    # 重量级依赖在真正处理时才导入
+    from .calibrator.undistort import UndistortMaps, load_intrinsics, undistort_images
+
+    if model not in UndistortMaps.MODELS:
+        typer.secho(
+            f"错误：不支持的相机模型 {model}（可选 {' / '.join(UndistortMaps.MODELS)}）",
+            fg=typer.colors.RED,
+        )
+        raise typer.Exit(code=1)
+    if not input.is_dir():
+        typer.secho(f"错误：输入目录不存在 -> {input}", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+
+    K, D = load_intrinsics(intrinsics)
+    images = sorted(p for p in input.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    succeeded, failed = undistort_images(
+        images,
+        output,
+        lambda image_size: UndistortMaps.get(K, D, image_size, alpha, model, cache_dir),
+        num_threads=workers or os.cpu_count() or 1,
+        image_format=image_format,
+        jpeg_quality=jpeg_quality,
+        suffix=suffix,
+    )
+    typer.secho(f"成功: {len(succeeded)} 个", fg=typer.colors.GREEN)
+    if failed:
+        typer.secho(f"失败: {len(failed)} 个", fg=typer.colors.RED)
+        for path, error in failed:
+            typer.echo(f"  {path}: {error}")
+        raise typer.Exit(code=1)
@@ -1,10 +1,49 @@
+import importlib
+
 import typer
-from .ros import rosbag_reader_cli
-from .camera import cli as camera_cli
+from typer.core import TyperGroup
+
+# 子命令 -> (模块, 简要说明)。子命令模块在被调用时才导入，
+# 避免 `lovely_utils rosbag info --help` 也要加载 cv2 / reportlab / pyx 等重量级依赖
+SUBCOMMANDS = {
+    "rosbag": ("lovely_utils.ros.rosbag_reader_cli", "Extract messages from and inspect rosbags"),
+    "camera": ("lovely_utils.camera.cli", "Camera calibration tools"),
+    "pointcloud": ("lovely_utils.pointcloud.cli", "Convert point cloud files"),
+    "sync": ("lovely_utils.sync.cli", "Synchronize multi-sensor data by timestamp"),
+}
+
+
+class LazySubcommandGroup(TyperGroup):
+    """按需导入子命令模块的命令组"""
+
+    def list_commands(self, ctx) -> list:
+        return list(SUBCOMMANDS) + [
+            name for name in super().list_commands(ctx) if name not in SUBCOMMANDS
+        ]
+
+    def get_command(self, ctx, name: str):
+        if name not in SUBCOMMANDS:
+            return super().get_command(ctx, name)
+        # 仅用于列出帮助：返回只带说明的占位命令，不导入子命令模块
+        return TyperGroup(name=name, help=SUBCOMMANDS[name][1])
+
+    def resolve_command(self, ctx, args):
+        name = args[0] if args else None
+        if name not in SUBCOMMANDS:
+            return super().resolve_command(ctx, args)
+        module = importlib.import_module(SUBCOMMANDS[name][0])
+        command = typer.main.get_command(module.app)
+        command.name = name
+        return name, command, args[1:]
+
+
+app = typer.Typer(cls=LazySubcommandGroup)
+
+
+@app.callback()
+def callback():
+    """Lovely utils command line tools"""
 
-app = typer.Typer()
-app.add_typer(rosbag_reader_cli.app, name="rosbag")
-app.add_typer(camera_cli.app, name="camera")
 
 def main():
     app()
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import typer
+
+app = typer.Typer(name="pointcloud")
+
+
+@app.callback()
+def callback():
+    """Point cloud tools"""
+
+
+@app.command()
+def convert(
+    input: Path = typer.Option(..., help="Input .pcd/.bin file or directory (first level only)"),
+    output: Path = typer.Option(..., help="Output file or directory"),
+    to: str = typer.Option(
+        "kitti_bin", help="Output format: kitti_bin or pcd", show_default=True
+    ),
+    data_format: str = typer.Option(
+        "binary",
+        help="PCD data section for --to pcd: ascii, binary, or binary_compressed (LZF)",
+        show_default=True,
+    ),
+    workers: int = typer.Option(
+        1, min=1, help="Processes converting files in parallel", show_default=True
+    ),
+    intensity_default: float = typer.Option(
+        0.0, help="Intensity for kitti_bin when the input has no intensity field"
+    ),
+    rotate_z_180: bool = typer.Option(
+        False,
+        "--rotate-z-180",
+        help="For kitti_bin: rotate points 180 degrees around z (negate x and y)",
+    ),
+    translate_x: float = typer.Option(
+        0.0, help="For kitti_bin: translation added to x after rotation"
+    ),
+):
+    """Convert point clouds between PCD (ascii/binary/binary_compressed) and KITTI .bin"""
+    # numpy 在真正转换时才导入，保持 --help 的启动速度
+    from .convert import OUTPUT_FORMATS, convert_directory, convert_file
+
+    if to not in OUTPUT_FORMATS:
+        typer.secho(
+            f"错误：不支持的输出格式 {to}（可选 {' / '.join(OUTPUT_FORMATS)}）",
+            fg=typer.colors.RED,
+        )
+        raise typer.Exit(code=1)
+
+    options = {
+        "data_format": data_format,
+        "intensity_default": intensity_default,
+        "rotate_z_180": rotate_z_180,
+        "translate_x": translate_x,
+    }
+
+    if input.is_file():
+        try:
+            convert_file(input, output, to, **options)
+        except Exception as e:
+            typer.secho(f"失败: {input} (错误: {e})", fg=typer.colors.RED)
+            raise typer.Exit(code=1)
+        typer.secho(f"成功: {input} -> {output}", fg=typer.colors.GREEN)
+        return
+
+    if not input.is_dir():
+        typer.secho(f"错误：输入路径不存在 -> {input}", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+
+    succeeded, failed = convert_directory(input, output, to, num_workers=workers, **options)
+    typer.secho(f"成功: {len(succeeded)} 个", fg=typer.colors.GREEN)
+    if failed:
+        typer.secho(f"失败: {len(failed)} 个", fg=typer.colors.RED)
+        for path, error in failed:
+            typer.echo(f"  {path}: {error}")
+        raise typer.Exit(code=1)
@@ -0,0 +1,106 @@
+"""
+点云格式转换：PCD（ascii / binary / binary_compressed）与 KITTI .bin 互转，支持目录批量并行转换。
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Literal, Tuple, Union
+
+import numpy as np
+
+from .kitti import read_kitti_bin, to_kitti_bin
+from .pcd import read_pcd, write_pcd
+
+OUTPUT_FORMATS = ("kitti_bin", "pcd")
+INPUT_SUFFIXES = (".pcd", ".bin")
+
+
+def read_pointcloud(path: Union[str, Path], mmap: bool = True) -> np.ndarray:
+    """按扩展名读取 .pcd 或 KITTI .bin 点云，返回结构化数组"""
+    path = Path(path)
+    if path.suffix.lower() == ".bin":
+        return read_kitti_bin(path, mmap)
+    if path.suffix.lower() == ".pcd":
+        return read_pcd(path, mmap)
+    raise ValueError(f"不支持的点云文件: {path}")
+
+
+def convert_file(
+    src: Union[str, Path],
+    dst: Union[str, Path],
+    output_format: Literal["kitti_bin", "pcd"] = "kitti_bin",
+    data_format: Literal["ascii", "binary", "binary_compressed"] = "binary",
+    intensity_default: float = 0.0,
+    rotate_z_180: bool = False,
+    translate_x: float = 0.0,
+) -> Path:
+    """
+    转换单个点云文件
+    :param src: 输入 .pcd 或 .bin 文件
+    :param dst: 输出文件路径
+    :param output_format: "kitti_bin" 或 "pcd"
+    :param data_format: 输出 PCD 的数据段格式
+    :param intensity_default: 输出 kitti_bin 且没有 intensity 字段时使用的强度值
+    :param rotate_z_180 / translate_x: 输出 kitti_bin 时的绕z轴旋转180度与x轴平移
+    :return: 输出文件路径
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"不支持的输出格式: {output_format}，可选: {', '.join(OUTPUT_FORMATS)}"
+        )
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    points = read_pointcloud(src)
+    if output_format == "kitti_bin":
+        dst.write_bytes(to_kitti_bin(points, intensity_default, rotate_z_180, translate_x))
+    else:
+        write_pcd(dst, points, data_format)
+    return dst
+
+
+def _convert_one(args: tuple) -> Tuple[Path, str]:
+    """进程池 worker：返回 (输入文件, 错误信息或空字符串)"""
+    src, dst, options = args
+    try:
+        convert_file(src, dst, **options)
+        return src, ""
+    except Exception as e:
+        return src, str(e)
+
+
+def convert_directory(
+    src_dir: Union[str, Path],
+    dst_dir: Union[str, Path],
+    output_format: Literal["kitti_bin", "pcd"] = "kitti_bin",
+    num_workers: int = 1,
+    pattern: str = "*",
+    **options,
+) -> Tuple[List[Path], List[Tuple[Path, str]]]:
+    """
+    转换目录下（仅一级）匹配 pattern 的 .pcd / .bin 点云文件，输出文件与输入同名、扩展名随输出格式变化。
+    本次转换的输出文件（如输出目录与输入目录相同时已生成的 .bin）不会再作为输入
+    :param num_workers: 转换进程数，为 1 时在当前进程中串行转换
+    :param pattern: 输入文件名的 glob 模式，如 "*.pcd"
+    :param options: 传给 convert_file 的其他参数
+    :return: (成功的输入文件列表, [(失败的输入文件, 错误信息), ...])，均按文件名排序
+    """
+    src_dir, dst_dir = Path(src_dir), Path(dst_dir)
+    suffix = ".bin" if output_format == "kitti_bin" else ".pcd"
+    files = sorted(
+        p for p in src_dir.glob(pattern) if p.is_file() and p.suffix.lower() in INPUT_SUFFIXES
+    )
+    # 跳过本次转换会写出的文件，避免重复变换上次的输出或原地覆盖输入
+    outputs = {(dst_dir / f"{src.stem}{suffix}").resolve() for src in files}
+    files = [src for src in files if src.resolve() not in outputs]
+    options = dict(options, output_format=output_format)
+    tasks = [(src, dst_dir / f"{src.stem}{suffix}", options) for src in files]
+
+    if num_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(num_workers, len(tasks))) as executor:
+            results = list(executor.map(_convert_one, tasks, chunksize=8))
+    else:
+        results = [_convert_one(task) for task in tasks]
+
+    succeeded = [src for src, error in results if not error]
+    failed = [(src, error) for src, error in results if error]
+    return succeeded, failed
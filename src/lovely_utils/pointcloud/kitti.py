@@ -0,0 +1,71 @@
+"""
+KITTI .bin 点云：float32 的 [x, y, z, intensity] 连续存储，无文件头。
+"""
+
+import os
+
+import numpy as np
+
+
+def extract_xyz_intensity(points: np.ndarray, intensity_default: float = 0.0) -> np.ndarray:
+    """
+    从结构化点云数组中提取 x, y, z, intensity
+    :param points: 结构化数组（字段名如 x/y/z/intensity）
+    :param intensity_default: 没有 intensity 字段时使用的强度值
+    :return: [N, 4] float32 数组，缺失的 x/y/z 字段为 0
+    """
+    names = points.dtype.names or ()
+    result = np.zeros((len(points), 4), dtype=np.float32)
+    for column, name in enumerate(["x", "y", "z", "intensity"]):
+        if name in names:
+            result[:, column] = points[name]
+    if "intensity" not in names:
+        result[:, 3] = intensity_default
+    return result
+
+
+def transform_kitti_points(
+    points_with_intensity: np.ndarray, rotate_z_180: bool = True, translate_x: float = 0.0
+) -> np.ndarray:
+    """
+    对点云数据进行KITTI格式变换
+    :param points_with_intensity: [N, 4] 格式的点云数据 [x, y, z, intensity]
+    :param rotate_z_180: 是否绕z轴旋转180度（即x和y坐标取反）
+    :param translate_x: x轴平移量
+    :return: 变换后的点云数据（新数组）
+    """
+    transformed = points_with_intensity.copy()
+    if rotate_z_180:
+        transformed[:, :2] *= -1
+    transformed[:, 0] += translate_x
+    return transformed
+
+
+def to_kitti_bin(
+    points: np.ndarray,
+    intensity_default: float = 0.0,
+    rotate_z_180: bool = False,
+    translate_x: float = 0.0,
+) -> bytes:
+    """
+    结构化点云数组 -> KITTI .bin 字节
+    :param rotate_z_180 / translate_x: 见 transform_kitti_points，默认不做变换
+    """
+    kitti_points = extract_xyz_intensity(points, intensity_default)
+    if rotate_z_180 or translate_x:
+        kitti_points = transform_kitti_points(kitti_points, rotate_z_180, translate_x)
+    return kitti_points.astype(np.float32, copy=False).tobytes()
+
+
+def read_kitti_bin(path, mmap: bool = True) -> np.ndarray:
+    """
+    读取 KITTI .bin 点云
+    :param mmap: 为 True 时返回只读 np.memmap
+    :return: 字段为 x, y, z, intensity（float32）的结构化数组
+    """
+    dtype = np.dtype([("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("intensity", "<f4")])
+    if mmap:
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r")
+    return np.fromfile(path, dtype=dtype)
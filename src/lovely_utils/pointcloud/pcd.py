@@ -0,0 +1,268 @@
+"""
+PCD 点云读写（ascii / binary / binary_compressed）。
+
+点云统一表示为 NumPy 结构化数组，字段名与 PCD 的 FIELDS 一致，类型由 TYPE + SIZE 决定，
+COUNT > 1 的字段为子数组。binary 格式通过 np.memmap 按需映射文件，不整体读入内存。
+"""
+
+import io
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Literal, Optional, Union
+
+import numpy as np
+
+from . import lzf
+
+# (TYPE, SIZE) -> NumPy 类型（小端）
+PCD_DTYPES = {
+    ("I", 1): "i1",
+    ("I", 2): "<i2",
+    ("I", 4): "<i4",
+    ("I", 8): "<i8",
+    ("U", 1): "u1",
+    ("U", 2): "<u2",
+    ("U", 4): "<u4",
+    ("U", 8): "<u8",
+    ("F", 2): "<f2",
+    ("F", 4): "<f4",
+    ("F", 8): "<f8",
+}
+# NumPy kind -> PCD TYPE
+PCD_TYPE_CHARS = {"i": "I", "u": "U", "f": "F"}
+PCD_DATA_FORMATS = ("ascii", "binary", "binary_compressed")
+DEFAULT_VIEWPOINT = (0, 0, 0, 1, 0, 0, 0)
+
+
+@dataclass
+class PcdHeader:
+    """PCD 文件头"""
+
+    fields: List[str]
+    size: List[int]
+    type: List[str]
+    count: List[int]
+    width: int
+    height: int = 1
+    points: Optional[int] = None
+    data: str = "ascii"
+    version: str = "0.7"
+    viewpoint: tuple = DEFAULT_VIEWPOINT
+    data_offset: int = field(default=0, compare=False)  # 数据段在文件中的起始字节
+
+    def __post_init__(self):
+        if self.points is None:
+            self.points = self.width * self.height
+
+    @property
+    def dtype(self) -> np.dtype:
+        """点的结构化 dtype（字段紧凑排列，与 PCD binary 的点布局一致）"""
+        formats = []
+        for name, type_char, size, count in zip(self.fields, self.type, self.size, self.count):
+            try:
+                base = PCD_DTYPES[(type_char.upper(), size)]
+            except KeyError:
+                raise ValueError(f"不支持的 PCD 字段类型: {name} TYPE {type_char} SIZE {size}")
+            formats.append(base if count == 1 else (base, (count,)))
+        return np.dtype({"names": self.fields, "formats": formats})
+
+    def to_text(self) -> str:
+        """序列化为 PCD 文件头文本（含 DATA 行）"""
+        return (
+            "# .PCD v0.7 - Point Cloud Data file format\n"
+            f"VERSION {self.version}\n"
+            f"FIELDS {' '.join(self.fields)}\n"
+            f"SIZE {' '.join(map(str, self.size))}\n"
+            f"TYPE {' '.join(self.type)}\n"
+            f"COUNT {' '.join(map(str, self.count))}\n"
+            f"WIDTH {self.width}\n"
+            f"HEIGHT {self.height}\n"
+            f"VIEWPOINT {' '.join(map(str, self.viewpoint))}\n"
+            f"POINTS {self.points}\n"
+            f"DATA {self.data}\n"
+        )
+
+    @classmethod
+    def from_dtype(
+        cls,
+        dtype: np.dtype,
+        num_points: int,
+        data: str = "binary",
+        width: Optional[int] = None,
+        height: int = 1,
+        viewpoint: tuple = DEFAULT_VIEWPOINT,
+    ) -> "PcdHeader":
+        """由结构化 dtype 生成文件头"""
+        sizes, types, counts = [], [], []
+        for name in dtype.names:
+            base, shape = dtype[name].base, dtype[name].shape
+            if base.kind not in PCD_TYPE_CHARS:
+                raise ValueError(f"字段 {name} 的类型 {base} 无法写入 PCD")
+            sizes.append(base.itemsize)
+            types.append(PCD_TYPE_CHARS[base.kind])
+            counts.append(int(np.prod(shape)) if shape else 1)
+        return cls(
+            fields=list(dtype.names),
+            size=sizes,
+            type=types,
+            count=counts,
+            width=num_points if width is None else width,
+            height=height,
+            points=num_points,
+            data=data,
+            viewpoint=tuple(viewpoint),
+        )
+
+
+def read_pcd_header(path: Union[str, Path]) -> PcdHeader:
+    """解析 PCD 文件头，data_offset 为 DATA 行之后的字节位置"""
+    values = {}
+    with open(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"PCD 文件头不完整（缺少 DATA 行）: {path}")
+            parts = line.decode("ascii", errors="ignore").split()
+            if not parts or parts[0].startswith("#"):
+                continue
+            key = parts[0].upper()
+            values[key] = parts[1:]
+            if key == "DATA":
+                data_offset = f.tell()
+                break
+
+    fields = values["FIELDS"]
+    count = [int(x) for x in values.get("COUNT", ["1"] * len(fields))]
+    width = int(values["WIDTH"][0])
+    height = int(values.get("HEIGHT", ["1"])[0])
+    return PcdHeader(
+        fields=fields,
+        size=[int(x) for x in values["SIZE"]],
+        type=[x.upper() for x in values["TYPE"]],
+        count=count,
+        width=width,
+        height=height,
+        points=int(values["POINTS"][0]) if "POINTS" in values else width * height,
+        data=values["DATA"][0].lower(),
+        version=values.get("VERSION", ["0.7"])[0],
+        viewpoint=tuple(float(x) for x in values.get("VIEWPOINT", DEFAULT_VIEWPOINT)),
+        data_offset=data_offset,
+    )
+
+
+def read_pcd(path: Union[str, Path], mmap: bool = True) -> np.ndarray:
+    """
+    读取 PCD 文件
+    :param path: PCD 文件路径
+    :param mmap: binary 格式时返回只读 np.memmap（按需从文件读取），否则读入内存
+    :return: 结构化数组，字段与 FIELDS 一致
+    """
+    header = read_pcd_header(path)
+    dtype = header.dtype
+    if header.data == "binary":
+        if header.points == 0:
+            return np.zeros(0, dtype=dtype)
+        if mmap:
+            return np.memmap(
+                path, dtype=dtype, mode="r", offset=header.data_offset, shape=(header.points,)
+            )
+        return np.fromfile(path, dtype=dtype, count=header.points, offset=header.data_offset)
+
+    with open(path, "rb") as f:
+        f.seek(header.data_offset)
+        body = f.read()
+
+    if header.data == "ascii":
+        if not body.strip():
+            return np.zeros(0, dtype=dtype)
+        points = np.loadtxt(io.BytesIO(body), dtype=dtype, ndmin=1)
+        return points[: header.points]
+
+    if header.data == "binary_compressed":
+        compressed_size, raw_size = struct.unpack_from("<II", body)
+        raw = lzf.decompress(body[8 : 8 + compressed_size], raw_size)
+        return _from_columns(raw, dtype, header.points)
+
+    raise ValueError(f"不支持的 PCD 数据格式: {header.data}")
+
+
+def encode_pcd(
+    points: np.ndarray,
+    data_format: Literal["ascii", "binary", "binary_compressed"] = "binary",
+    viewpoint: tuple = DEFAULT_VIEWPOINT,
+) -> bytes:
+    """
+    把结构化点云数组编码为 PCD 文件内容
+    :param points: 结构化数组（整数 / 浮点字段，可含子数组字段）
+    :param data_format: ascii / binary / binary_compressed
+    """
+    if data_format not in PCD_DATA_FORMATS:
+        raise ValueError(
+            f"不支持的PCD数据格式: {data_format}，可选: {', '.join(PCD_DATA_FORMATS)}"
+        )
+    points = _to_packed_little_endian(points)
+    header = PcdHeader.from_dtype(points.dtype, len(points), data_format, viewpoint=viewpoint)
+    header_bytes = header.to_text().encode("utf-8")
+
+    if data_format == "binary":
+        # 紧凑小端结构化数组的内存布局即为PCD binary的数据段
+        return header_bytes + points.tobytes()
+
+    if data_format == "binary_compressed":
+        # 按字段逐列存储（与PCL一致）后LZF压缩，数据段前为压缩/未压缩字节数
+        raw = b"".join(
+            np.ascontiguousarray(points[name]).tobytes() for name in points.dtype.names
+        )
+        compressed = lzf.compress(raw)
+        return header_bytes + struct.pack("<II", len(compressed), len(raw)) + compressed
+
+    # ascii格式：逐列转为Python标量后批量格式化，与str(value)逐点输出完全一致
+    columns = []
+    for name in points.dtype.names:
+        values = points[name].reshape(len(points), -1)
+        columns.extend(map(str, values[:, i].tolist()) for i in range(values.shape[1]))
+    return header_bytes + "\n".join(map(" ".join, zip(*columns))).encode("utf-8")
+
+
+def write_pcd(
+    path: Union[str, Path],
+    points: np.ndarray,
+    data_format: Literal["ascii", "binary", "binary_compressed"] = "binary",
+    viewpoint: tuple = DEFAULT_VIEWPOINT,
+) -> Path:
+    """把结构化点云数组写为 PCD 文件，参数见 encode_pcd"""
+    path = Path(path)
+    path.write_bytes(encode_pcd(points, data_format, viewpoint))
+    return path
+
+
+def _to_packed_little_endian(points: np.ndarray) -> np.ndarray:
+    """转换为字段紧凑排列的小端结构化数组（已满足时不复制）"""
+    if points.dtype.names is None:
+        raise ValueError("点云需为结构化数组（字段名如 x/y/z/intensity）")
+    formats = []
+    for name in points.dtype.names:
+        sub = points.dtype[name]
+        base = sub.base.newbyteorder("<")
+        formats.append(base if not sub.shape else (base, sub.shape))
+    dtype = np.dtype({"names": list(points.dtype.names), "formats": formats})
+    if points.dtype == dtype:
+        return points
+    packed = np.empty(len(points), dtype=dtype)
+    for name in dtype.names:
+        packed[name] = points[name]
+    return packed
+
+
+def _from_columns(raw: bytes, dtype: np.dtype, num_points: int) -> np.ndarray:
+    """按字段逐列存储的字节（binary_compressed 解压结果）-> 结构化数组"""
+    points = np.empty(num_points, dtype=dtype)
+    offset = 0
+    for name in dtype.names:
+        column = np.frombuffer(raw, dtype=dtype[name], count=num_points, offset=offset)
+        points[name] = column
+        offset += column.nbytes
+    if offset != len(raw):
+        raise ValueError(f"binary_compressed 数据长度不符: 期望 {offset}，实际 {len(raw)}")
+    return points
@@ -1,8 +1,32 @@
 __version__ = "0.1.0"
 
-from .rosbag_reader import RosbagReader
-from .message_saver import MessageSaver
-from .message_handler import MessageHandler
+import importlib
 
+# 公开名称 -> 所在子模块。首次访问时才导入（PEP 562），
+# 使 `from lovely_utils.ros import rosbag_reader_cli` 等轻量入口不必加载 rosbags / cv2
+_LAZY_ATTRS = {
+    "RosbagReader": ".rosbag_reader",
+    "MessageSaver": ".message_saver",
+    "MessageHandler": ".message_handler",
+    "BagSample": ".samples",
+    "RosbagDataset": ".dataset",
+    "load_timestamp_index": ".timestamp_index",
+}
 
-__all__ = ["RosbagReader", "MessageSaver", "MessageHandler"]
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "RosbagReader",
+    "MessageSaver",
+    "MessageHandler",
+    "BagSample",
+    "RosbagDataset",
+    "load_timestamp_index",
+]
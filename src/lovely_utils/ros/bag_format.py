@@ -0,0 +1,156 @@
+"""
+bag 格式与 typestore 自动识别。
+
+- ROS1：单个 .bag 文件（以 "#ROSBAG V2.0" 开头）
+- ROS2：包含 metadata.yaml 的目录；直接传入其中的 .mcap / .db3 文件时回退到所在目录
+
+识别出格式后选择对应的 typestore：ROS1 使用 ros1_noetic；ROS2 优先使用 metadata.yaml 中记录的
+ros_distro，未记录时使用 ros2_kilted。bag 内嵌的消息定义由 CachedAnyReader 注册，
+相同的定义集合在进程内只注册一次。
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, Literal, Optional, Union
+
+from rosbags.highlevel import AnyReader
+from rosbags.interfaces import MessageDefinitionFormat
+from rosbags.interfaces.typing import Typesdict
+from rosbags.typesys import Stores, get_typestore
+from rosbags.typesys.store import Typestore
+
+from .type import get_cached_typestore
+
+ROS1_MAGIC = b"#ROSBAG V2.0"
+ROS2_METADATA = "metadata.yaml"
+ROS2_STORAGE_SUFFIXES = (".mcap", ".db3")
+DEFAULT_ROS2_STORE = Stores.ROS2_KILTED
+
+# 内嵌消息定义集合 -> 已注册这些定义的 typestore
+_EMBEDDED_TYPESTORES: Dict[tuple, Typestore] = {}
+_EMBEDDED_LOCK = threading.Lock()
+
+
+def resolve_bag_path(path: Union[str, Path]) -> Path:
+    """
+    规范化 bag 路径：ROS2 的 .mcap / .db3 存储文件回退到包含 metadata.yaml 的目录
+    """
+    path = Path(path)
+    if path.is_file() and path.suffix in ROS2_STORAGE_SUFFIXES:
+        if (path.parent / ROS2_METADATA).exists():
+            return path.parent
+        raise ValueError(f"{path} 所在目录缺少 {ROS2_METADATA}，无法作为 ROS2 bag 读取")
+    return path
+
+
+def detect_bag_format(path: Union[str, Path]) -> Literal["ros1", "ros2"]:
+    """根据文件内容/目录结构判断 bag 格式"""
+    path = resolve_bag_path(path)
+    if path.is_dir():
+        if (path / ROS2_METADATA).exists():
+            return "ros2"
+        raise ValueError(f"{path} 不是 ROS2 bag 目录（缺少 {ROS2_METADATA}）")
+    if not path.exists():
+        raise FileNotFoundError(path)
+    with open(path, "rb") as f:
+        if f.read(len(ROS1_MAGIC)) == ROS1_MAGIC:
+            return "ros1"
+    raise ValueError(f"无法识别的 bag 格式: {path}")
+
+
+def get_ros2_distro(path: Union[str, Path]) -> Optional[str]:
+    """读取 ROS2 bag metadata.yaml 中记录的 ros_distro（较新的 rosbag2 才会写入）"""
+    from ruamel.yaml import YAML
+
+    metadata_path = resolve_bag_path(path) / ROS2_METADATA
+    metadata = YAML(typ="safe").load(metadata_path.read_text())
+    return (metadata or {}).get("rosbag2_bagfile_information", {}).get("ros_distro")
+
+
+def select_typestore(
+    path: Union[str, Path], typestore: Union[str, Stores, Typestore, None] = None
+) -> Typestore:
+    """
+    为 bag 选择 typestore
+
+    :param path: bag 路径
+    :param typestore: 显式指定时直接使用（名称、Stores 或 Typestore 实例），None 或 "auto" 时自动识别
+    """
+    if isinstance(typestore, Typestore):
+        return typestore
+    if typestore is not None and typestore != "auto":
+        return get_cached_typestore(typestore)
+    if detect_bag_format(path) == "ros1":
+        return get_cached_typestore(Stores.ROS1_NOETIC)
+    distro = get_ros2_distro(path)
+    if distro:
+        try:
+            return get_cached_typestore(Stores(f"ros2_{distro.lower()}"))
+        except ValueError:
+            pass
+    return get_cached_typestore(DEFAULT_ROS2_STORE)
+
+
+class CachedAnyReader(AnyReader):
+    """
+    AnyReader 的变体：打开流程沿用 AnyReader.open，只替换最后一步 typestore 的构建。
+    相同的内嵌定义集合在进程内只注册一次（生成并执行序列化代码），没有内嵌定义时
+    直接基于 default_typestore，而不是每次打开都重新注册其全部类型。
+    每个 reader 拿到的是共享 typestore 的浅拷贝，对其 register 不会影响缓存和其他 reader。
+    """
+
+    def open(self) -> None:
+        pending = self.typestore = _PendingRegistration()
+        super().open()
+        if self.typestore is not pending:
+            # AnyReader 未按预期通过 register 构建 typestore 时直接使用其结果
+            return
+        definitions = tuple(
+            sorted(
+                {
+                    (c.msgtype, c.msgdef.data)
+                    for c in self.connections
+                    if c.msgdef.format != MessageDefinitionFormat.NONE
+                }
+            )
+        )
+        if definitions:
+            typestore = _get_embedded_typestore(definitions, pending.typs)
+        elif self.default_typestore is not None:
+            typestore = self.default_typestore
+        else:
+            typestore = get_cached_typestore(Stores.ROS2_FOXY)
+        self.typestore = copy_typestore(typestore)
+
+
+class _PendingRegistration:
+    """AnyReader.open 期间的占位 typestore：只记下要注册的类型定义"""
+
+    def __init__(self):
+        self.typs: Typesdict = {}
+
+    def register(self, typs: Typesdict) -> None:
+        self.typs = typs
+
+
+def copy_typestore(typestore: Typestore) -> Typestore:
+    """
+    浅拷贝 typestore：共享已生成的消息类和序列化函数，类型表各自独立，
+    对拷贝 register 新类型不会修改原 typestore
+    """
+    copied = Typestore()
+    copied.types = dict(typestore.types)
+    copied.fielddefs = dict(typestore.fielddefs)
+    copied.cache = dict(typestore.cache)
+    return copied
+
+
+def _get_embedded_typestore(definitions: tuple, typs: Typesdict) -> Typestore:
+    """按内嵌消息定义集合取（或注册并缓存）typestore"""
+    with _EMBEDDED_LOCK:
+        typestore = _EMBEDDED_TYPESTORES.get(definitions)
+        if typestore is None:
+            typestore = get_typestore(Stores.EMPTY)
+            typestore.register(typs)
+            _EMBEDDED_TYPESTORES[definitions] = typestore
+        return typestore
@@ -0,0 +1,182 @@
+"""
+单个 ROS1 bag 的多进程分块解码。
+
+ROS1 bag 由若干（通常经 bz2/lz4 压缩的）chunk 组成，rosbags 在单线程内依次解压。
+这里先在主进程中只遍历索引（不读负载）完成时间窗口/抽帧/限频等过滤，
+再把选中的消息按 chunk 切成任务，交给进程池并行解压、切出消息负载，
+samples 模式下还会在子进程中把图像/点云解码为 NumPy 数组。
+
+rosbags 的消息类在运行时生成，无法跨进程 pickle，因此子进程返回的是原始字节或 NumPy 数组，
+需要消息对象的场景（save_msg）在主进程中反序列化。
+"""
+
+import heapq
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from rosbags.highlevel import AnyReader
+
+from .bag_format import CachedAnyReader
+from .samples import IMAGE_MSGTYPES, POINTCLOUD_MSGTYPES, decode_message
+from .zero_copy import read_message_record
+
+# 子进程内打开的 bag，由进程池 initializer 设置
+_WORKER_STATE = {}
+
+
+def is_chunk_parallel_supported(reader: AnyReader) -> bool:
+    """AnyReader 是否为单个 ROS1 bag"""
+    return not reader.is2 and len(reader.readers) == 1
+
+
+def iter_index_entries(
+    reader: AnyReader,
+    connections: list,
+    start: Optional[int] = None,
+    stop: Optional[int] = None,
+) -> Iterator[tuple]:
+    """
+    按时间顺序遍历 ROS1 索引，不读取消息负载
+
+    :return: 迭代 (connection, 时间戳纳秒, IndexData)，与 AnyReader.messages 顺序一致
+    """
+    bag = reader.readers[0]
+
+    def stream(connection):
+        for entry in bag.indexes[connection.id]:
+            yield entry, connection
+
+    streams = [stream(connection) for connection in connections]
+    for entry, connection in heapq.merge(*streams, key=lambda item: item[0]):
+        if start and entry.time < start:
+            continue
+        if stop and entry.time >= stop:
+            return
+        yield connection, entry.time, entry
+
+
+def plan_tasks(entries: Iterable[tuple], chunks_per_task: int = 4) -> Iterator[list]:
+    """
+    把按时间排序的索引项切成任务，每个任务覆盖约 chunks_per_task 个相邻 chunk。
+    只在 chunk 边界处切分，同一 chunk 尽量只被解压一次。
+
+    :return: 迭代任务，每个任务为 [(序号, connection, 时间戳, IndexData), ...]
+    """
+    task = []
+    chunks = set()
+    for seq, (connection, timestamp, entry) in enumerate(entries):
+        if entry.chunk_pos not in chunks and len(chunks) >= chunks_per_task:
+            yield task
+            task, chunks = [], set()
+        chunks.add(entry.chunk_pos)
+        task.append((seq, connection, timestamp, entry))
+    if task:
+        yield task
+
+
+def _init_worker(bag_path: str, typestore):
+    reader = CachedAnyReader([Path(bag_path)], default_typestore=typestore)
+    reader.open()
+    _WORKER_STATE["reader"] = reader
+
+
+def _decode_task(
+    entries: list, decode_samples: bool, color_space: Optional[str]
+) -> list:
+    """
+    子进程：解压任务涉及的 chunk，按索引项顺序返回每条消息的结果
+
+    :param entries: [(chunk_pos, offset), ...]
+    :param decode_samples: 为 True 时把图像/点云解码为 NumPy 数组
+    :return: 与 entries 对齐的 [(header 时间戳或 None, 解码数据或 None, 原始字节或 None), ...]
+    """
+    reader = _WORKER_STATE["reader"]
+    bag = reader.readers[0]
+    msgtypes = {c.id: c.msgtype for c in bag.connections}
+
+    chunk_data = {}
+    results = []
+    for chunk_pos, offset in entries:
+        data = chunk_data.get(chunk_pos)
+        if data is None:
+            chunk = bag.chunks[chunk_pos]
+            bag.bio.seek(chunk.datapos)
+            data = memoryview(chunk.decompressor(bag.bio.read(chunk.datasize)))
+            chunk_data[chunk_pos] = data
+        conn_id, rawdata = read_message_record(data, offset)
+        msgtype = msgtypes[conn_id]
+        if decode_samples and msgtype in IMAGE_MSGTYPES + POINTCLOUD_MSGTYPES:
+            msg = reader.deserialize(rawdata, msgtype)
+            stamp = msg.header.stamp
+            results.append(
+                (
+                    stamp.sec * 1_000_000_000 + stamp.nanosec,
+                    decode_message(msg, msgtype, color_space),
+                    None,
+                )
+            )
+        else:
+            results.append((None, None, bytes(rawdata)))
+    return results
+
+
+def iter_chunk_parallel(
+    bag_path: Path,
+    typestore,
+    tasks: Iterable[list],
+    num_processes: int,
+    ordered: bool = True,
+    decode_samples: bool = False,
+    color_space: Optional[str] = "rgb8",
+) -> Iterator[tuple]:
+    """
+    用进程池并行执行 plan_tasks 产生的任务。
+    同时在途的任务数限制为 2 * num_processes，内存占用有界。
+
+    :param ordered: True 时按原始时间顺序（索引合并顺序）输出，较慢的任务会阻塞后续输出；
+        False 时按任务完成顺序输出
+    :return: 迭代 (connection, 时间戳, header 时间戳或 None, 解码数据或 None, 原始字节或 None)
+    """
+    tasks = iter(tasks)
+    window = 2 * num_processes
+    with ProcessPoolExecutor(
+        max_workers=num_processes,
+        initializer=_init_worker,
+        initargs=(str(bag_path), typestore),
+    ) as executor:
+        pending = deque()
+
+        def submit() -> bool:
+            task = next(tasks, None)
+            if task is None:
+                return False
+            entries = [(entry.chunk_pos, entry.offset) for _, _, _, entry in task]
+            future = executor.submit(_decode_task, entries, decode_samples, color_space)
+            pending.append((future, task))
+            return True
+
+        def combine(task: list, results: list) -> Iterator[tuple]:
+            for (_, connection, timestamp, _), result in zip(task, results):
+                yield (connection, timestamp) + result
+
+        while len(pending) < window and submit():
+            pass
+
+        if ordered:
+            # 任务是时间顺序索引流的连续切片，按提交顺序取结果即为时间顺序
+            while pending:
+                future, task = pending.popleft()
+                results = future.result()
+                submit()
+                yield from combine(task, results)
+        else:
+            while pending:
+                done, _ = wait([future for future, _ in pending], return_when=FIRST_COMPLETED)
+                for item in [item for item in pending if item[0] in done]:
+                    pending.remove(item)
+                    future, task = item
+                    results = future.result()
+                    submit()
+                    yield from combine(task, results)
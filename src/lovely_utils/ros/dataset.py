@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+from .rosbag_reader import RosbagReader
+from .samples import BagSample
+
+
+class RosbagDataset:
+    """
+    多个 bag 的流式样本数据集，接口与 torch.utils.data.IterableDataset 兼容（实现 __iter__），
+    但不依赖 PyTorch：可以直接 for 循环使用，也可以交给 DataLoader。
+    在 DataLoader 的多个 worker 中使用时，按 bag 轮流分配给各 worker，每个 bag 只被读取一次。
+    """
+
+    def __init__(
+        self,
+        bag_paths: List[Union[str, Path]],
+        topics: list,
+        typestore=None,
+        prefetch_size: int = 0,
+        color_space: Optional[str] = "rgb8",
+        decode: bool = True,
+        **reader_options,
+    ):
+        """
+        :param bag_paths: bag 路径列表
+        :param topics: 读取的话题列表
+        :param typestore: 消息类型库，None 时使用 RosbagReader 的默认值
+        :param prefetch_size: 每个 bag 后台预读的样本数，0 表示不预读
+        :param color_space: 图像输出的颜色空间，None 保持原始编码
+        :param decode: 是否把图像/点云解码为 NumPy 数组
+        :param reader_options: 传给 RosbagReader 的过滤参数（start_time/decimation/zero_copy 等）
+        """
+        self.bag_paths = [Path(p) for p in bag_paths]
+        self.topics = topics
+        self.typestore = typestore
+        self.prefetch_size = prefetch_size
+        self.color_space = color_space
+        self.decode = decode
+        self.reader_options = reader_options
+
+    def __iter__(self) -> Iterator[BagSample]:
+        worker_id, num_workers = self._get_worker_info()
+        for bag_path in self.bag_paths[worker_id::num_workers]:
+            options = dict(self.reader_options)
+            if self.typestore is not None:
+                options["typestore"] = self.typestore
+            reader = RosbagReader(bag_path, self.topics, **options)
+            yield from reader.iter_samples(
+                self.prefetch_size, self.color_space, self.decode
+            )
+
+    @staticmethod
+    def _get_worker_info() -> Tuple[int, int]:
+        """
+        DataLoader worker 的 (编号, 总数)。只在 PyTorch 已被导入时查询，
+        本模块自身不导入 torch；不在 worker 中时返回 (0, 1)。
+        """
+        torch_data = sys.modules.get("torch.utils.data")
+        if torch_data is None:
+            return 0, 1
+        info = torch_data.get_worker_info()
+        if info is None:
+            return 0, 1
+        return info.id, info.num_workers
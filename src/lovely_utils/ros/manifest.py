@@ -0,0 +1,205 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+class ExtractionManifest:
+    """
+    bag 提取进度清单，用于中断后续跑和增量提取。
+
+    保存目录下维护两个文件：
+    - manifest.json：bag 标识（路径/大小/修改时间）、提取参数、每个话题已写入的消息数、
+      最后写入的时间戳、保存失败的消息时间戳、是否完成，以及流式文件（jsonl/csv）在检查点时的字节数
+    - manifest_files.txt：已写出的输出文件相对路径，每行一个，只追加
+    """
+
+    MANIFEST_NAME = "manifest.json"
+    FILES_NAME = "manifest_files.txt"
+    VERSION = 1
+
+    def __init__(self, save_dir: Path, bag_path: Path, options: Optional[dict] = None):
+        """
+        :param save_dir: 该 bag 的输出目录
+        :param bag_path: rosbag 路径
+        :param options: 影响输出内容的提取参数，参数变化时旧进度作废
+        """
+        self.save_dir = Path(save_dir)
+        self.bag_path = Path(bag_path)
+        self.options = options or {}
+        self.complete = False
+        self.topics: Dict[str, dict] = {}
+        self.stream_files: Dict[str, int] = {}
+        self._logged_files = set()
+        self._new_files: List[str] = []
+        # 新的提取从头重写文件清单，续跑时追加
+        self._files_mode = "w"
+        # 续跑时每个话题在最后时间戳上已跳过的消息数
+        self._skipped_at_last: Dict[str, int] = {}
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.save_dir / self.MANIFEST_NAME
+
+    @property
+    def files_path(self) -> Path:
+        return self.save_dir / self.FILES_NAME
+
+    def load(self) -> bool:
+        """
+        读取已有清单；bag 或提取参数与清单不一致时忽略旧进度
+
+        :return: 是否成功恢复了已有进度
+        """
+        if not self.manifest_path.exists():
+            return False
+        try:
+            with open(self.manifest_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: 清单无法读取，重新提取: {self.manifest_path} ({e})")
+            return False
+        if data.get("version") != self.VERSION or data.get("bag") != self._bag_identity():
+            return False
+        if data.get("options") != json.loads(json.dumps(self.options)):
+            return False
+
+        self.complete = data.get("complete", False)
+        self.topics = data.get("topics", {})
+        self.stream_files = data.get("stream_files", {})
+        if self.files_path.exists():
+            with open(self.files_path) as f:
+                self._logged_files = {line.rstrip("\n") for line in f if line.strip()}
+        self._files_mode = "a"
+        return True
+
+    def is_topic_complete(self, topic: str) -> bool:
+        return self.topics.get(topic, {}).get("complete", False)
+
+    def last_timestamp(self, topic: str) -> Optional[int]:
+        return self.topics.get(topic, {}).get("last_timestamp")
+
+    def resume_timestamp(self, topic: str) -> Optional[int]:
+        """续跑时该话题需要从哪个时间戳开始读取：最早的失败消息或最后写入的时间戳"""
+        state = self.topics.get(topic, {})
+        failed = state.get("failed_timestamps")
+        if failed:
+            return min(failed)
+        return state.get("last_timestamp")
+
+    def should_skip(self, topic: str, timestamp: int) -> bool:
+        """
+        续跑时跳过上次检查点之前已写入的消息（在反序列化之前调用），
+        上次保存失败的消息不跳过，重新保存
+        """
+        state = self.topics.get(topic)
+        if not state or state.get("last_timestamp") is None:
+            return False
+        if timestamp in state.get("failed_timestamps", ()):
+            return False
+        last = state["last_timestamp"]
+        if timestamp < last:
+            return True
+        if timestamp == last:
+            # 同一时间戳可能有多条消息，只跳过已写入的条数
+            skipped = self._skipped_at_last.get(topic, 0)
+            if skipped < state.get("count_at_last", 0):
+                self._skipped_at_last[topic] = skipped + 1
+                return True
+        return False
+
+    def record(self, topic: str, timestamp: int):
+        """记录一条已成功写出的消息（须按消息顺序调用）"""
+        state = self.topics.setdefault(topic, self._new_topic_state())
+        state["message_count"] += 1
+        failed = state.setdefault("failed_timestamps", [])
+        if timestamp in failed:
+            # 续跑时重新保存成功的失败消息，不改变已写入的最后时间戳
+            failed.remove(timestamp)
+            if state["last_timestamp"] is not None and timestamp < state["last_timestamp"]:
+                return
+        if timestamp == state["last_timestamp"]:
+            state["count_at_last"] += 1
+        else:
+            state["last_timestamp"] = timestamp
+            state["count_at_last"] = 1
+
+    def record_failure(self, topic: str, timestamp: int):
+        """记录一条保存失败的消息：话题不会被标记为完成，续跑时重新保存"""
+        state = self.topics.setdefault(topic, self._new_topic_state())
+        if timestamp not in state.setdefault("failed_timestamps", []):
+            state["failed_timestamps"].append(timestamp)
+
+    def record_file(self, file_path: Optional[str]):
+        """记录输出文件名（线程安全：只做 list.append）"""
+        if file_path:
+            self._new_files.append(file_path)
+
+    def mark_complete(self, topics: Iterable[str]):
+        """标记话题提取完成；有保存失败消息的话题保持未完成，续跑时重试"""
+        for topic in topics:
+            state = self.topics.setdefault(topic, self._new_topic_state())
+            state["complete"] = not state.get("failed_timestamps")
+        self.complete = all(state.get("complete") for state in self.topics.values())
+
+    def truncate_stream_files(self):
+        """把流式文件截断到上次检查点的长度，丢弃检查点之后写入的半截数据"""
+        for rel_path, size in self.stream_files.items():
+            path = self.save_dir / rel_path
+            if path.exists() and path.stat().st_size > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def checkpoint(self, stream_files: Iterable[str] = ()):
+        """
+        写入检查点。调用前需确保已提交的消息都已落盘（MessageSaver.flush）。
+        :param stream_files: 当前打开的流式文件路径
+        """
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+        for file_path in stream_files:
+            rel_path = os.path.relpath(file_path, self.save_dir)
+            self.stream_files[rel_path] = os.path.getsize(file_path)
+
+        new_files, self._new_files = self._new_files, []
+        lines = []
+        for file_path in new_files:
+            rel_path = os.path.relpath(file_path, self.save_dir)
+            if rel_path not in self._logged_files:
+                self._logged_files.add(rel_path)
+                lines.append(rel_path + "\n")
+        if lines or self._files_mode == "w":
+            with open(self.files_path, self._files_mode) as f:
+                f.writelines(lines)
+            self._files_mode = "a"
+
+        data = {
+            "version": self.VERSION,
+            "bag": self._bag_identity(),
+            "options": self.options,
+            "complete": self.complete,
+            "topics": self.topics,
+            "stream_files": self.stream_files,
+        }
+        # 先写临时文件再原子替换，避免中断时留下损坏的清单
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def _new_topic_state() -> dict:
+        return {
+            "message_count": 0,
+            "last_timestamp": None,
+            "count_at_last": 0,
+            "failed_timestamps": [],
+            "complete": False,
+        }
+
+    def _bag_identity(self) -> dict:
+        stat = self.bag_path.stat()
+        return {
+            "path": str(self.bag_path.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
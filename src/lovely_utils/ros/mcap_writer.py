@@ -0,0 +1,140 @@
+"""
+把选中的话题/时间窗口写成单个 MCAP 文件（ROS2 bag 目录：<name>/<name>.mcap + metadata.yaml）。
+
+基于 rosbags 的纯 Python rosbag2 writer，不依赖 ROS 环境：
+- 消息按约 1MB 分 chunk，chunk 以 zstd 压缩
+- 文件尾部写入 chunk 索引、message 索引和 summary，可按话题/时间随机访问
+- ROS1 消息直接在字节层面转换为 CDR（丢弃 Header.seq），不经过反序列化
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, Literal, Union
+
+from rosbags.convert.converter import LATCH
+from rosbags.highlevel import AnyReader
+from rosbags.interfaces import Connection, ConnectionExtRosbag2
+from rosbags.rosbag2 import CompressionFormat, CompressionMode, StoragePlugin, Writer
+from rosbags.typesys import Stores, get_typestore
+from rosbags.typesys.store import Typestore
+
+from .type import get_cached_typestore
+
+MCAP_COMPRESSIONS = ("zstd", "none")
+
+
+class McapBagWriter:
+    """
+    把 AnyReader 读出的原始消息写入 MCAP 格式的 ROS2 bag，需作为上下文管理器使用：
+
+        with McapBagWriter(path, reader) as writer:
+            for connection, timestamp, rawdata in reader.messages(connections):
+                writer.write(connection, timestamp, rawdata)
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        reader: AnyReader,
+        compression: Literal["zstd", "none"] = "zstd",
+    ):
+        """
+        :param path: 输出 bag 目录，不能已存在
+        :param reader: 已打开的源 AnyReader（ROS1 或 ROS2），提供消息类型定义
+        :param compression: chunk 压缩方式：zstd 或 none
+        """
+        if compression not in MCAP_COMPRESSIONS:
+            raise ValueError(
+                f"不支持的 MCAP 压缩方式: {compression}，可选: {', '.join(MCAP_COMPRESSIONS)}"
+            )
+        self.path = Path(path)
+        self.reader = reader
+        self.typestore = self._get_destination_typestore(reader)
+        self.writer = Writer(self.path, version=8, storage_plugin=StoragePlugin.MCAP)
+        if compression == "zstd":
+            self.writer.set_compression(CompressionMode.STORAGE, CompressionFormat.ZSTD)
+        self.count = 0
+        self._connections: Dict[tuple, Connection] = {}
+        self._converters: Dict[str, Callable] = {}
+
+    def __enter__(self) -> "McapBagWriter":
+        self.writer.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.writer.close()
+
+    @property
+    def mcap_path(self) -> Path:
+        """bag 目录中的 .mcap 文件"""
+        return self.path / f"{self.path.name}.mcap"
+
+    def write(self, connection: Connection, timestamp: int, rawdata) -> None:
+        """
+        写入一条源 bag 中的原始消息
+        :param connection: 源 bag 的 connection
+        :param timestamp: 记录时间（纳秒）
+        :param rawdata: 源 bag 的序列化负载（ROS1 或 CDR）
+        """
+        key = (connection.id, connection.owner)
+        destination = self._connections.get(key)
+        if destination is None:
+            destination = self._add_connection(connection)
+            self._connections[key] = destination
+        converter = self._converters[connection.msgtype]
+        self.writer.write(destination, timestamp, converter(rawdata))
+        self.count += 1
+
+    def _add_connection(self, connection: Connection) -> Connection:
+        if connection.msgtype not in self._converters:
+            if self.reader.is2:
+                self._converters[connection.msgtype] = bytes
+            else:
+                typestore, msgtype = self.typestore, connection.msgtype
+                self._converters[msgtype] = lambda raw: typestore.ros1_to_cdr(raw, msgtype)
+
+        if isinstance(connection.ext, ConnectionExtRosbag2):
+            serialization_format = connection.ext.serialization_format
+            qos = connection.ext.offered_qos_profiles
+        else:
+            serialization_format = "cdr"
+            qos = LATCH if connection.ext.latching else []
+
+        for existing in self.writer.connections:
+            if existing.topic == connection.topic and existing.msgtype == connection.msgtype:
+                return existing
+        return self.writer.add_connection(
+            connection.topic,
+            connection.msgtype,
+            typestore=self.typestore,
+            serialization_format=serialization_format,
+            offered_qos_profiles=qos,
+        )
+
+    @staticmethod
+    def _get_destination_typestore(reader: AnyReader) -> Typestore:
+        """
+        输出 bag 使用的 typestore：ROS2 源直接沿用；ROS1 源沿用其类型定义，
+        仅把 std_msgs/msg/Header 换成 ROS2 版本（无 seq），与 ros1_to_cdr 的转换一致
+        """
+        if reader.is2:
+            return reader.typestore
+        header = get_cached_typestore(Stores.ROS2_FOXY).fielddefs["std_msgs/msg/Header"]
+        typestore = get_typestore(Stores.EMPTY)
+        typestore.register({**reader.typestore.fielddefs, "std_msgs/msg/Header": header})
+        return typestore
+
+
+def write_mcap(
+    path: Union[str, Path],
+    reader: AnyReader,
+    messages,
+    compression: Literal["zstd", "none"] = "zstd",
+) -> int:
+    """
+    把 (connection, 时间戳, 原始负载) 迭代写入 MCAP bag
+    :return: 写入的消息数
+    """
+    with McapBagWriter(path, reader, compression) as writer:
+        for connection, timestamp, rawdata in messages:
+            writer.write(connection, timestamp, rawdata)
+    return writer.count
@@ -1,16 +1,91 @@
 import os
+import csv
+import json
+import operator
+import threading
+import dataclasses
+from functools import partial
+from typing import Any, Callable, List, Optional, Sequence, Tuple
 import cv2
 import numpy as np
 from abc import ABC, abstractmethod
 from rosbags.image import message_to_cvimage
-import struct
+
+from .ordered_pool import OrderedEncodePool
+from ..pointcloud.kitti import to_kitti_bin
+from ..pointcloud.pcd import encode_pcd
+
+# sensor_msgs/PointField 数据类型 -> NumPy 类型（不含字节序）
+POINTFIELD_DTYPES = {
+    1: "i1",  # INT8
+    2: "u1",  # UINT8
+    3: "i2",  # INT16
+    4: "u2",  # UINT16
+    5: "i4",  # INT32
+    6: "u4",  # UINT32
+    7: "f4",  # FLOAT32
+    8: "f8",  # FLOAT64
+}
+
+
+def pointcloud2_to_array(msg) -> np.ndarray:
+    """
+    按 msg.fields / point_step / is_bigendian 构建结构化dtype，一次性解析全部点
+
+    返回:
+        字段紧凑排列的小端结构化数组，字段顺序与 msg.fields 一致
+    """
+    num_points = msg.width * msg.height
+    byte_order = ">" if msg.is_bigendian else "<"
+    known_fields = [f for f in msg.fields if f.datatype in POINTFIELD_DTYPES]
+
+    src_dtype = np.dtype(
+        {
+            "names": [f.name for f in known_fields],
+            "formats": [
+                byte_order + POINTFIELD_DTYPES[f.datatype] for f in known_fields
+            ],
+            "offsets": [f.offset for f in known_fields],
+            "itemsize": msg.point_step,
+        }
+    )
+    src = np.frombuffer(msg.data, dtype=src_dtype, count=num_points)
+
+    dst_dtype = np.dtype(
+        [
+            (f.name, "<" + POINTFIELD_DTYPES.get(f.datatype, "i4"))
+            for f in msg.fields
+        ]
+    )
+    # 未知类型字段按整数0填充（ascii 输出为 0 而不是 0.0）
+    points = np.zeros(num_points, dtype=dst_dtype)
+    for f in known_fields:
+        points[f.name] = src[f.name]
+    return points
 
 
 class MessageHandler(ABC):
-    """消息处理器基类"""
+    """
+    消息处理器基类。
+
+    保存分两个阶段：encode 只做纯计算（可在线程池中并行调用），commit 负责写盘、
+    分配分片、记录索引和追加流式文件行（须在单个线程内按消息顺序调用）。
+    只实现 save 的处理器保持可用：默认 encode 不做任何事，commit 直接调用 save。
+    """
+
+    # 保存失败时打印的提示
+    error_message = "保存消息失败"
 
     def __init__(self, format: str = "json"):  # 添加 format 属性
         self.format = format.lower()  # 初始化 format 属性
+        # (output_dir, topic) -> 已创建的话题目录，一次保存过程中只创建/检查一次
+        self._topic_dirs = {}
+        # 消息类 -> 文件名前缀 "<msg_type>_"
+        self._name_prefixes = {}
+        # 分片输出布局（ShardedOutputLayout），None 表示每个话题一个平铺目录
+        self.layout = None
+        # 时间戳索引（TimestampIndex），平铺写入时由处理器记录，分片写入时由布局记录
+        self.index = None
 
     @abstractmethod
     def can_handle(self, msg) -> bool:
@@ -20,28 +95,163 @@ class MessageHandler(ABC):
     def save(self, msg, output_dir: str, topic_name: str) -> str:
         pass
 
+    def encode(self, msg):
+        """
+        编码阶段：不写文件、不修改共享状态，可在多个线程中并行调用
+        :return: 交给 commit 的编码结果，默认 None
+        """
+        return None
+
+    def commit(self, msg, output_dir: str, topic_name: str, encoded) -> Optional[str]:
+        """
+        提交阶段：写出 encode 的结果，调用方须按消息顺序在单个线程内调用
+        :param encoded: encode 的返回值
+        :return: 输出文件路径
+        """
+        return self.save(msg, output_dir, topic_name)
+
+    def save_encoded(
+        self, msg, output_dir: str, topic_name: str, encode: Callable[[], Any]
+    ) -> Optional[str]:
+        """
+        执行提交阶段，失败时打印错误并返回 None
+        :param encode: 返回编码结果（或抛出编码阶段异常）的函数，如编码 future 的 result
+        """
+        try:
+            return self.commit(msg, output_dir, topic_name, encode())
+        except Exception as e:
+            print(f"{self.error_message}: {e}")
+            return None
+
+    def close(self):
+        """释放处理器持有的资源（如流式写入的文件句柄），并清空目录缓存"""
+        self._topic_dirs.clear()
+
+    def flush(self):
+        """确保已提交的消息全部落盘，默认无操作"""
+        pass
+
+    def open_files(self) -> list:
+        """返回当前打开、持续追加写入的文件路径，默认无"""
+        return []
+
     def _get_message_type(self, msg) -> str:
         return getattr(msg, "_type", type(msg).__name__)
 
     def _generate_file_name(self, msg) -> str:
-        # 时间戳转为字符串（秒_纳秒）
+        # 文件名：<msg_type>_<秒>_<纳秒>.<format>，前缀按消息类缓存
+        prefix = self._name_prefixes.get(type(msg))
+        if prefix is None:
+            prefix = f"{self._get_message_type(msg)}_"
+            self._name_prefixes[type(msg)] = prefix
         timestamp = msg.header.stamp
-        time_str = f"{timestamp.sec}_{timestamp.nanosec}"
-        msg_type = self._get_message_type(msg)
-        return f"{msg_type}_{time_str}.{self.format}"
+        return f"{prefix}{timestamp.sec}_{timestamp.nanosec}.{self.format}"
 
     def _generate_file_path(
         self, output_dir: str, topic_name: str, filename: str
     ) -> str:
-        topic_dir = os.path.join(output_dir, topic_name.strip("/").replace("/", "_"))
-        os.makedirs(topic_dir, exist_ok=True)
-        file_path = os.path.join(topic_dir, filename)
+        return os.path.join(self._get_topic_dir(output_dir, topic_name), filename)
+
+    def _write_output(
+        self,
+        msg,
+        output_dir: str,
+        topic_name: str,
+        file_name: str,
+        data: bytes,
+        sidecars: Sequence[Tuple[str, bytes]] = (),
+    ) -> str:
+        """
+        写出一个输出文件：平铺写入话题目录，或交给分片布局写入分片并记录索引
+        :param sidecars: 附属文件 [(文件名, 数据)]（如 raw 图像的 .json 头信息），
+            与主文件写在同一位置，不单独记录索引
+        """
+        stamp = msg.header.stamp
+        timestamp_ns = stamp.sec * 1_000_000_000 + stamp.nanosec
+        if self.layout is not None:
+            return self.layout.write(
+                self._get_topic_dir(output_dir, topic_name),
+                file_name,
+                timestamp_ns,
+                data,
+                sidecars,
+            )
+        file_path = self._generate_file_path(output_dir, topic_name, file_name)
+        with open(file_path, "wb") as f:
+            f.write(data)
+        for sidecar_name, sidecar_data in sidecars:
+            with open(os.path.join(os.path.dirname(file_path), sidecar_name), "wb") as f:
+                f.write(sidecar_data)
+        if self.index is not None:
+            self.index.record(
+                os.path.dirname(file_path),
+                timestamp_ns,
+                file_name,
+                memoryview(data).nbytes,
+            )
         return file_path
 
+    def _write_outputs(
+        self, msg, output_dir: str, topic_name: str, outputs: List[Tuple[str, Any]]
+    ) -> str:
+        """写出 encode 得到的 [(文件名, 数据)]：第一个为主文件，其余为附属文件"""
+        file_name, data = outputs[0]
+        return self._write_output(
+            msg, output_dir, topic_name, file_name, data, outputs[1:]
+        )
+
+    def _get_topic_dir(self, output_dir: str, topic_name: str) -> str:
+        """话题目录只在首次使用时规范化并创建，之后直接查缓存"""
+        key = (output_dir, topic_name)
+        topic_dir = self._topic_dirs.get(key)
+        if topic_dir is None:
+            topic_dir = os.path.join(
+                output_dir, topic_name.strip("/").replace("/", "_")
+            )
+            os.makedirs(topic_dir, exist_ok=True)
+            self._topic_dirs[key] = topic_dir
+        return topic_dir
+
+
+# ROS 图像编码 -> OpenCV BGR 转换码（None 表示无需转换）
+IMAGE_ENCODING_CONVERSIONS = {
+    "rgb8": cv2.COLOR_RGB2BGR,
+    "rgb16": cv2.COLOR_RGB2BGR,
+    "bgr8": None,
+    "bgra8": cv2.COLOR_BGRA2BGR,
+    "mono8": None,
+    "mono16": None,
+}
+
 
 class SensorMsgsMsgImageHandler(MessageHandler):
-    def __init__(self, format: str = "jpg"):
+    error_message = "保存图像失败"
+
+    def __init__(
+        self,
+        format: str = "jpg",
+        jpeg_quality: int = 95,
+        png_compression: int = 3,
+        num_threads: int = 0,
+        max_pending: int = 0,
+    ):
+        """
+        :param format: 保存格式，"jpg"/"png" 编码保存；"raw" 直接写出未解码的 data 并附带 .json 头信息
+        :param jpeg_quality: JPEG 质量（0-100）
+        :param png_compression: PNG 压缩级别（0-9）
+        :param num_threads: 编码线程数，0 表示在调用线程内同步保存
+        :param max_pending: 线程模式下最多排队的图像数（限制内存），0 表示 2 * num_threads
+        """
         super().__init__(format)  # 调用基类构造函数来初始化 format
+        self.num_threads = num_threads
+        self.max_pending = max_pending or 2 * num_threads
+        if self.format in ("jpg", "jpeg"):
+            self.imwrite_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        elif self.format == "png":
+            self.imwrite_params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+        else:
+            self.imwrite_params = []
+        self._pool = None
 
     def can_handle(self, msg) -> bool:
         # 判断是否为图像消息（检查关键字段）
@@ -52,48 +262,122 @@ class SensorMsgsMsgImageHandler(MessageHandler):
             and hasattr(msg, "width")
         )
 
-    def save(self, msg, output_dir: str, topic_name: str) -> str:
+    def save(self, msg, output_dir: str, topic_name: str) -> Optional[str]:
+        """
+        保存图像。线程模式下只把编码提交到线程池并返回 None：
+        写盘与索引记录在之后的 save / flush 调用中按提交顺序执行，且只记录写入成功的文件
+        """
+        encode = partial(self.encode, msg)
+        if self.num_threads <= 0:
+            return self.save_encoded(msg, output_dir, topic_name, encode)
+        # 排队数达到上限时先写出最早的图像，避免解码速度快于编码时内存无限增长
+        self._get_pool().submit(
+            encode,
+            lambda future: self.save_encoded(msg, output_dir, topic_name, future.result),
+        )
+        return None
+
+    def encode(self, msg) -> list:
+        """编码图像，返回 [(文件名, 数据)]；raw 格式附带同名 .json 头信息"""
         # 生成文件名（时间戳+frame_id，根据编码格式判断）
         file_name = self._generate_file_name(msg)
-        file_path = self._generate_file_path(output_dir, topic_name, file_name)
-
-        try:
-            # 用rosbags-image转换图像消息为numpy数组（OpenCV格式）
-            cv_image = self._convert_to_cv(msg)
-            # 保存为JPG
-            cv2.imwrite(file_path, cv_image)
-            return file_path
-        except Exception as e:
-            print(f"保存图像失败: {e}")
-            return None
+        if self.format == "raw":
+            return self._encode_raw(msg, file_name)
+        # 用rosbags-image转换图像消息为numpy数组（OpenCV格式）
+        cv_image = self._convert_to_cv(msg)
+        ok, buffer = cv2.imencode(f".{self.format}", cv_image, self.imwrite_params)
+        if not ok:
+            raise IOError(f"cv2.imencode 编码失败: {file_name}")
+        return [(file_name, buffer)]
+
+    def commit(self, msg, output_dir: str, topic_name: str, encoded: list) -> str:
+        return self._write_outputs(msg, output_dir, topic_name, encoded)
+
+    def flush(self):
+        """写出所有排队的图像，线程池保持可用"""
+        if self._pool is not None:
+            self._pool.drain()
+
+    def close(self):
+        """写出所有排队的图像并关闭线程池"""
+        if self._pool is not None:
+            try:
+                self._pool.drain()
+            finally:
+                self._pool.close()
+                self._pool = None
+        super().close()
+
+    def _get_pool(self) -> OrderedEncodePool:
+        if self._pool is None:
+            self._pool = OrderedEncodePool(
+                self.num_threads, self.max_pending, thread_name_prefix="image-encoder"
+            )
+        return self._pool
+
+    def _encode_raw(self, msg, file_name: str) -> list:
+        """未解码的图像数据，并在同名 .json 中记录解析所需的头信息"""
+        header = {
+            "height": msg.height,
+            "width": msg.width,
+            "encoding": msg.encoding,
+            "is_bigendian": int(msg.is_bigendian),
+            "step": msg.step,
+        }
+        return [
+            (file_name, memoryview(msg.data)),
+            (
+                os.path.splitext(file_name)[0] + ".json",
+                json.dumps(header, indent=2).encode("utf-8"),
+            ),
+        ]
 
     def _convert_to_cv(self, image_msg):
         """用rosbags-image将ROS图像消息转换为OpenCV格式（BGR）"""
         img_array = message_to_cvimage(image_msg)
 
-        # 使用字典简化通道转换
-        encoding_map = {
-            "rgb8": cv2.COLOR_RGB2BGR,
-            "rgb16": cv2.COLOR_RGB2BGR,
-            "bgr8": None,
-            "bgra8": cv2.COLOR_BGRA2BGR,
-            "mono8": None,
-            "mono16": None,
-        }
-
         encoding = image_msg.encoding.lower()
-        if encoding in encoding_map:
-            if encoding_map[encoding]:
-                return cv2.cvtColor(img_array, encoding_map[encoding])
+        if encoding in IMAGE_ENCODING_CONVERSIONS:
+            if IMAGE_ENCODING_CONVERSIONS[encoding] is not None:
+                return cv2.cvtColor(img_array, IMAGE_ENCODING_CONVERSIONS[encoding])
             return img_array
         else:
             return cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)  # 假设默认是RGB
 
 
 class SensorMsgsMsgPointCloud2Handler(MessageHandler):
-    def __init__(self, format: str = "pcd", data_format: str = "ascii"):
+    error_message = "保存点云消息失败"
+    SUPPORTED_FORMATS = ("pcd", "kitti_bin")
+    SUPPORTED_DATA_FORMATS = ("ascii", "binary", "binary_compressed")
+
+    def __init__(
+        self,
+        format: str = "pcd",
+        data_format: str = "binary",
+        intensity_default: float = 0.0,
+        rotate_z_180: bool = False,
+        translate_x: float = 0.0,
+    ):
+        """
+        :param format: "pcd" 或 "kitti_bin"（float32 的 [x, y, z, intensity]，可直接用于 OpenPCDet 等）
+        :param data_format: PCD 数据段格式：ascii / binary / binary_compressed（LZF 压缩）
+        :param intensity_default: kitti_bin 下点云没有 intensity 字段时使用的强度值
+        :param rotate_z_180: kitti_bin 下是否绕z轴旋转180度（x、y 取反）
+        :param translate_x: kitti_bin 下x轴平移量
+        """
         super().__init__(format)  # 调用基类构造函数来初始化 format
-        self.data_format = data_format.lower()  # 新增属性，控制PCD数据保存格式，默认为ascii
+        self.data_format = data_format.lower()  # 控制PCD数据保存格式，默认与 MessageSaver 一致为binary
+        if self.format not in self.SUPPORTED_FORMATS:
+            raise ValueError(
+                f"不支持的点云格式: {format}，可选: {', '.join(self.SUPPORTED_FORMATS)}"
+            )
+        if self.data_format not in self.SUPPORTED_DATA_FORMATS:
+            raise ValueError(
+                f"不支持的PCD数据格式: {data_format}，可选: {', '.join(self.SUPPORTED_DATA_FORMATS)}"
+            )
+        self.intensity_default = intensity_default
+        self.rotate_z_180 = rotate_z_180
+        self.translate_x = translate_x
 
     def can_handle(self, msg) -> bool:
         # 判断是否为点云消息
@@ -110,172 +394,39 @@ class SensorMsgsMsgPointCloud2Handler(MessageHandler):
         )
 
     def save(self, msg, output_dir: str, topic_name: str) -> str:
+        return self.save_encoded(msg, output_dir, topic_name, partial(self.encode, msg))
+
+    def encode(self, msg) -> list:
         # 生成文件名
         file_name = self._generate_file_name(msg)
-        # 更改扩展名为pcd（点云数据文件）
+        # 更改扩展名为pcd（点云数据文件）或bin（KITTI）
         base_name, _ = os.path.splitext(file_name)
-        file_name = f"{base_name}.pcd"
-        file_path = self._generate_file_path(output_dir, topic_name, file_name)
-
-        try:
-            # 将PointCloud2消息转换为PCD格式并保存
-            pcd_content = self._convert_to_pcd(msg)
-            
-            # 根据数据格式选择保存方式
-            if self.data_format == "binary":
-                with open(file_path, 'wb') as f:
-                    f.write(pcd_content)
-            else:  # 默认ascii格式
-                with open(file_path, 'w') as f:
-                    f.write(pcd_content)
-                    
-            return file_path
-        except Exception as e:
-            print(f"保存点云消息失败: {e}")
-            return None
+        file_name = f"{base_name}.{'bin' if self.format == 'kitti_bin' else 'pcd'}"
+
+        if self.format == "kitti_bin":
+            content = to_kitti_bin(
+                self._get_points_array(msg),
+                self.intensity_default,
+                self.rotate_z_180,
+                self.translate_x,
+            )
+            return [(file_name, content)]
+        # 将PointCloud2消息转换为PCD格式
+        pcd_content = self._convert_to_pcd(msg)
+        if isinstance(pcd_content, str):  # ascii格式
+            pcd_content = pcd_content.encode("utf-8")
+        return [(file_name, pcd_content)]
+
+    def commit(self, msg, output_dir: str, topic_name: str, encoded: list) -> str:
+        return self._write_outputs(msg, output_dir, topic_name, encoded)
 
     def _convert_to_pcd(self, msg):
-        """将ROS PointCloud2消息转换为PCD格式，支持ascii和binary格式"""
-        # 解析字段信息
-        field_names = []
-        field_offsets = []
-        field_types = []
-        
-        for field in msg.fields:
-            field_names.append(field.name)
-            field_offsets.append(field.offset)
-            field_types.append(field.datatype)
-        
-        # 读取点云数据
-        data = msg.data
-        width = msg.width
-        height = msg.height
-        point_step = msg.point_step
-        num_points = width * height
-        
-        # 根据数据格式设置头部
-        if self.data_format == "binary":
-            # 构建二进制格式的PCD头部
-            pcd_header = f"""# .PCD v0.7 - Point Cloud Data file format
-VERSION 0.7
-FIELDS {' '.join(field_names)}
-SIZE {' '.join([str(self._get_size_by_type(ft)) for ft in field_types])}
-TYPE {' '.join([self._get_type_char(ft) for ft in field_types])}
-COUNT {' '.join(['1'] * len(field_names))}
-WIDTH {num_points}
-HEIGHT 1
-VIEWPOINT 0 0 0 1 0 0 0
-POINTS {num_points}
-DATA binary
-"""
-            # 构建二进制数据部分
-            points_data_bytes = bytearray()
-            for i in range(num_points):
-                point_start_idx = i * point_step
-                for j, field_name in enumerate(field_names):
-                    offset = field_offsets[j]
-                    field_type = field_types[j]
-                    
-                    # 根据数据类型解析字段
-                    value = self._parse_field_value(data, point_start_idx + offset, field_type)
-                    
-                    # 将值转换回对应的二进制格式
-                    if field_type == 1:  # INT8
-                        points_data_bytes.extend(struct.pack('<b', value))
-                    elif field_type == 2:  # UINT8
-                        points_data_bytes.extend(struct.pack('<B', value))
-                    elif field_type == 3:  # INT16
-                        points_data_bytes.extend(struct.pack('<h', value))
-                    elif field_type == 4:  # UINT16
-                        points_data_bytes.extend(struct.pack('<H', value))
-                    elif field_type == 5:  # INT32
-                        points_data_bytes.extend(struct.pack('<i', value))
-                    elif field_type == 6:  # UINT32
-                        points_data_bytes.extend(struct.pack('<I', value))
-                    elif field_type == 7:  # FLOAT32
-                        points_data_bytes.extend(struct.pack('<f', value))
-                    elif field_type == 8:  # FLOAT64
-                        points_data_bytes.extend(struct.pack('<d', value))
-            
-            # 组合头部和数据
-            full_pcd = pcd_header.encode('utf-8') + points_data_bytes
-            return full_pcd
-        else:  # 默认ascii格式
-            # 构建ASCII格式的PCD头部
-            pcd_header = f"""# .PCD v0.7 - Point Cloud Data file format
-VERSION 0.7
-FIELDS {' '.join(field_names)}
-SIZE {' '.join([str(self._get_size_by_type(ft)) for ft in field_types])}
-TYPE {' '.join([self._get_type_char(ft) for ft in field_types])}
-COUNT {' '.join(['1'] * len(field_names))}
-WIDTH {num_points}
-HEIGHT 1
-VIEWPOINT 0 0 0 1 0 0 0
-POINTS {num_points}
-DATA ascii
-"""
-            
-            # 解析数据
-            points_data = []
-            for i in range(num_points):
-                point_start_idx = i * point_step
-                point_data = []
-                
-                for j, field_name in enumerate(field_names):
-                    offset = field_offsets[j]
-                    field_type = field_types[j]
-                    
-                    # 根据数据类型解析字段
-                    value = self._parse_field_value(data, point_start_idx + offset, field_type)
-                    point_data.append(str(value))
-                
-                points_data.append(' '.join(point_data))
-            
-            # 合并头部和数据
-            full_pcd = pcd_header + '\n'.join(points_data)
-            return full_pcd
-
-    def _get_size_by_type(self, field_type):
-        """根据字段类型返回字节大小"""
-        if field_type in [1, 2]:  # INT8, UINT8
-            return 1
-        elif field_type in [3, 4]:  # INT16, UINT16
-            return 2
-        elif field_type in [5, 6, 7]:  # INT32, UINT32, FLOAT32
-            return 4
-        elif field_type == 8:  # FLOAT64
-            return 8
-        return 4  # 默认大小
-
-    def _get_type_char(self, field_type):
-        """根据字段类型返回字符标识"""
-        if field_type in [1, 2, 3, 4, 5, 6]:  # 整数类型
-            return 'I'
-        elif field_type in [7, 8]:  # 浮点类型
-            return 'F'
-        return 'F'  # 默认浮点类型
-
-    def _parse_field_value(self, data, offset, field_type):
-        """解析字段值"""
-        if field_type == 1:  # INT8
-            return struct.unpack_from('<b', data, offset)[0]
-        elif field_type == 2:  # UINT8
-            return struct.unpack_from('<B', data, offset)[0]
-        elif field_type == 3:  # INT16
-            return struct.unpack_from('<h', data, offset)[0]
-        elif field_type == 4:  # UINT16
-            return struct.unpack_from('<H', data, offset)[0]
-        elif field_type == 5:  # INT32
-            return struct.unpack_from('<i', data, offset)[0]
-        elif field_type == 6:  # UINT32
-            return struct.unpack_from('<I', data, offset)[0]
-        elif field_type == 7:  # FLOAT32
-            return struct.unpack_from('<f', data, offset)[0]
-        elif field_type == 8:  # FLOAT64
-            return struct.unpack_from('<d', data, offset)[0]
-        
-        # 默认处理方式
-        return 0
+        """将ROS PointCloud2消息转换为PCD格式，支持ascii、binary和binary_compressed格式"""
+        content = encode_pcd(self._get_points_array(msg), self.data_format)
+        return content.decode("utf-8") if self.data_format == "ascii" else content
+
+    def _get_points_array(self, msg) -> np.ndarray:
+        return pointcloud2_to_array(msg)
 
 
 class GenericMessageHandler(MessageHandler):
@@ -288,18 +439,15 @@ class GenericMessageHandler(MessageHandler):
         return True
 
     def save(self, msg, output_dir: str, topic_name: str) -> str:
-        import json
+        return self.save_encoded(msg, output_dir, topic_name, partial(self.encode, msg))
 
+    def encode(self, msg) -> list:
         file_name = self._generate_file_name(msg)
-        file_path = self._generate_file_path(output_dir, topic_name, file_name)
-        try:
-            msg_dict = self._message_to_dict(msg)
-            with open(file_path, "w") as f:
-                json.dump(msg_dict, f, indent=2)
-            return file_path
-        except Exception as e:
-            print(f"保存消息失败: {e}")
-            return None
+        msg_dict = self._message_to_dict(msg)
+        return [(file_name, json.dumps(msg_dict, indent=2).encode("utf-8"))]
+
+    def commit(self, msg, output_dir: str, topic_name: str, encoded: list) -> str:
+        return self._write_outputs(msg, output_dir, topic_name, encoded)
 
     def _message_to_dict(self, msg) -> dict:
         result = {}
@@ -313,4 +461,129 @@ class GenericMessageHandler(MessageHandler):
                 result[field] = self._message_to_dict(value)
             else:
                 result[field] = str(value)
-        return result
\ No newline at end of file
+        return result
+
+
+class GenericMessageStreamHandler(MessageHandler):
+    """
+    处理非图像消息：每个话题流式追加到单个文件（JSON Lines 或 CSV），每条消息一行。
+    展平规则按消息类型编译一次：字段来自 typestore 生成的消息类（dataclass），
+    嵌套消息展开为 "header.stamp.sec" 形式的列，数组保持为列表。
+    """
+
+    SUPPORTED_FORMATS = ("jsonl", "csv")
+
+    def __init__(self, format: str = "jsonl", append: bool = False):
+        """
+        :param format: "jsonl" 或 "csv"
+        :param append: 是否追加到已有文件（续跑时使用），否则首次写入时覆盖
+        """
+        super().__init__(format)
+        self.append = append
+        if self.format not in self.SUPPORTED_FORMATS:
+            raise ValueError(
+                f"不支持的格式: {format}，可选: {', '.join(self.SUPPORTED_FORMATS)}"
+            )
+        self._schemas = {}  # 消息类 -> [(列名, 取值函数)]
+        self._writers = {}  # 文件路径 -> (文件对象, csv.writer 或 None)
+        self._lock = threading.Lock()
+
+    def can_handle(self, msg) -> bool:
+        return True
+
+    def save(self, msg, output_dir: str, topic_name: str) -> str:
+        return self.save_encoded(msg, output_dir, topic_name, partial(self.encode, msg))
+
+    def encode(self, msg) -> list:
+        """展平为一行的字段值，按 schema 列顺序排列"""
+        return [self._to_plain(getter(msg)) for _, getter in self._get_schema(msg)]
+
+    def commit(self, msg, output_dir: str, topic_name: str, encoded: list) -> str:
+        schema = self._get_schema(msg)
+        file_name = f"{self._get_message_type(msg)}.{self.format}"
+        with self._lock:
+            file_path = self._generate_file_path(output_dir, topic_name, file_name)
+            f, writer = self._get_writer(file_path, schema)
+            if writer is not None:
+                writer.writerow(
+                    json.dumps(v) if isinstance(v, (list, dict)) else v
+                    for v in encoded
+                )
+            else:
+                f.write(json.dumps(dict(zip((c for c, _ in schema), encoded))))
+                f.write("\n")
+        return file_path
+
+    def close(self):
+        with self._lock:
+            for f, _ in self._writers.values():
+                f.close()
+            self._writers.clear()
+        super().close()
+
+    def flush(self):
+        with self._lock:
+            for f, _ in self._writers.values():
+                f.flush()
+
+    def open_files(self) -> list:
+        with self._lock:
+            return list(self._writers)
+
+    def _get_writer(self, file_path: str, schema: list):
+        if file_path not in self._writers:
+            append = self.append and os.path.exists(file_path)
+            f = open(
+                file_path,
+                "a" if append else "w",
+                newline="" if self.format == "csv" else None,
+            )
+            writer = None
+            if self.format == "csv":
+                writer = csv.writer(f)
+                if not append:
+                    writer.writerow(column for column, _ in schema)
+            self._writers[file_path] = (f, writer)
+        return self._writers[file_path]
+
+    def _get_schema(self, msg) -> list:
+        msg_class = type(msg)
+        schema = self._schemas.get(msg_class)
+        if schema is None:
+            columns = self._compile_columns(msg)
+            schema = [(column, operator.attrgetter(column)) for column in columns]
+            self._schemas[msg_class] = schema
+        return schema
+
+    def _compile_columns(self, msg, prefix: str = "") -> list:
+        """按 dataclass 字段展开嵌套消息，得到叶子字段的列名"""
+        columns = []
+        for field in dataclasses.fields(msg):
+            if field.name.startswith("_"):
+                continue
+            value = getattr(msg, field.name)
+            if dataclasses.is_dataclass(value):
+                columns.extend(self._compile_columns(value, f"{prefix}{field.name}."))
+            else:
+                columns.append(f"{prefix}{field.name}")
+        return columns
+
+    def _to_plain(self, value):
+        """将字段值转换为可 JSON 序列化的 Python 对象"""
+        if isinstance(value, (int, float, str, bool)) or value is None:
+            return value
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        if dataclasses.is_dataclass(value):
+            return {
+                f.name: self._to_plain(getattr(value, f.name))
+                for f in dataclasses.fields(value)
+                if not f.name.startswith("_")
+            }
+        if isinstance(value, (list, tuple)):
+            return [self._to_plain(v) for v in value]
+        if isinstance(value, bytes):
+            return list(value)
+        return str(value)
@@ -1,27 +1,162 @@
 from .message_handler import *
+from .shard_layout import ShardedOutputLayout
+from .timestamp_index import TimestampIndex
 
 class MessageSaver:
     """统一消息保存器，支持每次保存时指定输出目录"""
 
-    def __init__(self):
-        self.handlers = [SensorMsgsMsgImageHandler(), SensorMsgsMsgPointCloud2Handler(), GenericMessageHandler()]
+    def __init__(
+        self,
+        generic_format: str = "jsonl",
+        image_format: str = "jpg",
+        jpeg_quality: int = 95,
+        png_compression: int = 3,
+        image_threads: int = 0,
+        shard_size: int = 0,
+        shard_seconds: float = 0.0,
+        shard_bytes: int = 0,
+        pack: str = None,
+        pointcloud_format: str = "pcd",
+        pcd_data_format: str = "binary",
+        kitti_rotate_z_180: bool = False,
+        kitti_translate_x: float = 0.0,
+        timestamp_index: bool = True,
+    ):
+        """
+        参数:
+            generic_format: 非图像/点云消息的保存格式
+                "jsonl"/"csv" 按话题流式写入单个文件；"json" 每条消息一个文件
+            image_format: 图像保存格式，"jpg"/"png"/"raw"
+            jpeg_quality: JPEG 质量（0-100）
+            png_compression: PNG 压缩级别（0-9）
+            image_threads: 图像编码线程数，0 表示同步编码；
+                RosbagReader.save_msg 把它并入自身的编码线程池，按消息顺序写盘
+            shard_size / shard_seconds / shard_bytes: 按文件数/时间桶/字节数滚动分片，全为 0 时平铺保存
+            pack: "tar" 时把分片打包为 tar（WebDataset 风格）
+            pointcloud_format: 点云保存格式，"pcd" 或 "kitti_bin"（[x, y, z, intensity] float32）
+            pcd_data_format: PCD 数据段格式，"ascii"/"binary"/"binary_compressed"
+            kitti_rotate_z_180 / kitti_translate_x: kitti_bin 的绕z轴旋转180度与x轴平移
+            timestamp_index: 是否在每个话题目录写入 index.npy 时间戳索引（见 TimestampIndex）；
+                分片输出始终写入索引
+        """
+        self.image_threads = image_threads
+        image_handler = SensorMsgsMsgImageHandler(
+            image_format,
+            jpeg_quality=jpeg_quality,
+            png_compression=png_compression,
+            num_threads=image_threads,
+        )
+        if generic_format.lower() == "json":
+            generic_handler = GenericMessageHandler()
+        else:
+            generic_handler = GenericMessageStreamHandler(generic_format)
+        pointcloud_handler = SensorMsgsMsgPointCloud2Handler(
+            pointcloud_format,
+            data_format=pcd_data_format,
+            rotate_z_180=kitti_rotate_z_180,
+            translate_x=kitti_translate_x,
+        )
+        self.handlers = [image_handler, pointcloud_handler, generic_handler]
+        # 分片输出布局，所有逐条保存文件的处理器共享
+        self.layout = None
+        if shard_size or shard_seconds or shard_bytes or pack:
+            self.layout = ShardedOutputLayout(shard_size, shard_seconds, shard_bytes, pack)
+        # 时间戳索引，所有逐条保存文件的处理器与分片布局共享；
+        # 分片输出依靠索引定位文件所在的分片与偏移，因此始终记录
+        self.index = None
+        if self.layout is not None:
+            self.index = self.layout.index
+        elif timestamp_index:
+            self.index = TimestampIndex()
+        for handler in self.handlers:
+            handler.layout = self.layout
+            handler.index = self.index
+        # 按 ROS 类型名显式注册的处理器，优先级最高
+        self.type_handlers = {}
+        # 消息类型 -> 处理器 的分发缓存，每种类型只探测一次 can_handle
+        self._handler_cache = {}
 
     def register_handler(self, handler: MessageHandler):
         """注册新的消息处理器（优先级高于现有处理器）"""
+        handler.layout = self.layout
+        handler.index = self.index
         self.handlers.insert(0, handler)
+        self._handler_cache.clear()
 
-    def get_handler(self, msg) -> MessageHandler:
+    def register_type_handler(self, msgtype: str, handler: MessageHandler):
         """
-        获取适合的消息处理器
+        按 ROS 类型名注册处理器，例如 "sensor_msgs/msg/Imu"
+
+        参数:
+            msgtype: ROS 消息类型名
+            handler: 处理该类型消息的处理器
+        """
+        handler.layout = self.layout
+        handler.index = self.index
+        self.type_handlers[msgtype] = handler
+        self._handler_cache.clear()
+
+    def close(self):
+        """关闭所有处理器（刷新并关闭流式写入的文件）"""
+        for handler in self.handlers + list(self.type_handlers.values()):
+            handler.close()
+        if self.layout is not None:
+            self.layout.close()
+        elif self.index is not None:
+            self.index.close()
+
+    def flush(self):
+        """等待所有处理器把已提交的消息写盘"""
+        for handler in self.handlers + list(self.type_handlers.values()):
+            handler.flush()
+        if self.layout is not None:
+            self.layout.flush()
+        elif self.index is not None:
+            self.index.flush()
+
+    def open_files(self) -> list:
+        """所有处理器当前打开的流式文件"""
+        return [
+            path
+            for handler in self.handlers + list(self.type_handlers.values())
+            for path in handler.open_files()
+        ]
+
+    def set_append(self, append: bool):
+        """设置流式处理器是否追加写入已有文件（续跑时开启）"""
+        for handler in self.handlers + list(self.type_handlers.values()):
+            if isinstance(handler, GenericMessageStreamHandler):
+                handler.append = append
+        if self.layout is not None:
+            self.layout.append = append
+        if self.index is not None:
+            self.index.append = append
+
+    def get_handler(self, msg, msgtype: str = None) -> MessageHandler:
+        """
+        获取适合的消息处理器，结果按消息类型缓存
 
         参数:
             msg: ROS消息对象
+            msgtype: ROS 消息类型名（如 connection.msgtype），缺省时从消息类推断
 
         返回:
             适合的处理器，若无合适处理器返回 None
         """
-        for handler in self.handlers:
-            if handler.can_handle(msg):
-                return handler
-        print(f"无可用处理器处理消息: {type(msg).__name__}")
-        return None
\ No newline at end of file
+        key = msgtype or getattr(msg, "__msgtype__", None) or type(msg)
+        try:
+            return self._handler_cache[key]
+        except KeyError:
+            pass
+
+        handler = self.type_handlers.get(key)
+        if handler is None:
+            for candidate in self.handlers:
+                if candidate.can_handle(msg):
+                    handler = candidate
+                    break
+        if handler is None:
+            print(f"无可用处理器处理消息: {type(msg).__name__}")
+            return None
+        self._handler_cache[key] = handler
+        return handler
@@ -0,0 +1,70 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class OrderedEncodePool:
+    """
+    编码并行、提交有序的保存流水线。
+
+    encode（cv2/NumPy 编码，会释放 GIL）提交到线程池并行执行；commit（写盘、分配分片、
+    记录索引、追加流式文件行）在调用 submit / drain 的线程内严格按提交顺序执行，
+    因此输出顺序、分片归属和索引与串行保存完全一致。
+    """
+
+    def __init__(
+        self, num_threads: int, max_pending: int = 0, thread_name_prefix: str = "encoder"
+    ):
+        """
+        :param num_threads: 编码线程数
+        :param max_pending: 最多同时在编码中/等待提交的消息数（限制内存），0 表示 2 * num_threads
+        :param thread_name_prefix: 线程名前缀
+        """
+        self.num_threads = num_threads
+        self.max_pending = max(max_pending or 2 * num_threads, 1)
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        # 按提交顺序排列的 (编码 future, 提交函数)
+        self._queue = deque()
+
+    def submit(self, encode: Callable[[], Any], commit: Callable[[Future], Any]) -> None:
+        """
+        提交一条消息。等待提交的消息数达到上限时，先按顺序提交最早的消息（反压）
+        :param encode: 在线程池中执行的编码函数
+        :param commit: 在当前线程中按顺序执行的提交函数，参数为编码 future
+            （future.result() 返回编码结果或抛出编码阶段的异常）
+        """
+        while len(self._queue) >= self.max_pending:
+            self._commit_next()
+        self._queue.append((self._get_executor().submit(encode), commit))
+        # 队首已编码完成的消息立即提交，缩短文件落盘的延迟
+        while self._queue and self._queue[0][0].done():
+            self._commit_next()
+
+    def drain(self) -> None:
+        """按顺序提交全部已提交的消息"""
+        while self._queue:
+            self._commit_next()
+
+    def close(self) -> None:
+        """丢弃尚未提交的消息并关闭线程池；需要落盘时先调用 drain"""
+        for future, _ in self._queue:
+            future.cancel()
+        self._queue.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _commit_next(self) -> None:
+        future, commit = self._queue.popleft()
+        commit(future)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.num_threads, thread_name_prefix=self.thread_name_prefix
+            )
+        return self._executor
@@ -1,10 +1,29 @@
+import csv
+import os
+from functools import partial
 from pathlib import Path
-from typing import Union, Literal, Optional
+from typing import Callable, Dict, Iterator, Union, Literal, Optional, Tuple
 from rosbags.highlevel import AnyReader
-from rosbags.typesys import Stores, get_typestore
 from rosbags.typesys.store import Typestore
 
 from .message_saver import MessageSaver
+from .manifest import ExtractionManifest
+from .ordered_pool import OrderedEncodePool
+from .bag_format import CachedAnyReader, resolve_bag_path, select_typestore
+from .time_sync import NearestTimeSynchronizer
+from .mcap_writer import write_mcap
+from .samples import BagSample, decode_message, prefetch
+from .chunk_parallel import (
+    is_chunk_parallel_supported,
+    iter_chunk_parallel,
+    iter_index_entries,
+    plan_tasks,
+)
+from .zero_copy import (
+    ZERO_COPY_DESERIALIZERS,
+    Ros1MmapMessages,
+    is_zero_copy_supported,
+)
 
 
 class RosbagReader:
@@ -12,53 +31,588 @@ class RosbagReader:
         self,
         bag_path: Union[str, Path],
         topics: list,
-        typestore: Typestore = get_typestore(Stores.ROS2_KILTED),
-        message_saver: MessageSaver = MessageSaver(),
+        typestore: Union[Typestore, str, None] = None,
+        message_saver: Optional[MessageSaver] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        decimation: Union[int, Dict[str, int], None] = None,
+        max_rate: Union[float, Dict[str, float], None] = None,
+        zero_copy: bool = False,
     ):
         """
         初始化 RosbagReader
         :param bag_path: rosbag 文件路径
         :param topics: 提取的 ROS 话题列表
-        :param start_time: 提取的起始时间（秒）
-        :param end_time: 提取的结束时间（秒）
+        :param typestore: 消息类型库（Typestore 实例或 store 名称）；None 或 "auto" 时按 bag 格式自动选择
+        :param message_saver: 消息保存器，默认每个 reader 新建一个
+        :param start_time: 提取的起始时间（秒，Unix 时间戳，含）
+        :param end_time: 提取的结束时间（秒，Unix 时间戳，不含）
+        :param decimation: 每 N 条保留 1 条；int 作用于所有话题，dict 按话题指定
+        :param max_rate: 每个话题的最高保存频率（Hz）；float 作用于所有话题，dict 按话题指定
+        :param zero_copy: ROS1 bag 的零拷贝快速路径：未压缩的 bag 通过 mmap 直接读取消息，
+            Image/PointCloud2 的 data 为 mmap 上的只读视图；其他情况自动回退为常规读取
         """
-        self.bag_path = Path(bag_path)
+        self.bag_path = resolve_bag_path(bag_path)
         self.topics = topics
-        self.typestore = typestore
-        self.message_saver = message_saver
+        self._typestore_option = typestore
+        self._typestore = None
+        self.message_saver = message_saver if message_saver is not None else MessageSaver()
+        self.start_time = start_time
+        self.end_time = end_time
+        self.decimation = decimation
+        self.max_rate = max_rate
+        self.zero_copy = zero_copy
 
-    def save_msg(self, dir_save: Optional[Path] = None):
+    @property
+    def typestore(self) -> Typestore:
+        """消息类型库，首次使用时按 bag 格式解析"""
+        if self._typestore is None:
+            self._typestore = select_typestore(self.bag_path, self._typestore_option)
+        return self._typestore
+
+    def save_msg(
+        self,
+        dir_save: Optional[Path] = None,
+        num_workers: int = 1,
+        queue_size: int = 64,
+        resume: bool = False,
+        checkpoint_interval: int = 1000,
+        num_processes: int = 1,
+    ):
         """
         保存消息到指定目录，按照 bag 名和 topic 分类存储。
+        :param dir_save: 保存根目录，默认与 bag 同级
+        :param num_workers: 编码线程数（至少为 MessageSaver 的 image_threads）；为 1 时在读取线程内串行保存。
+            写盘、分片分配和流式文件追加始终在读取线程内按消息顺序执行，输出与串行保存一致
+        :param queue_size: 最多同时在编码中的消息数（反压上限）
+        :param resume: 根据输出目录中的 manifest.json 续跑，跳过已完成的 bag/话题和已写入的消息；
+            不支持 tar 分片输出
+        :param checkpoint_interval: 每保存多少条消息写一次检查点
+        :param num_processes: ROS1 bag 按 chunk 并行解压的进程数；消息仍按时间顺序保存
         """
+        layout = self.message_saver.layout
+        if resume and layout is not None and layout.pack == "tar":
+            # 检查点之后写入 tar 的成员无法像流式文件那样截断，续跑会留下重复/半截的成员
+            raise ValueError("resume=True 不支持 pack=\"tar\" 的分片输出，请改用目录分片或重新提取")
         bag_name = self._get_bag_name()
         if dir_save is None:
             save_dir = self.bag_path.parent / bag_name
         else:
             save_dir = Path(dir_save) / bag_name
 
-        with AnyReader([self.bag_path], default_typestore=self.typestore) as reader:
+        manifest = ExtractionManifest(save_dir, self.bag_path, self._get_filter_options())
+        resumed = resume and manifest.load()
+        pending_topics = [t for t in self.topics if not manifest.is_topic_complete(t)]
+        if not pending_topics:
+            print(f"Skip: {self.bag_path} 的所有话题已提取完成")
+            return
+
+        with CachedAnyReader([self.bag_path], default_typestore=self.typestore) as reader:
             # 获取符合 topic 的消息连接
-            connections = [x for x in reader.connections if x.topic in self.topics]
+            connections = [x for x in reader.connections if x.topic in pending_topics]
             
             # 如果没有找到匹配的话题，则提前返回
             if not connections:
                 print(f"Warning: No connections found for topics: {self.topics}")
                 return
-            
-            for connection, timestamp, rawdata in reader.messages(
-                connections=connections
-            ):
 
-                msg = reader.deserialize(rawdata, connection.msgtype)
-                handler = self.message_saver.get_handler(msg)
-                handler.save(msg, str(save_dir), connection.topic)
+            resume_start = None
+            if resumed:
+                manifest.truncate_stream_files()
+                self.message_saver.set_append(True)
+                resume_start = self._get_resume_start(manifest, connections)
+
+            source = reader
+            if num_processes > 1 and is_chunk_parallel_supported(reader):
+                messages = (
+                    (connection, timestamp, rawdata)
+                    for connection, timestamp, _, _, rawdata in self._iter_parallel(
+                        reader,
+                        connections,
+                        num_processes,
+                        resume_start,
+                        skip=manifest.should_skip,
+                    )
+                )
+            else:
+                if self.zero_copy and is_zero_copy_supported(reader):
+                    source = Ros1MmapMessages(reader)
+                messages = (
+                    item
+                    for item in self._iter_messages(source, connections, resume_start)
+                    if not manifest.should_skip(item[0].topic, item[1])
+                )
+
+            def checkpoint():
+                self.message_saver.flush()
+                manifest.checkpoint(self.message_saver.open_files())
+
+            try:
+                # 图像编码线程并入编码线程池，由读取线程统一按顺序提交
+                num_workers = max(num_workers, self.message_saver.image_threads)
+                if num_workers > 1:
+                    self._save_msg_pipelined(
+                        reader,
+                        messages,
+                        str(save_dir),
+                        num_workers,
+                        queue_size,
+                        manifest,
+                        checkpoint,
+                        checkpoint_interval,
+                    )
+                else:
+                    for i, (connection, timestamp, rawdata) in enumerate(messages, 1):
+                        msg = self._deserialize(reader, rawdata, connection.msgtype)
+                        handler = self.message_saver.get_handler(
+                            msg, connection.msgtype
+                        )
+                        self._commit_message(
+                            manifest,
+                            handler,
+                            msg,
+                            str(save_dir),
+                            connection.topic,
+                            timestamp,
+                            partial(handler.encode, msg),
+                        )
+                        if i % checkpoint_interval == 0:
+                            checkpoint()
+                manifest.mark_complete({c.topic for c in connections})
+                checkpoint()
+            finally:
+                # 流式写入的处理器需要在 bag 结束时关闭文件
+                self.message_saver.close()
+                self.message_saver.set_append(False)
+                if source is not reader:
+                    source.close()
         return
 
+    def save_mcap(
+        self,
+        dir_save: Optional[Path] = None,
+        compression: Literal["zstd", "none"] = "zstd",
+    ) -> Path:
+        """
+        把选中的话题写入单个带索引、chunk 压缩的 MCAP 文件，输出为 ROS2 bag 目录
+        <bag 名>_mcap/（含 .mcap 与 metadata.yaml），可再用 RosbagReader 或 MCAP 工具按话题/时间随机读取。
+        时间窗口、抽帧、限频规则与 save_msg 相同，消息不经过反序列化。
+        :param dir_save: 保存根目录，默认与 bag 同级
+        :param compression: chunk 压缩方式：zstd 或 none
+        :return: 输出 bag 目录
+        """
+        root = self.bag_path.parent if dir_save is None else Path(dir_save)
+        out_path = root / f"{self._get_bag_name()}_mcap"
+        if out_path.exists():
+            raise FileExistsError(f"输出已存在: {out_path}")
+        root.mkdir(parents=True, exist_ok=True)
+
+        with CachedAnyReader([self.bag_path], default_typestore=self.typestore) as reader:
+            connections = [x for x in reader.connections if x.topic in self.topics]
+            if not connections:
+                print(f"Warning: No connections found for topics: {self.topics}")
+                return out_path
+            count = write_mcap(
+                out_path,
+                reader,
+                self._iter_messages(reader, connections),
+                compression,
+            )
+        print(f"MCAP: {count} 条消息写入 {out_path}")
+        return out_path
+
+    def iter_samples(
+        self,
+        prefetch_size: int = 0,
+        color_space: Optional[str] = "rgb8",
+        decode: bool = True,
+        num_processes: int = 1,
+        ordered: bool = True,
+    ) -> Iterator[BagSample]:
+        """
+        在内存中按时间顺序遍历 bag 消息，不写任何文件，可直接作为训练数据流。
+        时间窗口、抽帧与限频规则与 save_msg 相同。
+        :param prefetch_size: 大于 0 时在后台线程中读取/解码，最多提前缓存这么多条样本
+        :param color_space: 图像输出的颜色空间，None 保持原始编码
+        :param decode: 是否把图像/点云解码为 NumPy 数组；False 时 data 为消息对象
+        :param num_processes: ROS1 bag 按 chunk 并行解压/解码的进程数
+        :param ordered: 多进程时是否按时间顺序输出；False 时按完成顺序输出，吞吐更高
+        :return: 迭代 BagSample(topic, timestamp, msgtype, data)
+        """
+        if num_processes > 1:
+            samples = self._iter_samples_parallel(
+                color_space, decode, num_processes, ordered
+            )
+        else:
+            samples = self._iter_samples(color_space, decode)
+        if prefetch_size > 0:
+            return prefetch(samples, prefetch_size)
+        return samples
+
+    def _iter_samples(
+        self, color_space: Optional[str], decode: bool
+    ) -> Iterator[BagSample]:
+        with CachedAnyReader([self.bag_path], default_typestore=self.typestore) as reader:
+            connections = [x for x in reader.connections if x.topic in self.topics]
+            if not connections:
+                print(f"Warning: No connections found for topics: {self.topics}")
+                return
+
+            source = reader
+            if self.zero_copy and is_zero_copy_supported(reader):
+                source = Ros1MmapMessages(reader)
+            try:
+                for connection, timestamp, rawdata in self._iter_messages(
+                    source, connections
+                ):
+                    msg = self._deserialize(reader, rawdata, connection.msgtype)
+                    data = msg
+                    if decode:
+                        data = decode_message(msg, connection.msgtype, color_space)
+                    yield BagSample(
+                        topic=connection.topic,
+                        timestamp=self._get_header_stamp(msg, timestamp),
+                        msgtype=connection.msgtype,
+                        data=data,
+                    )
+            finally:
+                if source is not reader:
+                    source.close()
+
+    def _iter_samples_parallel(
+        self,
+        color_space: Optional[str],
+        decode: bool,
+        num_processes: int,
+        ordered: bool,
+    ) -> Iterator[BagSample]:
+        with CachedAnyReader([self.bag_path], default_typestore=self.typestore) as reader:
+            if not is_chunk_parallel_supported(reader):
+                yield from self._iter_samples(color_space, decode)
+                return
+            connections = [x for x in reader.connections if x.topic in self.topics]
+            if not connections:
+                print(f"Warning: No connections found for topics: {self.topics}")
+                return
+            for connection, timestamp, header_ts, data, rawdata in self._iter_parallel(
+                reader,
+                connections,
+                num_processes,
+                ordered=ordered,
+                decode_samples=decode,
+                color_space=color_space,
+            ):
+                if rawdata is not None:
+                    # 子进程未解码的消息（非图像/点云，或 decode=False）在主进程反序列化
+                    msg = reader.deserialize(rawdata, connection.msgtype)
+                    header_ts = self._get_header_stamp(msg, timestamp)
+                    data = msg
+                    if decode:
+                        data = decode_message(msg, connection.msgtype, color_space)
+                yield BagSample(
+                    topic=connection.topic,
+                    timestamp=header_ts,
+                    msgtype=connection.msgtype,
+                    data=data,
+                )
+
+    def _iter_parallel(
+        self,
+        reader: AnyReader,
+        connections: list,
+        num_processes: int,
+        resume_start: Optional[int] = None,
+        skip: Optional[Callable[[str, int], bool]] = None,
+        ordered: bool = True,
+        decode_samples: bool = False,
+        color_space: Optional[str] = None,
+    ) -> Iterator[tuple]:
+        """
+        多进程按 chunk 解压 ROS1 bag。过滤规则在主进程中只作用于索引，不读取负载。
+        :param skip: 续跑时判断消息是否已写入的函数 (topic, timestamp) -> bool
+        :return: 迭代 (connection, 时间戳, header 时间戳或 None, 解码数据或 None, 原始字节或 None)
+        """
+        start, stop = self._get_time_window(resume_start)
+        entries = self._filter_messages(
+            iter_index_entries(reader, connections, start, stop)
+        )
+        if skip is not None:
+            entries = (item for item in entries if not skip(item[0].topic, item[1]))
+        return iter_chunk_parallel(
+            self.bag_path,
+            self.typestore,
+            plan_tasks(entries),
+            num_processes,
+            ordered=ordered,
+            decode_samples=decode_samples,
+            color_space=color_space,
+        )
+
+    def iter_synced(
+        self,
+        reference_topic: str,
+        tolerance: Union[float, Dict[str, float]] = 0.05,
+        max_buffer: int = 64,
+        stamp: Literal["header", "bag"] = "header",
+    ) -> Iterator[Tuple[int, Dict[str, tuple]]]:
+        """
+        单次流式遍历 bag，按参考话题输出多话题时间同步的消息组。
+        例如以 /rslidar_points 为参考，为每帧点云配上各相机时间最近的图像。
+        :param reference_topic: 参考话题，须包含在 topics 中
+        :param tolerance: 与参考消息允许的最大时间差（秒）；float 作用于所有话题，dict 按话题指定
+        :param max_buffer: 每个话题缓冲的最大消息数（内存上限）
+        :param stamp: 同步所用时间戳，"header" 为消息头 stamp（无 header 时回退为 bag 时间），
+            "bag" 为录制时间；"bag" 模式只反序列化匹配成功的消息
+        :return: 迭代 (参考时间戳纳秒, {话题: (时间戳纳秒, 消息)})
+        """
+        if reference_topic not in self.topics:
+            raise ValueError(f"参考话题 {reference_topic} 不在提取话题列表中")
+        tolerance_ns = {}
+        for topic in self.topics:
+            value = self._get_topic_option(tolerance, topic)
+            # dict 中未指定的话题使用默认容差 50ms
+            tolerance_ns[topic] = int((0.05 if value is None else value) * 1e9)
+        synchronizer = NearestTimeSynchronizer(
+            reference_topic, self.topics, tolerance_ns, max_buffer
+        )
+
+        with CachedAnyReader([self.bag_path], default_typestore=self.typestore) as reader:
+            connections = [x for x in reader.connections if x.topic in self.topics]
+            if not connections:
+                print(f"Warning: No connections found for topics: {self.topics}")
+                return
+
+            def decode(group: dict) -> Dict[str, tuple]:
+                if stamp == "header":
+                    return group
+                return {
+                    topic: (ts, self._deserialize(reader, rawdata, connection.msgtype))
+                    for topic, (ts, (connection, rawdata)) in group.items()
+                }
+
+            source = reader
+            if self.zero_copy and is_zero_copy_supported(reader):
+                source = Ros1MmapMessages(reader)
+            try:
+                for connection, timestamp, rawdata in self._iter_messages(
+                    source, connections
+                ):
+                    if stamp == "header":
+                        item = self._deserialize(reader, rawdata, connection.msgtype)
+                        timestamp = self._get_header_stamp(item, timestamp)
+                    else:
+                        item = (connection, rawdata)
+                    for ref_ts, group in synchronizer.add(
+                        connection.topic, timestamp, item
+                    ):
+                        yield ref_ts, decode(group)
+                for ref_ts, group in synchronizer.flush():
+                    yield ref_ts, decode(group)
+            finally:
+                self.sync_stats = {
+                    "matched": synchronizer.matched,
+                    "dropped": synchronizer.dropped,
+                }
+                if source is not reader:
+                    source.close()
+
+    def save_synced(
+        self,
+        reference_topic: str,
+        dir_save: Optional[Path] = None,
+        tolerance: Union[float, Dict[str, float]] = 0.05,
+        max_buffer: int = 64,
+        stamp: Literal["header", "bag"] = "header",
+    ) -> dict:
+        """
+        保存时间同步的消息组，输出到 <bag 名>/synced/ 下，并写入 synced.csv：
+        每行一组，依次为参考时间戳和各话题输出文件的相对路径。
+        参数含义见 iter_synced。
+        :return: {"matched": 成功匹配的组数, "dropped": 缺少匹配而丢弃的参考消息数}
+        """
+        bag_name = self._get_bag_name()
+        root = self.bag_path.parent if dir_save is None else Path(dir_save)
+        save_dir = root / bag_name / "synced"
+        save_dir.mkdir(parents=True, exist_ok=True)
+
+        topics = [reference_topic] + [t for t in self.topics if t != reference_topic]
+        self.sync_stats = {"matched": 0, "dropped": 0}
+        try:
+            with open(save_dir / "synced.csv", "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["timestamp_ns"] + topics)
+                for ref_ts, group in self.iter_synced(
+                    reference_topic, tolerance, max_buffer, stamp
+                ):
+                    row = [ref_ts]
+                    for topic in topics:
+                        msg = group[topic][1]
+                        handler = self.message_saver.get_handler(msg)
+                        path = handler.save_encoded(
+                            msg, str(save_dir), topic, partial(handler.encode, msg)
+                        )
+                        row.append(os.path.relpath(path, save_dir) if path else "")
+                    writer.writerow(row)
+        finally:
+            self.message_saver.close()
+        print(
+            f"Synced: {self.sync_stats['matched']} 组, "
+            f"丢弃: {self.sync_stats['dropped']} 条参考消息"
+        )
+        return self.sync_stats
+
     @staticmethod
-    def get_info(
-        path_bag: Path, typestore: Typestore = get_typestore(Stores.ROS1_NOETIC)
+    def _get_header_stamp(msg, default: int) -> int:
+        """消息头时间戳（纳秒），无 header 时返回 default"""
+        header = getattr(msg, "header", None)
+        if header is None:
+            return default
+        return header.stamp.sec * 1_000_000_000 + header.stamp.nanosec
+
+    def _get_filter_options(self) -> dict:
+        """影响输出内容的过滤参数，写入清单用于判断能否续跑"""
+        return {
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "decimation": self.decimation,
+            "max_rate": self.max_rate,
+        }
+
+    def _get_resume_start(
+        self, manifest: ExtractionManifest, connections: list
+    ) -> Optional[int]:
+        """
+        续跑时可直接跳到的起始时间（纳秒）。
+        抽帧/限频依赖从头计数的状态，此时只能从头读取原始数据（仍跳过反序列化）。
+        """
+        if self.decimation or self.max_rate:
+            return None
+        topics = {c.topic for c in connections}
+        last_timestamps = [manifest.resume_timestamp(t) for t in topics]
+        if any(ts is None for ts in last_timestamps):
+            return None
+        return min(last_timestamps)
+
+    def _deserialize(self, reader: AnyReader, rawdata, msgtype: str):
+        """反序列化消息；开启 zero_copy 时 ROS1 的 Image/PointCloud2 走零拷贝解析"""
+        if self.zero_copy and not reader.is2:
+            deserializer = ZERO_COPY_DESERIALIZERS.get(msgtype)
+            if deserializer is not None:
+                return deserializer(rawdata, reader.typestore)
+        return reader.deserialize(rawdata, msgtype)
+
+    def _iter_messages(
+        self, reader, connections: list, resume_start: Optional[int] = None
+    ) -> Iterator[tuple]:
+        """
+        按时间窗口和抽帧规则遍历原始消息，过滤发生在反序列化之前。
+        时间窗口下推到 AnyReader.messages(start, stop)，只读取窗口内的数据块。
+        :param reader: AnyReader 或 Ros1MmapMessages（零拷贝）
+        :param resume_start: 续跑时的起始时间（纳秒），与 start_time 取较晚者
+        """
+        start, stop = self._get_time_window(resume_start)
+        return self._filter_messages(
+            reader.messages(connections=connections, start=start, stop=stop)
+        )
+
+    def _get_time_window(self, resume_start: Optional[int] = None) -> tuple:
+        """(start, stop) 纳秒时间窗口，None 表示不限"""
+        start = None if self.start_time is None else int(self.start_time * 1e9)
+        if resume_start is not None:
+            start = resume_start if start is None else max(start, resume_start)
+        stop = None if self.end_time is None else int(self.end_time * 1e9)
+        return start, stop
+
+    def _filter_messages(self, messages: Iterator[tuple]) -> Iterator[tuple]:
+        """按话题应用抽帧与限频规则；输入输出均为 (connection, 时间戳, 负载)"""
+        seen: Dict[str, int] = {}
+        last_kept: Dict[str, int] = {}
+        for connection, timestamp, payload in messages:
+            topic = connection.topic
+
+            every_n = self._get_topic_option(self.decimation, topic)
+            if every_n and every_n > 1:
+                index = seen.get(topic, 0)
+                seen[topic] = index + 1
+                if index % every_n:
+                    continue
+
+            rate = self._get_topic_option(self.max_rate, topic)
+            if rate and rate > 0:
+                last = last_kept.get(topic)
+                if last is not None and timestamp - last < 1e9 / rate:
+                    continue
+                last_kept[topic] = timestamp
+
+            yield connection, timestamp, payload
+
+    @staticmethod
+    def _get_topic_option(option, topic: str):
+        """解析按话题配置的选项：标量作用于所有话题，dict 按话题取值"""
+        if isinstance(option, dict):
+            return option.get(topic)
+        return option
+
+    def _save_msg_pipelined(
+        self,
+        reader: AnyReader,
+        messages: Iterator[tuple],
+        save_dir: str,
+        num_workers: int,
+        queue_size: int,
+        manifest: ExtractionManifest,
+        checkpoint: Callable[[], None],
+        checkpoint_interval: int,
     ):
+        """
+        读取/反序列化与编码分阶段流水线执行。
+        当前线程负责读取和反序列化，编码（cv2/NumPy，会释放 GIL）交给 num_workers 个线程并行执行；
+        写盘、分片分配、流式文件追加和索引记录仍在当前线程内按消息顺序提交，
+        因此输出与串行保存完全一致。写检查点前先提交全部在途消息，保证清单只记录已落盘的消息。
+        """
+        pool = OrderedEncodePool(num_workers, queue_size, thread_name_prefix="save-worker")
+
+        def commit(handler, msg, topic, timestamp, future):
+            self._commit_message(
+                manifest, handler, msg, save_dir, topic, timestamp, future.result
+            )
+
+        try:
+            for i, (connection, timestamp, rawdata) in enumerate(messages, 1):
+                msg = self._deserialize(reader, rawdata, connection.msgtype)
+                handler = self.message_saver.get_handler(msg, connection.msgtype)
+                # 在途消息数达到 queue_size 时阻塞提交，形成反压
+                pool.submit(
+                    partial(handler.encode, msg),
+                    partial(commit, handler, msg, connection.topic, timestamp),
+                )
+                if i % checkpoint_interval == 0:
+                    pool.drain()
+                    checkpoint()
+            pool.drain()
+        finally:
+            pool.close()
+
+    @staticmethod
+    def _commit_message(
+        manifest: ExtractionManifest,
+        handler,
+        msg,
+        save_dir: str,
+        topic: str,
+        timestamp: int,
+        encode: Callable[[], object],
+    ):
+        """提交一条消息；只有写出成功的消息才计入清单，失败的消息在续跑时重新保存"""
+        file_path = handler.save_encoded(msg, save_dir, topic, encode)
+        if file_path is None:
+            manifest.record_failure(topic, timestamp)
+            return
+        manifest.record(topic, timestamp)
+        manifest.record_file(file_path)
+
+    @staticmethod
+    def get_info(path_bag: Path, typestore: Union[Typestore, str, None] = None):
         info = RosbagReader._get_info_dict(path_bag, typestore=typestore)
         info_str = RosbagReader._format_info(info)
         return info_str
@@ -78,17 +632,19 @@ class RosbagReader:
 
     @staticmethod
     def _get_info_dict(
-        path_bag: Path, typestore: Typestore = get_typestore(Stores.ROS1_NOETIC)
+        path_bag: Path, typestore: Union[Typestore, str, None] = None
     ) -> dict:
         """
         获取 rosbag 信息
-        :param path_bag: rosbag 文件路径
-        :param typestore: Typestore for deserializing messages
+        :param path_bag: rosbag 文件路径（ROS1 .bag、ROS2 目录或其中的 .mcap/.db3 文件）
+        :param typestore: Typestore for deserializing messages；None 或 "auto" 时按 bag 格式自动选择
         :return: dict
         """
+        path_bag = resolve_bag_path(path_bag)
+        typestore = select_typestore(path_bag, typestore)
         info = {}
 
-        with AnyReader([path_bag], default_typestore=typestore) as reader:
+        with CachedAnyReader([path_bag], default_typestore=typestore) as reader:
             # Basic bag information
             info["path"] = str(path_bag)
             info["start_time"] = reader.start_time
@@ -99,7 +655,7 @@ class RosbagReader:
                 else None
             )
 
-            # Topic information
+            # Topic information：消息数直接取自索引（connection.msgcount），不读取消息负载
             topics_info = {}
             for connection in reader.connections:
                 topic = connection.topic
@@ -108,19 +664,20 @@ class RosbagReader:
                         "type": connection.msgtype,
                         "count": 0,
                         "connections": 0,
+                        "message_count": 0,
                     }
                 topics_info[topic]["count"] += 1
-                topics_info[topic]["connections"] = len(
-                    [c for c in reader.connections if c.topic == topic]
-                )
+                topics_info[topic]["connections"] += 1
+                topics_info[topic]["message_count"] += connection.msgcount
 
-            # Count messages per topic
-            for topic in topics_info:
-                topic_connections = [c for c in reader.connections if c.topic == topic]
-                message_count = sum(
-                    1 for _ in reader.messages(connections=topic_connections)
-                )
-                topics_info[topic]["message_count"] = message_count
+            # 索引缺失（例如无 summary 的 mcap）时才回退为一次流式遍历计数
+            if reader.connections and not any(
+                c.msgcount for c in reader.connections
+            ):
+                for topic_info in topics_info.values():
+                    topic_info["message_count"] = 0
+                for connection, _, _ in reader.messages():
+                    topics_info[connection.topic]["message_count"] += 1
 
             info["topics"] = topics_info
             info["total_messages"] = sum(
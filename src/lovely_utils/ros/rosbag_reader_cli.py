@@ -1,26 +1,275 @@
-from typing import List, Optional
+import contextlib
+import io
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional, TextIO
 from pathlib import Path
 
 import typer
-from rosbags.typesys import get_typestore
-
-from .rosbag_reader import RosbagReader
-from .type import ROS_VERSION_MAPPING
 
 app = typer.Typer(name="rosbag")
 
 
+class _PrefixedWriter(io.TextIOBase):
+    """按整行转发输出并在行首加前缀，多个进程并行处理 bag 时区分日志来自哪个 bag"""
+
+    def __init__(self, stream: TextIO, prefix: str):
+        self.stream = stream
+        self.prefix = prefix
+        self._partial = ""
+
+    def write(self, text: str) -> int:
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        if lines:
+            # 一次写出完整的若干行，减少与其他进程的输出交错
+            self.stream.write("".join(f"{self.prefix}{line}\n" for line in lines))
+            self.stream.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if self._partial:
+            self.stream.write(f"{self.prefix}{self._partial}\n")
+            self._partial = ""
+        self.stream.flush()
+
+
+def _save_bag(
+    bag_path: Path,
+    topics: List[str],
+    save_dir: Optional[str],
+    threads: int = 1,
+    queue_size: int = 64,
+    reader_options: Optional[dict] = None,
+    saver_options: Optional[dict] = None,
+    resume: bool = False,
+    sync_options: Optional[dict] = None,
+    decode_processes: int = 1,
+    mcap_options: Optional[dict] = None,
+    log_prefix: Optional[str] = None,
+) -> Path:
+    """
+    提取单个 bag 的消息（进程池 worker 入口，需为模块级函数以便 pickle）
+    :param log_prefix: 不为 None 时给本 bag 处理期间 stdout / stderr 的每一行加上该前缀
+    """
+    with contextlib.ExitStack() as stack:
+        if log_prefix is not None:
+            for redirect, stream in (
+                (contextlib.redirect_stdout, sys.stdout),
+                (contextlib.redirect_stderr, sys.stderr),
+            ):
+                writer = _PrefixedWriter(stream, log_prefix)
+                stack.callback(writer.flush)
+                stack.enter_context(redirect(writer))
+        # rosbags / cv2 在真正处理 bag 时才导入，保持 --help 等命令的启动速度
+        from .rosbag_reader import RosbagReader
+        from .message_saver import MessageSaver
+
+        reader = RosbagReader(
+            bag_path,
+            topics,
+            message_saver=MessageSaver(**(saver_options or {})),
+            **(reader_options or {}),
+        )
+        if mcap_options is not None:
+            reader.save_mcap(save_dir, **mcap_options)
+        elif sync_options:
+            reader.save_synced(dir_save=save_dir, **sync_options)
+        else:
+            reader.save_msg(
+                save_dir,
+                num_workers=threads,
+                queue_size=queue_size,
+                resume=resume,
+                num_processes=decode_processes,
+            )
+    return bag_path
+
+
+def _get_version_mapping() -> dict:
+    from .type import ROS_VERSION_MAPPING
+
+    return ROS_VERSION_MAPPING
+
+
+def _check_typestore(typestore: str) -> str:
+    """校验 --typestore：auto 或 ROS_VERSION_MAPPING 中的名称"""
+    typestore = typestore.lower()
+    if typestore != "auto" and typestore not in _get_version_mapping():
+        supported = ", ".join(["auto", *_get_version_mapping()])
+        raise typer.BadParameter(f"Invalid typestore '{typestore}'. Supported: {supported}")
+    return typestore
+
+
+def _find_bags(folder: Path) -> List[Path]:
+    """文件夹下一级的 ROS1 .bag 文件与 ROS2 bag 目录（含 metadata.yaml）"""
+    ros1 = sorted(folder.glob("*.bag"))
+    ros2 = sorted(p.parent for p in folder.glob("*/metadata.yaml"))
+    return [p.resolve() for p in ros1 + ros2]
+
+
+def _parse_topic_option(values: Optional[List[str]], cast: Callable):
+    """
+    解析按话题配置的命令行选项
+    - "N"          作用于所有话题
+    - "/topic=N"   仅作用于指定话题
+    """
+    if not values:
+        return None
+    scalar = None
+    per_topic = {}
+    for value in values:
+        topic, sep, number = value.rpartition("=")
+        if sep:
+            per_topic[topic] = cast(number)
+        else:
+            scalar = cast(number)
+    if not per_topic:
+        return scalar
+    if scalar is not None:
+        raise typer.BadParameter("不能同时指定全局值和按话题的值")
+    return per_topic
+
+
 @app.command()
 def save(
     bag_paths: List[str] = typer.Option(None, help="Paths to the rosbag"),
     bag_folders: Optional[List[Path]] = typer.Option(
         None,
-        help="Directories to search for rosbag files (only first level, .bag files; support multiple folders separated by space)",
+        help="Directories to search for rosbags (only first level: .bag files and ROS2 bag directories; support multiple folders separated by space)",
     ),
     topics: List[str] = typer.Option(None, help="List of topics to extract"),
+    typestore: str = typer.Option(
+        "auto",
+        help="Type store for message types; auto detects ROS1/ROS2 from each bag",
+        show_default=True,
+        case_sensitive=False,
+        callback=_check_typestore,
+        autocompletion=lambda: ["auto", *_get_version_mapping()],
+    ),
     save_dir: Optional[str] = typer.Option(
         None, help="Directory to save messages (default: same directory as bag file)"
     ),
+    workers: int = typer.Option(
+        1,
+        min=1,
+        help="Number of bags to process in parallel (one process per bag)",
+        show_default=True,
+    ),
+    threads: int = typer.Option(
+        1,
+        min=1,
+        help="Encode threads per bag; files are still written in bag order on the reader thread",
+        show_default=True,
+    ),
+    decode_processes: int = typer.Option(
+        1,
+        min=1,
+        help="Processes decompressing chunks of each ROS1 bag in parallel (messages are still saved in time order)",
+        show_default=True,
+    ),
+    queue_size: int = typer.Option(
+        64,
+        min=1,
+        help="Max decoded messages in flight between the reader and the encode threads",
+        show_default=True,
+    ),
+    start_time: Optional[float] = typer.Option(
+        None, help="Only extract messages at or after this Unix time (seconds)"
+    ),
+    end_time: Optional[float] = typer.Option(
+        None, help="Only extract messages before this Unix time (seconds)"
+    ),
+    decimate: Optional[List[str]] = typer.Option(
+        None,
+        help="Keep 1 in N messages: 'N' for all topics or '/topic=N' per topic",
+    ),
+    max_rate: Optional[List[str]] = typer.Option(
+        None,
+        help="Max saved rate in Hz: 'HZ' for all topics or '/topic=HZ' per topic",
+    ),
+    output_format: str = typer.Option(
+        "files",
+        "--format",
+        help="Output format: files (one file per message, see --image-format etc.) or mcap (one indexed, chunk-compressed MCAP bag per input bag)",
+        show_default=True,
+    ),
+    mcap_compression: str = typer.Option(
+        "zstd",
+        help="Chunk compression for --format mcap: zstd or none",
+        show_default=True,
+    ),
+    generic_format: str = typer.Option(
+        "jsonl",
+        help="Format for non-image/non-pointcloud topics: jsonl/csv (one file per topic) or json (one file per message)",
+        show_default=True,
+    ),
+    image_format: str = typer.Option(
+        "jpg",
+        help="Image output format: jpg, png, or raw (undecoded data + .json header)",
+        show_default=True,
+    ),
+    pointcloud_format: str = typer.Option(
+        "pcd",
+        help="PointCloud2 output format: pcd or kitti_bin (float32 x, y, z, intensity)",
+        show_default=True,
+    ),
+    pcd_data_format: str = typer.Option(
+        "binary",
+        help="PCD data section: ascii, binary, or binary_compressed (LZF)",
+        show_default=True,
+    ),
+    kitti_rotate_z_180: bool = typer.Option(
+        False,
+        "--kitti-rotate-z-180",
+        help="For kitti_bin: rotate points 180 degrees around z (negate x and y)",
+    ),
+    kitti_translate_x: float = typer.Option(
+        0.0, help="For kitti_bin: translation added to x after rotation"
+    ),
+    jpeg_quality: int = typer.Option(95, min=0, max=100, help="JPEG quality"),
+    png_compression: int = typer.Option(3, min=0, max=9, help="PNG compression level"),
+    image_threads: int = typer.Option(
+        0,
+        min=0,
+        help="Image encoding threads per bag (0 = encode synchronously)",
+        show_default=True,
+    ),
+    shard_size: int = typer.Option(
+        0, min=0, help="Roll output files into a new shard every N files (0 = flat)"
+    ),
+    shard_seconds: float = typer.Option(
+        0.0, min=0.0, help="Shard output files by message-time buckets of this many seconds"
+    ),
+    shard_bytes: int = typer.Option(
+        0, min=0, help="Roll to a new shard once it would exceed this many bytes"
+    ),
+    pack: Optional[str] = typer.Option(
+        None, help="Pack shards into archives instead of directories: tar"
+    ),
+    sync_topic: Optional[str] = typer.Option(
+        None,
+        help="Reference topic for synchronized extraction: each of its messages is saved with the nearest message of every other topic",
+    ),
+    sync_tolerance: Optional[List[str]] = typer.Option(
+        None,
+        help="Max time difference in seconds for --sync-topic: 'SEC' for all topics or '/topic=SEC' per topic (default 0.05)",
+    ),
+    sync_stamp: str = typer.Option(
+        "header",
+        help="Timestamp used for synchronization: header (message stamp) or bag (record time)",
+        show_default=True,
+    ),
+    zero_copy: bool = typer.Option(
+        False,
+        "--zero-copy",
+        help="Memory-map uncompressed ROS1 bags and decode Image/PointCloud2 without copying payloads",
+    ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Resume from each bag's manifest.json, skipping completed bags/topics and already written messages",
+    ),
 ):
     """Extract and save messages from rosbag files"""
     if not bag_paths and not bag_folders:
@@ -30,6 +279,19 @@ def save(
         )
         raise typer.Exit(code=1)
 
+    if output_format not in ("files", "mcap"):
+        typer.secho(f"错误：不支持的输出格式 {output_format}（可选 files / mcap）", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+    if output_format == "mcap" and sync_topic:
+        typer.secho("错误：--format mcap 不支持 --sync-topic", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+    if resume and pack == "tar":
+        typer.secho(
+            "错误：--resume 不支持 --pack tar（tar 分片无法截断到检查点），请改用目录分片或重新提取",
+            fg=typer.colors.RED,
+        )
+        raise typer.Exit(code=1)
+
     # 1. 处理 --bag-folder 参数
     folder_bags: List[Path] = []
     if bag_folders:
@@ -39,8 +301,8 @@ def save(
                     f"警告：文件夹不存在，跳过 -> {folder}", fg=typer.colors.YELLOW
                 )
                 continue
-            # 提取当前文件夹下的一级 .bag 文件
-            current_bags = [p.resolve() for p in folder.glob("*.bag")]
+            # 提取当前文件夹下一级的 .bag 文件和 ROS2 bag 目录
+            current_bags = _find_bags(folder)
             folder_bags.extend(current_bags)
             typer.echo(f"从文件夹 {folder} 发现 {len(current_bags)} 个 bag 文件")
 
@@ -56,29 +318,106 @@ def save(
         typer.secho("没有找到任何 bag 文件需要处理", fg=typer.colors.RED)
         raise typer.Exit(code=1)
 
+    reader_options = {
+        "typestore": typestore,
+        "start_time": start_time,
+        "end_time": end_time,
+        "decimation": _parse_topic_option(decimate, int),
+        "max_rate": _parse_topic_option(max_rate, float),
+        "zero_copy": zero_copy,
+    }
+
+    saver_options = {
+        "generic_format": generic_format,
+        "image_format": image_format,
+        "jpeg_quality": jpeg_quality,
+        "png_compression": png_compression,
+        "image_threads": image_threads,
+        "shard_size": shard_size,
+        "shard_seconds": shard_seconds,
+        "shard_bytes": shard_bytes,
+        "pack": pack,
+        "pointcloud_format": pointcloud_format,
+        "pcd_data_format": pcd_data_format,
+        "kitti_rotate_z_180": kitti_rotate_z_180,
+        "kitti_translate_x": kitti_translate_x,
+    }
+
+    sync_options = None
+    if sync_topic:
+        tolerance = _parse_topic_option(sync_tolerance, float)
+        sync_options = {
+            "reference_topic": sync_topic,
+            # 显式指定的 0（只接受时间戳完全相同的消息）不能被默认值覆盖
+            "tolerance": 0.05 if tolerance is None else tolerance,
+            "stamp": sync_stamp,
+        }
+
+    mcap_options = None
+    if output_format == "mcap":
+        mcap_options = {"compression": mcap_compression}
+
+    # 按关键字传给 _save_bag，参数增减时不会错位
+    bag_options = {
+        "topics": topics,
+        "save_dir": save_dir,
+        "threads": threads,
+        "queue_size": queue_size,
+        "reader_options": reader_options,
+        "saver_options": saver_options,
+        "resume": resume,
+        "sync_options": sync_options,
+        "decode_processes": decode_processes,
+        "mcap_options": mcap_options,
+    }
+
     total = len(all_bags)
     success_bags = []
     failed_bags = []
 
-    for i, bag_path in enumerate(all_bags, 1):
-        bag_name = bag_path.name
-        typer.echo(f"[{i}/{total}] 处理: {bag_name}")
+    def report_success(i: int, bag_path: Path):
+        success_bags.append(bag_path)
+        path_save_msg = save_dir if save_dir else bag_path.parent
+        typer.secho(
+            f"[{i}/{total}] 成功: {bag_path.name} 保存至:{path_save_msg}",
+            fg=typer.colors.GREEN,
+        )
+
+    def report_failure(i: int, bag_path: Path, e: Exception):
+        failed_bags.append((bag_path, str(e)))
+        typer.secho(
+            f"[{i}/{total}] 失败: {bag_path.name} (错误: {str(e)})", fg=typer.colors.RED
+        )
 
-        try:
-            reader = RosbagReader(bag_path, topics)
-            reader.save_msg(save_dir)
-            success_bags.append(bag_path)
-            path_save_msg = save_dir if save_dir else bag_path.parent
-            typer.secho(
-                f"[{i}/{total}] 成功: {bag_name} 保存至:{path_save_msg}",
-                fg=typer.colors.GREEN,
-            )
-        except Exception as e:
-            failed_bags.append((bag_path, str(e)))
-            typer.secho(
-                f"[{i}/{total}] 失败: {bag_name} (错误: {str(e)})", fg=typer.colors.RED
-            )
-            continue
+    if workers == 1:
+        for i, bag_path in enumerate(all_bags, 1):
+            typer.echo(f"[{i}/{total}] 处理: {bag_path.name}")
+            try:
+                _save_bag(bag_path, **bag_options)
+                report_success(i, bag_path)
+            except Exception as e:
+                report_failure(i, bag_path, e)
+    else:
+        typer.echo(f"使用 {min(workers, total)} 个进程并行处理 {total} 个 bag")
+        with ProcessPoolExecutor(max_workers=min(workers, total)) as executor:
+            futures = {
+                executor.submit(
+                    _save_bag, bag_path, **bag_options, log_prefix=f"[{bag_path.name}] "
+                ): (i, bag_path)
+                for i, bag_path in enumerate(all_bags, 1)
+            }
+            # 按完成顺序汇报，编号为 bag 在输入中的序号；各 bag 的日志行以 [bag 名] 开头
+            for future in as_completed(futures):
+                i, bag_path = futures[future]
+                try:
+                    future.result()
+                    report_success(i, bag_path)
+                except Exception as e:
+                    report_failure(i, bag_path, e)
+        # 汇总表保持输入顺序
+        order = {bag_path: idx for idx, bag_path in enumerate(all_bags)}
+        success_bags.sort(key=order.get)
+        failed_bags.sort(key=lambda item: order[item[0]])
 
     typer.echo("\n" + "=" * 50)
     typer.secho(f"处理完成: 共 {total} 个bag", fg=typer.colors.BLUE)
@@ -101,24 +440,19 @@ def info(
     ),
     bag_folders: Optional[List[Path]] = typer.Option(
         None,
-        help="Directories to search for rosbag files (only first level, .bag files; support multiple folders)",
+        help="Directories to search for rosbags (only first level: .bag files and ROS2 bag directories; support multiple folders)",
     ),
     typestore: str = typer.Option(
-        "ros1_noetic",
-        help="Type store to use for message types",
+        "auto",
+        help="Type store to use for message types; auto detects ROS1/ROS2 from each bag",
         show_default=True,
         case_sensitive=False,
-        autocompletion=lambda: list(ROS_VERSION_MAPPING.keys()),
+        callback=_check_typestore,
+        autocompletion=lambda: ["auto", *_get_version_mapping()],
     ),
 ):
     """Print info about selected topics in one or more rosbags."""
-    if typestore not in ROS_VERSION_MAPPING:
-        typer.echo(
-            f"Invalid typestore '{typestore}'. Supported: {', '.join(ROS_VERSION_MAPPING.keys())}"
-        )
-        raise typer.Exit(code=1)
-
-    ts = get_typestore(ROS_VERSION_MAPPING[typestore])
+    from .rosbag_reader import RosbagReader
 
     # 1. 处理 --bag-folder 参数，扫描一级目录下的 .bag 文件
     folder_bags: List[Path] = []
@@ -130,7 +464,7 @@ def info(
                 )
                 continue
             # 只扫描一级目录
-            found = [p.resolve() for p in folder.glob("*.bag")]
+            found = _find_bags(folder)
             folder_bags.extend(found)
             typer.echo(f"从文件夹 {folder} 发现 {len(found)} 个 bag 文件")
 
@@ -143,7 +477,7 @@ def info(
     for bag_path in all_bags:
         typer.echo(f"\n--- Rosbag: {bag_path} ---")
         try:
-            info = RosbagReader.get_info(bag_path, ts)
+            info = RosbagReader.get_info(bag_path, typestore)
         except Exception as e:
             typer.echo(f"Failed to read rosbag info for {bag_path}: {e}")
             continue  # 继续处理下一个 rosbag
@@ -0,0 +1,82 @@
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional
+
+from rosbags.image import message_to_cvimage
+
+from .message_handler import pointcloud2_to_array
+
+IMAGE_MSGTYPES = ("sensor_msgs/msg/Image", "sensor_msgs/msg/CompressedImage")
+POINTCLOUD_MSGTYPES = ("sensor_msgs/msg/PointCloud2",)
+
+
+@dataclass
+class BagSample:
+    """从 bag 中解码出的一条样本"""
+
+    topic: str
+    # 消息头时间戳（纳秒），消息无 header 时为 bag 录制时间
+    timestamp: int
+    msgtype: str
+    # 图像为 HxW[xC] 的 ndarray，点云为结构化 ndarray，其他消息为反序列化后的消息对象
+    data: Any
+
+
+def decode_message(msg, msgtype: str, color_space: Optional[str] = "rgb8") -> Any:
+    """
+    将反序列化后的消息解码为 NumPy 数据
+    :param color_space: 图像输出的颜色空间（如 "rgb8"/"bgr8"/"mono8"），None 保持原始编码
+    """
+    if msgtype in IMAGE_MSGTYPES:
+        return message_to_cvimage(msg, color_space)
+    if msgtype in POINTCLOUD_MSGTYPES:
+        return pointcloud2_to_array(msg)
+    return msg
+
+
+def prefetch(iterable: Iterable, size: int) -> Iterator:
+    """
+    在后台线程中提前读取最多 size 个元素，与调用方的处理重叠。
+    迭代提前结束（break/close）时通知后台线程停止；后台线程的异常在调用方重新抛出。
+    """
+    items = queue.Queue(maxsize=max(size, 1))
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=producer, name="bag-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
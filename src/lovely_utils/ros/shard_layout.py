@@ -0,0 +1,163 @@
+import io
+import os
+import tarfile
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+from .timestamp_index import TimestampIndex
+
+
+class ShardedOutputLayout:
+    """
+    高频话题的分片输出布局。
+
+    每个话题目录下的文件按数量、时间桶或字节数滚动到子目录（如 000000/、000001/），
+    或以 WebDataset 风格打包进 tar 分片（shard-000000.tar）。每个话题只保持当前一个分片打开，
+    滚动或进入新时间桶时关闭上一个分片。写入位置记录在话题目录的 index.npy（见 TimestampIndex），
+    下游可以直接按偏移读取而无需遍历目录。
+    """
+
+    def __init__(
+        self,
+        shard_size: int = 0,
+        shard_seconds: float = 0.0,
+        shard_bytes: int = 0,
+        pack: Optional[str] = None,
+    ):
+        """
+        :param shard_size: 每个分片最多的文件数，0 表示不限
+        :param shard_seconds: 按消息时间戳分桶的桶宽（秒），0 表示不按时间分桶
+        :param shard_bytes: 每个分片最多的字节数，0 表示不限
+        :param pack: None 写入分片子目录；"tar" 打包为 tar 分片
+        """
+        if pack not in (None, "tar"):
+            raise ValueError(f"不支持的打包格式: {pack}，可选: tar")
+        self.shard_size = shard_size
+        self.shard_seconds = shard_seconds
+        self.shard_bytes = shard_bytes
+        self.pack = pack
+        # 续跑时从已有分片之后继续编号
+        self.append = False
+        # 时间戳索引，记录每个文件所在的分片与偏移；MessageSaver 会替换为共享的索引
+        self.index = TimestampIndex()
+        self._topics: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def write(
+        self,
+        topic_dir: str,
+        file_name: str,
+        timestamp_ns: int,
+        data: bytes,
+        sidecars: Sequence[Tuple[str, bytes]] = (),
+    ) -> str:
+        """
+        将一个输出文件写入分片并记录索引
+
+        :param sidecars: 附属文件 [(文件名, 数据)]，写入同一分片、紧随主文件，不记录索引
+        :return: 写入位置（目录分片为文件路径，tar 分片为 "<tar 路径>/<成员名>"）
+        """
+        size = len(data) + sum(len(d) for _, d in sidecars)
+        with self._lock:
+            state = self._get_topic_state(topic_dir)
+            shard = self._get_shard(state, timestamp_ns, size)
+            if self.pack == "tar":
+                offset = self._add_tar_member(shard, file_name, timestamp_ns, data)
+                for sidecar_name, sidecar_data in sidecars:
+                    self._add_tar_member(shard, sidecar_name, timestamp_ns, sidecar_data)
+                rel_path = f"{shard['name']}.tar/{file_name}"
+            else:
+                shard_dir = os.path.join(topic_dir, shard["name"])
+                if shard["count"] == 0:
+                    os.makedirs(shard_dir, exist_ok=True)
+                for name, content in [(file_name, data), *sidecars]:
+                    with open(os.path.join(shard_dir, name), "wb") as f:
+                        f.write(content)
+                offset = 0
+                rel_path = f"{shard['name']}/{file_name}"
+            shard["count"] += 1
+            shard["bytes"] += size
+            self.index.record(topic_dir, timestamp_ns, rel_path, len(data), offset)
+        return os.path.join(topic_dir, rel_path)
+
+    def flush(self):
+        with self._lock:
+            for state in self._topics.values():
+                if state["shard"] is not None and state["shard"]["tar"] is not None:
+                    state["shard"]["tar"].fileobj.flush()
+        self.index.flush()
+
+    def close(self):
+        with self._lock:
+            for state in self._topics.values():
+                if state["shard"] is not None:
+                    self._close_shard(state["shard"])
+            self._topics.clear()
+        self.index.close()
+
+    def _get_topic_state(self, topic_dir: str) -> dict:
+        state = self._topics.get(topic_dir)
+        if state is None:
+            state = {
+                "topic_dir": topic_dir,
+                "shard": None,  # 当前分片，写入按消息顺序进行，只需保持一个打开
+                "next_seq": self._count_existing_shards(topic_dir) if self.append else 0,
+            }
+            self._topics[topic_dir] = state
+        return state
+
+    def _get_shard(self, state: dict, timestamp_ns: int, size: int) -> dict:
+        """取当前分片；超出数量/字节上限或进入新时间桶时关闭当前分片，滚动到新分片"""
+        bucket = None
+        if self.shard_seconds > 0:
+            bucket_ns = int(self.shard_seconds * 1e9)
+            bucket = timestamp_ns // bucket_ns * bucket_ns // 1_000_000_000
+        shard = state["shard"]
+        if shard is not None and (
+            shard["bucket"] != bucket
+            or (self.shard_size and shard["count"] >= self.shard_size)
+            or (
+                self.shard_bytes
+                and shard["count"]
+                and shard["bytes"] + size > self.shard_bytes
+            )
+        ):
+            self._close_shard(shard)
+            shard = None
+        if shard is None:
+            seq = state["next_seq"]
+            state["next_seq"] += 1
+            name = f"{seq:06d}" if bucket is None else f"{bucket}_{seq:06d}"
+            if self.pack == "tar":
+                name = f"shard-{name}"
+            shard = {"name": name, "bucket": bucket, "count": 0, "bytes": 0, "tar": None}
+            if self.pack == "tar":
+                tar_path = os.path.join(state["topic_dir"], f"{name}.tar")
+                shard["tar"] = tarfile.open(tar_path, "w", format=tarfile.USTAR_FORMAT)
+            state["shard"] = shard
+        return shard
+
+    @staticmethod
+    def _add_tar_member(
+        shard: dict, file_name: str, timestamp_ns: int, data: bytes
+    ) -> int:
+        """追加 tar 成员，返回成员数据在 tar 文件中的偏移"""
+        tar = shard["tar"]
+        info = tarfile.TarInfo(name=file_name)
+        info.size = len(data)
+        info.mtime = timestamp_ns // 1_000_000_000
+        header_offset = tar.offset
+        tar.addfile(info, io.BytesIO(data))
+        return header_offset + tarfile.BLOCKSIZE
+
+    @staticmethod
+    def _close_shard(shard: dict):
+        if shard["tar"] is not None:
+            shard["tar"].close()
+            shard["tar"] = None
+
+    def _count_existing_shards(self, topic_dir: str) -> int:
+        names = os.listdir(topic_dir)
+        if self.pack == "tar":
+            return sum(1 for n in names if n.startswith("shard-") and n.endswith(".tar"))
+        return sum(1 for n in names if os.path.isdir(os.path.join(topic_dir, n)))
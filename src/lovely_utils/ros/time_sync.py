@@ -0,0 +1,106 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+
+class NearestTimeSynchronizer:
+    """
+    流式多话题最近邻时间同步。
+
+    以参考话题（如激光雷达）的每条消息为锚点，为其余每个话题选取时间戳最近且在容差内的一条消息，
+    组成一组输出。消息按时间顺序逐条 add，只在内存中保留有界的缓冲：
+    - 参考消息在其余话题都出现不早于它的消息后即可确定最近邻（之后的消息只会更远）
+    - 早于「最早待匹配参考时间 - 容差」的缓冲消息不可能再被匹配，随即丢弃
+    - 缓冲或待匹配队列超过 max_buffer 时丢弃/强制处理最旧的条目，保证内存有界
+
+    同一条非参考消息可以被相邻的多个参考消息复用。
+    """
+
+    def __init__(
+        self,
+        reference_topic: str,
+        topics: Iterable[str],
+        tolerance_ns: Union[int, Dict[str, int]],
+        max_buffer: int = 64,
+    ):
+        """
+        :param reference_topic: 参考话题，每条消息产生至多一组输出
+        :param topics: 参与同步的全部话题（可包含参考话题）
+        :param tolerance_ns: 允许的最大时间差（纳秒）；int 作用于所有话题，dict 按话题指定
+        :param max_buffer: 每个话题缓冲的最大消息数
+        """
+        self.reference_topic = reference_topic
+        self.others = [t for t in dict.fromkeys(topics) if t != reference_topic]
+        if isinstance(tolerance_ns, dict):
+            self.tolerance = {t: tolerance_ns.get(t, 0) for t in self.others}
+        else:
+            self.tolerance = {t: tolerance_ns for t in self.others}
+        self.max_buffer = max(max_buffer, 1)
+
+        self._pending: deque = deque()
+        self._buffers: Dict[str, deque] = {t: deque() for t in self.others}
+        self._latest: Dict[str, Optional[int]] = {t: None for t in self.others}
+        self.matched = 0
+        self.dropped = 0
+
+    def add(self, topic: str, timestamp: int, item: Any) -> List[Tuple[int, dict]]:
+        """
+        加入一条消息，返回因此确定的同步组
+
+        :return: [(参考时间戳, {话题: (时间戳, item)}), ...]
+        """
+        if topic == self.reference_topic:
+            self._pending.append((timestamp, item))
+        elif topic in self._buffers:
+            buffer = self._buffers[topic]
+            buffer.append((timestamp, item))
+            if len(buffer) > self.max_buffer:
+                buffer.popleft()
+            latest = self._latest[topic]
+            self._latest[topic] = timestamp if latest is None else max(latest, timestamp)
+        else:
+            return []
+
+        results = []
+        while self._pending:
+            ref_ts = self._pending[0][0]
+            ready = all(
+                latest is not None and latest >= ref_ts
+                for latest in self._latest.values()
+            )
+            if not ready and len(self._pending) <= self.max_buffer:
+                break
+            self._resolve(results)
+        self._prune()
+        return results
+
+    def flush(self) -> List[Tuple[int, dict]]:
+        """数据结束时按现有缓冲匹配所有待处理的参考消息"""
+        results = []
+        while self._pending:
+            self._resolve(results)
+        return results
+
+    def _resolve(self, results: list):
+        ref_ts, ref_item = self._pending.popleft()
+        group = {self.reference_topic: (ref_ts, ref_item)}
+        for topic in self.others:
+            nearest = min(
+                self._buffers[topic], key=lambda entry: abs(entry[0] - ref_ts), default=None
+            )
+            if nearest is None or abs(nearest[0] - ref_ts) > self.tolerance[topic]:
+                self.dropped += 1
+                return
+            group[topic] = nearest
+        self.matched += 1
+        results.append((ref_ts, group))
+
+    def _prune(self):
+        """丢弃不可能再被匹配的缓冲消息"""
+        if not self._pending:
+            return
+        oldest = self._pending[0][0]
+        for topic, buffer in self._buffers.items():
+            limit = oldest - self.tolerance[topic]
+            # 保留最后一条，作为时间戳最接近下一条参考消息的候选
+            while len(buffer) > 1 and buffer[0][0] < limit:
+                buffer.popleft()
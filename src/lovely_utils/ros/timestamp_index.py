@@ -0,0 +1,159 @@
+import os
+import threading
+from typing import Dict, List, Union
+
+import numpy as np
+
+
+class TimestampIndex:
+    """
+    提取结果的持久化时间戳索引。
+
+    保存消息时按话题目录记录每个输出文件的 (时间戳, 相对路径, 字节偏移, 字节数)，
+    在 close 时写入话题目录下的 index.npy（按时间戳排序的结构化数组）。
+    下游（同步、去重、按时间切片）用 load_timestamp_index 以 mmap 方式加载，
+    无需遍历目录或从文件名解析时间戳：
+    - 平铺/目录分片：path 为相对话题目录的文件路径，offset 为 0
+    - tar 分片：path 为 "<tar 文件>/<成员名>"，offset 为成员数据在 tar 中的字节偏移
+    流式写入（jsonl/csv）的话题每个话题只有一个文件，不记录索引。
+
+    flush（检查点）只把新记录追加到话题目录下的 index.journal，开销与新记录数成正比；
+    合并、排序并重写 index.npy 只在 close 时做一次。中断后留下的 index.journal 在续跑
+    （append）打开该目录时或 load_timestamp_index 加载时合并进索引。
+    """
+
+    INDEX_NAME = "index.npy"
+    JOURNAL_NAME = "index.journal"
+
+    def __init__(self):
+        # 续跑时与已有索引合并（同一路径以新记录为准）
+        self.append = False
+        # 话题目录 -> 打开时已有的索引 / 本次运行的全部记录 / 已追加到日志的记录数
+        self._base: Dict[str, np.ndarray] = {}
+        self._records: Dict[str, List[tuple]] = {}
+        self._journaled: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, topic_dir: str, timestamp_ns: int, rel_path: str, size: int, offset: int = 0
+    ) -> None:
+        """记录一个输出文件"""
+        with self._lock:
+            records = self._records.get(topic_dir)
+            if records is None:
+                records = self._open(topic_dir)
+            records.append((timestamp_ns, size, offset, rel_path))
+
+    def flush(self) -> None:
+        """把上次 flush 之后的新记录追加到各话题目录的 index.journal"""
+        with self._lock:
+            for topic_dir, records in self._records.items():
+                start = self._journaled[topic_dir]
+                if start == len(records):
+                    continue
+                with open(os.path.join(topic_dir, self.JOURNAL_NAME), "a", encoding="utf-8") as f:
+                    f.writelines(_journal_line(record) for record in records[start:])
+                self._journaled[topic_dir] = len(records)
+
+    def close(self) -> None:
+        """合并全部记录写入 index.npy（先写临时文件再替换，中断时不会留下损坏的索引），并删除日志"""
+        with self._lock:
+            for topic_dir, records in self._records.items():
+                self._write(topic_dir, self._merge(self._base[topic_dir], records))
+                journal = os.path.join(topic_dir, self.JOURNAL_NAME)
+                if os.path.exists(journal):
+                    os.remove(journal)
+            self._base.clear()
+            self._records.clear()
+            self._journaled.clear()
+
+    def _open(self, topic_dir: str) -> List[tuple]:
+        """首次记录某话题目录：续跑时载入已有索引和上次中断留下的日志，否则清除旧索引和日志"""
+        if self.append:
+            base = self._load_existing(topic_dir)
+            journaled = _read_journal(topic_dir)
+            if journaled:
+                base = self._merge(base, journaled)
+        else:
+            base = np.empty(0, dtype=index_dtype(1))
+            for name in (self.INDEX_NAME, self.JOURNAL_NAME):
+                path = os.path.join(topic_dir, name)
+                if os.path.exists(path):
+                    os.remove(path)
+        self._base[topic_dir] = base
+        self._journaled[topic_dir] = 0
+        records = self._records[topic_dir] = []
+        return records
+
+    @staticmethod
+    def _merge(index: np.ndarray, pending: List[tuple]) -> np.ndarray:
+        """合并新记录：同一路径保留最后一次记录，结果按时间戳稳定排序"""
+        if not pending:
+            return index
+        width = max(len(path) for _, _, _, path in pending)
+        dtype = index_dtype(max(width, index.dtype["path"].itemsize // 4))
+        merged = np.concatenate([index.astype(dtype), np.array(pending, dtype=dtype)])
+        # 反转后 np.unique 取到的首次出现即最后一次记录
+        _, last = np.unique(merged["path"][::-1], return_index=True)
+        merged = merged[np.sort(len(merged) - 1 - last)]
+        return merged[np.argsort(merged["timestamp_ns"], kind="stable")]
+
+    def _write(self, topic_dir: str, index: np.ndarray) -> None:
+        path = os.path.join(topic_dir, self.INDEX_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, index)
+        os.replace(tmp_path, path)
+
+    def _load_existing(self, topic_dir: str) -> np.ndarray:
+        path = os.path.join(topic_dir, self.INDEX_NAME)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=index_dtype(1))
+        return np.load(path)
+
+
+def _journal_line(record: tuple) -> str:
+    timestamp_ns, size, offset, rel_path = record
+    return f"{timestamp_ns}\t{size}\t{offset}\t{rel_path}\n"
+
+
+def _read_journal(topic_dir: Union[str, os.PathLike]) -> List[tuple]:
+    """读取 index.journal，忽略中断时写了一半的最后一行"""
+    path = os.path.join(topic_dir, TimestampIndex.JOURNAL_NAME)
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            timestamp_ns, size, offset, rel_path = line[:-1].split("\t", 3)
+            records.append((int(timestamp_ns), int(size), int(offset), rel_path))
+    return records
+
+
+def index_dtype(path_width: int) -> np.dtype:
+    """索引结构化 dtype：路径为定长 Unicode，便于整体 mmap"""
+    return np.dtype(
+        [
+            ("timestamp_ns", "<i8"),
+            ("size", "<i8"),
+            ("offset", "<i8"),
+            ("path", f"<U{max(path_width, 1)}"),
+        ]
+    )
+
+
+def load_timestamp_index(topic_dir: Union[str, os.PathLike], mmap: bool = True) -> np.ndarray:
+    """
+    加载话题目录的时间戳索引；提取中断留下 index.journal 时合并其中的记录（此时不使用 mmap）
+    :param topic_dir: 话题输出目录（含 index.npy）
+    :param mmap: 为 True 时以只读 mmap 方式加载
+    :return: 按 timestamp_ns 升序的结构化数组，字段为 timestamp_ns / size / offset / path
+    """
+    path = os.path.join(topic_dir, TimestampIndex.INDEX_NAME)
+    journaled = _read_journal(topic_dir)
+    if not journaled:
+        return np.load(path, mmap_mode="r" if mmap else None)
+    index = np.load(path) if os.path.exists(path) else np.empty(0, dtype=index_dtype(1))
+    return TimestampIndex._merge(index, journaled)
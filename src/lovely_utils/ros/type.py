@@ -1,13 +1,35 @@
+from functools import lru_cache
+from typing import Union
+
 from rosbags.typesys import Stores, get_typestore
+from rosbags.typesys.store import Typestore
 
 ROS_VERSION_MAPPING = {
     "ros1_noetic": Stores.ROS1_NOETIC,
-    # "ros2_dashing": Stores.ROS2_DASHING,
-    # "ros2_eloquent": Stores.ROS2_ELOQUENT,
-    # "ros2_foxy": Stores.ROS2_FOXY,
-    # "ros2_galactic": Stores.ROS2_GALACTIC,
-    # "ros2_humble": Stores.ROS2_HUMBLE,
-    # "ros2_iron": Stores.ROS2_IRON,
-    # "ros2_jazzy": Stores.ROS2_JAZZY,
-    # "ros2_kilted": Stores.ROS2_KILTED,
-}
\ No newline at end of file
+    "ros2_dashing": Stores.ROS2_DASHING,
+    "ros2_eloquent": Stores.ROS2_ELOQUENT,
+    "ros2_foxy": Stores.ROS2_FOXY,
+    "ros2_galactic": Stores.ROS2_GALACTIC,
+    "ros2_humble": Stores.ROS2_HUMBLE,
+    "ros2_iron": Stores.ROS2_IRON,
+    "ros2_jazzy": Stores.ROS2_JAZZY,
+    "ros2_kilted": Stores.ROS2_KILTED,
+}
+
+
+def get_cached_typestore(store: Union[str, Stores]) -> Typestore:
+    """
+    按 store 名称缓存的 typestore 工厂，同一进程内每种 store 只构建一次
+
+    :param store: ROS_VERSION_MAPPING 中的名称（如 "ros1_noetic"）、Stores 成员或其值（如 "ros2_kilted"）
+    :return: 共享的 Typestore 实例；如需 register 自定义类型，请用 get_typestore 另建实例
+    """
+    if isinstance(store, str):
+        key = store.lower()
+        store = ROS_VERSION_MAPPING.get(key) or Stores(key)
+    return _build_typestore(store)
+
+
+@lru_cache(maxsize=None)
+def _build_typestore(store: Stores) -> Typestore:
+    return get_typestore(store)
@@ -0,0 +1,218 @@
+"""
+ROS1 未压缩 bag 的零拷贝负载访问。
+
+rosbags 读取消息时会把整个 chunk 读入内存，再把每条消息的 rawdata 复制为 bytes，
+反序列化时又会复制一次 data 数组。对于多 MB 的图像/点云，这些复制占据了大量内存带宽。
+这里直接 mmap bag 文件，按 rosbags 已解析好的索引定位消息记录：
+- rawdata 以 memoryview 的形式指向 mmap 中的原始字节
+- sensor_msgs/Image 与 sensor_msgs/PointCloud2 只解析固定头部，
+  data 字段为 mmap 上的 NumPy 视图（只读，不复制）
+"""
+
+import heapq
+import mmap
+import struct
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from rosbags.rosbag1.reader import Compression, Reader as Ros1Reader, decompressors
+
+_UINT8 = struct.Struct("<B")
+_UINT32 = struct.Struct("<I")
+_TIME = struct.Struct("<II")
+
+# ROS1 bag 记录类型
+_OP_MSGDATA = 2
+_OP_CONNECTION = 7
+
+
+def is_zero_copy_supported(reader) -> bool:
+    """AnyReader 是否为单个 ROS1 bag 且所有 chunk 未压缩"""
+    if getattr(reader, "is2", True) or len(reader.readers) != 1:
+        return False
+    bag = reader.readers[0]
+    if not isinstance(bag, Ros1Reader):
+        return False
+    none = decompressors[Compression.NONE.value]
+    return all(chunk.decompressor is none for chunk in bag.chunks.values())
+
+
+class Ros1MmapMessages:
+    """按 rosbags 的索引在 mmap 上遍历 ROS1 消息，rawdata 为 memoryview（零拷贝）"""
+
+    def __init__(self, reader):
+        """
+        :param reader: 已打开的 AnyReader，需满足 is_zero_copy_supported
+        """
+        self.bag = reader.readers[0]
+        self._file = open(self.bag.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self._mmap)
+
+    def messages(
+        self,
+        connections: Iterable = (),
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+    ) -> Iterator[tuple]:
+        """与 AnyReader.messages 相同的遍历顺序与过滤语义"""
+        connections = list(connections) or self.bag.connections
+        connmap = {c.id: c for c in self.bag.connections}
+        buffer = self.buffer
+        for entry in heapq.merge(*[self.bag.indexes[c.id] for c in connections]):
+            if start and entry.time < start:
+                continue
+            if stop and entry.time >= stop:
+                return
+            pos = self.bag.chunks[entry.chunk_pos].datapos + entry.offset
+            conn_id, rawdata = read_message_record(buffer, pos)
+            yield connmap[conn_id], entry.time, rawdata
+
+    def close(self):
+        """关闭 mmap；若仍有消息引用其中的数据，则留给垃圾回收释放"""
+        self.buffer.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+
+def read_message_record(buffer: memoryview, pos: int) -> tuple:
+    """
+    从 pos 处读取一条消息记录（跳过其前面的连接记录）
+
+    :return: (连接 id, 消息数据的 memoryview)
+    """
+    while True:
+        header_len = _UINT32.unpack_from(buffer, pos)[0]
+        header = _parse_record_header(buffer, pos + 4, header_len)
+        pos += 4 + header_len
+        data_len = _UINT32.unpack_from(buffer, pos)[0]
+        pos += 4
+        if header["op"][0] != _OP_CONNECTION:
+            break
+        pos += data_len
+    if header["op"][0] != _OP_MSGDATA:
+        raise ValueError("Expected to find message data.")
+    return _UINT32.unpack_from(header["conn"])[0], buffer[pos : pos + data_len]
+
+
+def _parse_record_header(buffer, pos: int, length: int) -> dict:
+    """解析记录头的 name=value 字段（值保持为 memoryview）"""
+    fields = {}
+    end = pos + length
+    while pos < end:
+        field_len = _UINT32.unpack_from(buffer, pos)[0]
+        field = buffer[pos + 4 : pos + 4 + field_len]
+        sep = bytes(field[:32]).index(b"=")
+        fields[bytes(field[:sep]).decode()] = field[sep + 1 :]
+        pos += 4 + field_len
+    return fields
+
+
+class _Cursor:
+    """ROS1 序列化数据的顺序读取游标"""
+
+    def __init__(self, buffer: memoryview):
+        self.buffer = buffer
+        self.pos = 0
+
+    def uint8(self) -> int:
+        value = _UINT8.unpack_from(self.buffer, self.pos)[0]
+        self.pos += 1
+        return value
+
+    def uint32(self) -> int:
+        value = _UINT32.unpack_from(self.buffer, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def time(self) -> tuple:
+        value = _TIME.unpack_from(self.buffer, self.pos)
+        self.pos += 8
+        return value
+
+    def string(self) -> str:
+        length = self.uint32()
+        value = bytes(self.buffer[self.pos : self.pos + length]).decode()
+        self.pos += length
+        return value
+
+    def uint8_array(self) -> np.ndarray:
+        """uint8[] 字段：返回指向原始缓冲区的只读视图"""
+        length = self.uint32()
+        value = np.frombuffer(self.buffer, dtype=np.uint8, count=length, offset=self.pos)
+        self.pos += length
+        return value
+
+    def header(self, typestore):
+        Header = typestore.types["std_msgs/msg/Header"]
+        Time = typestore.types["builtin_interfaces/msg/Time"]
+        seq = self.uint32()
+        sec, nanosec = self.time()
+        frame_id = self.string()
+        kwargs = {"stamp": Time(sec=sec, nanosec=nanosec), "frame_id": frame_id}
+        if "seq" in Header.__dataclass_fields__:
+            kwargs["seq"] = seq
+        return Header(**kwargs)
+
+
+def deserialize_image(rawdata: memoryview, typestore):
+    """零拷贝解析 ROS1 sensor_msgs/Image"""
+    cursor = _Cursor(rawdata)
+    header = cursor.header(typestore)
+    height = cursor.uint32()
+    width = cursor.uint32()
+    encoding = cursor.string()
+    is_bigendian = cursor.uint8()
+    step = cursor.uint32()
+    data = cursor.uint8_array()
+    return typestore.types["sensor_msgs/msg/Image"](
+        header=header,
+        height=height,
+        width=width,
+        encoding=encoding,
+        is_bigendian=is_bigendian,
+        step=step,
+        data=data,
+    )
+
+
+def deserialize_pointcloud2(rawdata: memoryview, typestore):
+    """零拷贝解析 ROS1 sensor_msgs/PointCloud2"""
+    PointField = typestore.types["sensor_msgs/msg/PointField"]
+    cursor = _Cursor(rawdata)
+    header = cursor.header(typestore)
+    height = cursor.uint32()
+    width = cursor.uint32()
+    fields = []
+    for _ in range(cursor.uint32()):
+        name = cursor.string()
+        offset = cursor.uint32()
+        datatype = cursor.uint8()
+        count = cursor.uint32()
+        fields.append(PointField(name=name, offset=offset, datatype=datatype, count=count))
+    is_bigendian = bool(cursor.uint8())
+    point_step = cursor.uint32()
+    row_step = cursor.uint32()
+    data = cursor.uint8_array()
+    is_dense = bool(cursor.uint8())
+    return typestore.types["sensor_msgs/msg/PointCloud2"](
+        header=header,
+        height=height,
+        width=width,
+        fields=fields,
+        is_bigendian=is_bigendian,
+        point_step=point_step,
+        row_step=row_step,
+        data=data,
+        is_dense=is_dense,
+    )
+
+
+# 支持零拷贝解析的消息类型
+ZERO_COPY_DESERIALIZERS = {
+    "sensor_msgs/msg/Image": deserialize_image,
+    "sensor_msgs/msg/PointCloud2": deserialize_pointcloud2,
+}
@@ -0,0 +1,73 @@
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import typer
+
+app = typer.Typer(name="sync")
+
+
+@app.callback()
+def callback():
+    """Multi-sensor time synchronization tools"""
+
+
+def _parse_named(values: Optional[List[str]], option: str) -> Dict[str, str]:
+    """'name=value' 列表 -> dict"""
+    result = {}
+    for value in values or []:
+        name, sep, item = value.partition("=")
+        if not sep or not name or not item:
+            raise typer.BadParameter(f"Expected NAME=VALUE, got '{value}'", param_hint=option)
+        result[name] = item
+    return result
+
+
+@app.command()
+def files(
+    reference: Path = typer.Option(..., help="Reference directory, e.g. the point cloud folder"),
+    streams: List[str] = typer.Option(
+        ..., "--stream", help="Stream to match as NAME=DIR (repeatable), e.g. front=./front_images"
+    ),
+    output: Path = typer.Option(..., help="Output directory (sync.csv is always written here)"),
+    tolerance: float = typer.Option(
+        0.1, help="Max time difference in seconds (applies to every stream)", show_default=True
+    ),
+    offsets: Optional[List[str]] = typer.Option(
+        None,
+        "--offset",
+        help="Per-stream time offset as NAME=SEC, added to that stream's timestamps before matching",
+    ),
+    one_to_one: bool = typer.Option(
+        False, "--one-to-one", help="Use each frame of a stream for at most one reference frame"
+    ),
+    mode: str = typer.Option(
+        "hardlink",
+        help="Output: hardlink (linked files per stream, no extra disk) or manifest (sync.csv only)",
+        show_default=True,
+    ),
+):
+    """Match files of N sensor folders to a reference folder by filename timestamps."""
+    # numpy 在真正同步时才导入，保持 --help 的启动速度
+    from .files import sync_directories
+
+    stream_dirs = _parse_named(streams, "--stream")
+    offset_ns = {
+        name: int(round(float(sec) * 1e9))
+        for name, sec in _parse_named(offsets, "--offset").items()
+    }
+    result = sync_directories(
+        reference,
+        stream_dirs,
+        output,
+        tolerance_ns=int(round(tolerance * 1e9)),
+        offset_ns=offset_ns,
+        one_to_one=one_to_one,
+        mode=mode,
+    )
+
+    typer.secho(f"matched: {len(result)}  dropped: {result.dropped}", fg=typer.colors.GREEN)
+    for name, stats in result.stats.items():
+        typer.echo(
+            f"  {name}: max error {stats['max_error_ms']:.3f} ms, "
+            f"mean error {stats['mean_error_ms']:.3f} ms"
+        )
@@ -0,0 +1,147 @@
+"""
+按文件名时间戳同步多个传感器目录（如 rosbag save 输出的点云与各相机图像）。
+
+文件名需包含相邻的「秒_纳秒」两段数字，兼容 MessageHandler 的
+<消息类型>_<秒>_<纳秒>.<扩展名> 和 <秒>_<纳秒>_<消息类型>.<扩展名> 两种命名。
+输出为硬链接目录（不占额外磁盘空间）或仅写一份清单 CSV，不复制文件。
+"""
+
+import csv
+import fnmatch
+import os
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Tuple, Union
+
+import numpy as np
+
+from ..ros.timestamp_index import TimestampIndex, load_timestamp_index
+from .matcher import SyncResult, sync_streams
+
+OUTPUT_MODES = ("hardlink", "manifest")
+MANIFEST_NAME = "sync.csv"
+
+
+def parse_timestamp(filename: str) -> int:
+    """
+    从文件名解析纳秒时间戳
+    sensor_msgs__msg__PointCloud2_1768372206_973804235.pcd -> 1768372206973804235
+    """
+    parts = Path(filename).stem.split("_")
+    for sec, nsec in zip(parts, parts[1:]):
+        if sec.isdigit() and nsec.isdigit() and len(nsec) <= 9:
+            return int(sec) * 1_000_000_000 + int(nsec)
+    raise ValueError(f"文件名中没有 <秒>_<纳秒> 时间戳: {filename}")
+
+
+def index_directory(directory: Union[str, Path], pattern: str = "*") -> Tuple[np.ndarray, List[Path]]:
+    """
+    建立目录（仅一级）的时间戳索引，跳过无法解析时间戳的文件。
+    目录中有 MessageSaver 写出的 index.npy（或提取中断留下的 index.journal）时直接读取
+    （含目录分片中的文件，跳过 tar 分片成员），不再遍历目录和解析文件名。
+    :return: (升序 int64 纳秒时间戳, 对应的文件路径)
+    """
+    directory = Path(directory)
+    index_names = (TimestampIndex.INDEX_NAME, TimestampIndex.JOURNAL_NAME)
+    if any((directory / name).exists() for name in index_names):
+        index = load_timestamp_index(directory)
+        paths = index["path"].tolist()
+        keep = [
+            i
+            for i, (path, offset) in enumerate(zip(paths, index["offset"].tolist()))
+            if offset == 0 and fnmatch.fnmatch(Path(path).name, pattern)
+        ]
+        return index["timestamp_ns"][keep], [directory / paths[i] for i in keep]
+
+    entries = []
+    for path in directory.glob(pattern):
+        if not path.is_file():
+            continue
+        try:
+            entries.append((parse_timestamp(path.name), path))
+        except ValueError:
+            continue
+    entries.sort()
+    timestamps = np.fromiter((ts for ts, _ in entries), dtype=np.int64, count=len(entries))
+    return timestamps, [path for _, path in entries]
+
+
+def sync_directories(
+    reference_dir: Union[str, Path],
+    stream_dirs: Dict[str, Union[str, Path]],
+    output_dir: Union[str, Path],
+    tolerance_ns: Union[int, Dict[str, int], None] = 100_000_000,
+    offset_ns: Union[int, Dict[str, int]] = 0,
+    one_to_one: bool = False,
+    mode: Literal["hardlink", "manifest"] = "hardlink",
+    reference_name: Optional[str] = None,
+) -> SyncResult:
+    """
+    以参考目录的每个文件为锚点，为其余每个目录匹配时间最近的文件
+    :param reference_dir: 参考目录（如点云目录）
+    :param stream_dirs: 数据流名 -> 目录（如 {"front": 前相机目录}）
+    :param output_dir: 输出目录；清单 CSV 总是写入 output_dir/sync.csv
+    :param tolerance_ns / offset_ns / one_to_one: 见 sync_streams
+    :param mode: "hardlink" 时在 output_dir/<数据流名>/ 下以参考文件名创建硬链接
+        （跨文件系统时退化为符号链接）；"manifest" 时只写清单
+    :param reference_name: 参考数据流在输出中的名称，默认为参考目录名
+    :return: SyncResult
+    """
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"不支持的输出方式: {mode}，可选: {', '.join(OUTPUT_MODES)}")
+    reference_dir = Path(reference_dir)
+    output_dir = Path(output_dir)
+    reference_name = reference_name or reference_dir.name
+    if reference_name in stream_dirs:
+        raise ValueError(f"数据流名与参考数据流重名: {reference_name}")
+
+    ref_ts, ref_paths = index_directory(reference_dir)
+    indexed = {name: index_directory(path) for name, path in stream_dirs.items()}
+    result = sync_streams(
+        ref_ts,
+        {name: ts for name, (ts, _) in indexed.items()},
+        tolerance_ns,
+        offset_ns,
+        one_to_one,
+    )
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    names = [reference_name, *stream_dirs]
+    if mode == "hardlink":
+        for name in names:
+            (output_dir / name).mkdir(exist_ok=True)
+
+    with open(output_dir / MANIFEST_NAME, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp_ns", *names, *(f"{name}_dt_ns" for name in stream_dirs)])
+        for row, (ref_index, timestamp) in enumerate(zip(result.reference, result.timestamps)):
+            ref_path = ref_paths[ref_index]
+            sources = {reference_name: ref_path}
+            for name, (_, paths) in indexed.items():
+                index = result.indices[name][row]
+                sources[name] = paths[index] if index >= 0 else None
+
+            columns = []
+            for name in names:
+                src = sources[name]
+                if src is None:
+                    columns.append("")
+                elif mode == "hardlink":
+                    dst = output_dir / name / f"{ref_path.stem}{src.suffix}"
+                    _link(src, dst)
+                    columns.append(os.path.relpath(dst, output_dir))
+                else:
+                    columns.append(os.path.relpath(src, output_dir))
+            writer.writerow(
+                [int(timestamp), *columns, *(int(result.diffs[name][row]) for name in stream_dirs)]
+            )
+    return result
+
+
+def _link(src: Path, dst: Path) -> None:
+    """创建硬链接（覆盖已有文件），跨文件系统等无法硬链接时退化为符号链接"""
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        os.symlink(os.path.abspath(src), dst)
@@ -0,0 +1,193 @@
+"""
+多传感器时间戳的向量化最近邻匹配。
+
+所有时间戳均为 int64 纳秒数组，匹配通过 np.searchsorted 一次完成，不在 Python 中逐帧循环：
+- 容差：时间差超过容差的匹配视为缺失（索引为 -1）
+- 偏移：各数据流的固定时间偏移（如曝光中点、扫描起止时刻的差异）先加到该流的时间戳上再匹配
+- 一对一：每个候选帧最多分配给一个参考帧，冲突时保留时间差最小的匹配
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+UNMATCHED = -1
+
+
+def as_timestamps(timestamps) -> np.ndarray:
+    """转为 int64 纳秒数组，并检查单调不减"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if timestamps.ndim != 1:
+        raise ValueError("时间戳必须为一维数组")
+    if len(timestamps) > 1 and np.any(np.diff(timestamps) < 0):
+        raise ValueError("时间戳必须按升序排列")
+    return timestamps
+
+
+def nearest(reference: np.ndarray, timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    为每个参考时刻找最近的时间戳
+    :param reference: 参考时间戳（int64 纳秒，任意顺序）
+    :param timestamps: 候选时间戳（int64 纳秒，升序）
+    :return: (最近候选的索引，候选为空时为 -1；带符号时间差 timestamps[idx] - reference)
+    """
+    reference = np.asarray(reference, dtype=np.int64)
+    if len(timestamps) == 0:
+        return (
+            np.full(len(reference), UNMATCHED, dtype=np.int64),
+            np.zeros(len(reference), dtype=np.int64),
+        )
+    right = np.searchsorted(timestamps, reference, side="left")
+    left = np.clip(right - 1, 0, len(timestamps) - 1)
+    right = np.clip(right, 0, len(timestamps) - 1)
+    # 距离相等时取较早的一帧
+    use_right = np.abs(timestamps[right] - reference) < np.abs(timestamps[left] - reference)
+    idx = np.where(use_right, right, left)
+    return idx, timestamps[idx] - reference
+
+
+def match_nearest(
+    reference: np.ndarray,
+    timestamps: np.ndarray,
+    tolerance_ns: Optional[int] = None,
+    offset_ns: int = 0,
+    one_to_one: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    单个数据流与参考时间戳的最近邻匹配
+    :param reference: 参考时间戳（int64 纳秒，升序）
+    :param timestamps: 候选时间戳（int64 纳秒，升序）
+    :param tolerance_ns: 允许的最大时间差，None 表示不限
+    :param offset_ns: 加到候选时间戳上的固定偏移（校正后时间 = 原时间 + offset）
+    :param one_to_one: 每个候选帧最多匹配一个参考帧
+    :return: (候选索引数组，未匹配为 -1；校正后的带符号时间差，未匹配为 0)
+    """
+    reference = as_timestamps(reference)
+    corrected = as_timestamps(timestamps) + np.int64(offset_ns)
+    if one_to_one:
+        idx = _match_one_to_one(reference, corrected, tolerance_ns)
+        matched = idx >= 0
+        diff = np.zeros(len(reference), dtype=np.int64)
+        diff[matched] = corrected[idx[matched]] - reference[matched]
+        return idx, diff
+
+    idx, diff = nearest(reference, corrected)
+    if tolerance_ns is not None:
+        outside = np.abs(diff) > tolerance_ns
+        idx = np.where(outside, UNMATCHED, idx)
+        diff = np.where(outside, 0, diff)
+    return idx, diff
+
+
+def _match_one_to_one(
+    reference: np.ndarray, timestamps: np.ndarray, tolerance_ns: Optional[int]
+) -> np.ndarray:
+    """
+    一对一贪心匹配：候选对为每个参考时刻前后相邻的两帧，按时间差从小到大分配。
+    每轮接受「对参考帧和候选帧而言都是最优」的候选对（全局最小的一对总满足），
+    移除已占用的参考帧/候选帧后重复，结果与逐对贪心一致。
+    """
+    result = np.full(len(reference), UNMATCHED, dtype=np.int64)
+    if len(timestamps) == 0 or len(reference) == 0:
+        return result
+
+    right = np.searchsorted(timestamps, reference, side="left")
+    ref_idx = np.concatenate([np.arange(len(reference))] * 2)
+    cand_idx = np.concatenate([right - 1, right])
+    valid = (cand_idx >= 0) & (cand_idx < len(timestamps))
+    ref_idx, cand_idx = ref_idx[valid], cand_idx[valid]
+    diff = np.abs(timestamps[cand_idx] - reference[ref_idx])
+    if tolerance_ns is not None:
+        keep = diff <= tolerance_ns
+        ref_idx, cand_idx, diff = ref_idx[keep], cand_idx[keep], diff[keep]
+
+    # 时间差优先，其次参考帧、候选帧更早者优先，保证结果确定
+    order = np.lexsort((cand_idx, ref_idx, diff))
+    ref_idx, cand_idx = ref_idx[order], cand_idx[order]
+    while len(ref_idx):
+        best_for_ref = _first_occurrence(ref_idx)
+        best_for_cand = _first_occurrence(cand_idx)
+        accepted = best_for_ref & best_for_cand
+        result[ref_idx[accepted]] = cand_idx[accepted]
+
+        used_cand = np.zeros(len(timestamps), dtype=bool)
+        used_cand[cand_idx[accepted]] = True
+        remaining = (result[ref_idx] == UNMATCHED) & ~used_cand[cand_idx]
+        ref_idx, cand_idx = ref_idx[remaining], cand_idx[remaining]
+    return result
+
+
+def _first_occurrence(values: np.ndarray) -> np.ndarray:
+    """标记每个取值第一次出现的位置"""
+    mask = np.zeros(len(values), dtype=bool)
+    mask[np.unique(values, return_index=True)[1]] = True
+    return mask
+
+
+@dataclass
+class SyncResult:
+    """多数据流同步结果，每行对应一个保留下来的参考帧"""
+
+    reference: np.ndarray  # 参考帧索引
+    timestamps: np.ndarray  # 参考时间戳（纳秒）
+    indices: Dict[str, np.ndarray]  # 数据流名 -> 匹配的帧索引（-1 表示缺失）
+    diffs: Dict[str, np.ndarray]  # 数据流名 -> 校正后的带符号时间差（纳秒）
+    dropped: int = 0  # 因缺少匹配被丢弃的参考帧数
+    stats: Dict[str, dict] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.reference)
+
+
+def sync_streams(
+    reference: np.ndarray,
+    streams: Mapping[str, np.ndarray],
+    tolerance_ns: Union[int, Dict[str, int], None] = None,
+    offset_ns: Union[int, Dict[str, int]] = 0,
+    one_to_one: bool = False,
+    require_all: bool = True,
+) -> SyncResult:
+    """
+    以参考数据流为锚点同步 N 个数据流
+    :param reference: 参考时间戳（int64 纳秒，升序）
+    :param streams: 数据流名 -> 时间戳（int64 纳秒，升序）
+    :param tolerance_ns: 最大时间差；int 作用于所有流，dict 按流指定（缺省为不限）
+    :param offset_ns: 各流的固定时间偏移；int 作用于所有流，dict 按流指定（缺省为 0）
+    :param one_to_one: 每个数据流的每一帧最多匹配一个参考帧
+    :param require_all: 为 True 时丢弃任一数据流缺少匹配的参考帧
+    :return: SyncResult，stats 中为各流的匹配数与最大/平均绝对时间差（毫秒）
+    """
+    reference = as_timestamps(reference)
+    indices, diffs = {}, {}
+    for name, timestamps in streams.items():
+        tolerance = tolerance_ns.get(name) if isinstance(tolerance_ns, dict) else tolerance_ns
+        offset = offset_ns.get(name, 0) if isinstance(offset_ns, dict) else offset_ns
+        indices[name], diffs[name] = match_nearest(
+            reference, timestamps, tolerance, offset, one_to_one
+        )
+
+    keep = np.ones(len(reference), dtype=bool)
+    if require_all:
+        for idx in indices.values():
+            keep &= idx >= 0
+    rows = np.flatnonzero(keep)
+
+    stats = {}
+    for name in streams:
+        matched = indices[name][rows] >= 0
+        errors = np.abs(diffs[name][rows][matched])
+        stats[name] = {
+            "matched": int(matched.sum()),
+            "max_error_ms": float(errors.max() / 1e6) if len(errors) else 0.0,
+            "mean_error_ms": float(errors.mean() / 1e6) if len(errors) else 0.0,
+        }
+
+    return SyncResult(
+        reference=rows,
+        timestamps=reference[rows],
+        indices={name: idx[rows] for name, idx in indices.items()},
+        diffs={name: diff[rows] for name, diff in diffs.items()},
+        dropped=int(len(reference) - len(rows)),
+        stats=stats,
+    )
@@ -1,6 +1,7 @@
 from pathlib import Path
 from ..util import *
 from lovely_utils.camera.calibrator.fisheye_calibrator import FisheyeCalibrator
+from lovely_utils.camera.calibrator.undistort import load_intrinsics
 from lovely_utils.camera.detector.chessboard_detector import ChessboardDetector
 
 
@@ -68,3 +69,64 @@ def test_chessboard_calibrate_intrinsic(generate_fisheye_calibrator_intrinsic_pa
 #         plane_z=-0.07,
 #     )
 #     assert np.allclose(xyz_map[290, 270], [2.50, 0.288, -0.07], atol=0.05)
+
+
+def test_undistort_images_threaded(tmp_path):
+    K = np.array([[285.0, 0.0, 320.0], [0.0, 285.0, 240.0], [0.0, 0.0, 1.0]])
+    D = np.array([-0.01, 0.02, -0.005, 0.001])
+    rng = np.random.default_rng(0)
+    dir_imgs = tmp_path / "images"
+    dir_imgs.mkdir()
+    path_imgs = []
+    for i in range(6):
+        path_img = dir_imgs / f"frame_{i}.png"
+        cv2.imwrite(str(path_img), rng.integers(0, 255, (480, 640, 3), dtype=np.uint8))
+        path_imgs.append(path_img)
+    path_imgs.append(dir_imgs / "missing.png")
+
+    fisheye_calibrator = FisheyeCalibrator()
+    fisheye_calibrator.set_intrinsic_matrix(K)
+    fisheye_calibrator.set_intrinsic_dist(D)
+    maps = fisheye_calibrator.get_undistort_maps((640, 480))
+    assert maps.alpha == 1.0
+    img = cv2.imread(str(path_imgs[0]))
+    expected = cv2.fisheye.undistortImage(img, K, D.reshape(4, 1), Knew=maps.new_intrinsic_matrix)
+    diff = np.abs(maps.undistort(img).astype(np.int16) - expected.astype(np.int16))
+    assert diff.mean() < 2.0
+
+    succeeded, failed = fisheye_calibrator.apply_intrinsic(
+        images=path_imgs, dir_save=tmp_path / "threaded", num_threads=3, max_pending=2
+    )
+    assert [p.name for p in succeeded] == [f"frame_{i}_undistort.png" for i in range(6)]
+    assert [p for p, _ in failed] == [dir_imgs / "missing.png"]
+    serial, _ = fisheye_calibrator.apply_intrinsic(images=path_imgs[:6], dir_save=tmp_path / "serial")
+    for a, b in zip(succeeded, serial):
+        assert a.read_bytes() == b.read_bytes()
+
+    # PNG 输出是无损的，不应带上 JPEG 质量参数；JPEG 输出按 jpeg_quality 编码
+    assert np.array_equal(cv2.imread(str(serial[0])), maps.undistort(img))
+    (low,), _ = fisheye_calibrator.apply_intrinsic(
+        images=path_imgs[:1], dir_save=tmp_path / "jpg", image_format="jpg", jpeg_quality=10
+    )
+    (high,), _ = fisheye_calibrator.apply_intrinsic(
+        images=path_imgs[:1], dir_save=tmp_path / "jpg", image_format="jpg", suffix="_high"
+    )
+    assert low.stat().st_size < high.stat().st_size
+
+
+def test_load_intrinsics(tmp_path):
+    path = tmp_path / "intrinsics.yaml"
+    K = np.array([[285.0, 0.0, 320.0], [0.0, 285.0, 240.0], [0.0, 0.0, 1.0]])
+    fs = cv2.FileStorage(str(path), cv2.FILE_STORAGE_WRITE)
+    fs.write("K", K)
+    fs.write("D", np.array([[-0.01, 0.02, -0.005, 0.001]]))
+    fs.release()
+    loaded_K, loaded_D = load_intrinsics(path)
+    assert np.allclose(loaded_K, K)
+    assert loaded_D.shape == (4,)
+
+    path_json = tmp_path / "intrinsics.json"
+    path_json.write_text('{"K": [[285, 0, 320], [0, 285, 240], [0, 0, 1]], "D": [-0.01, 0.02, -0.005, 0.001]}')
+    loaded_K, loaded_D = load_intrinsics(path_json)
+    assert np.allclose(loaded_K, K)
+    assert np.allclose(loaded_D, [-0.01, 0.02, -0.005, 0.001])
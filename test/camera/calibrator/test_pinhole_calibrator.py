@@ -1,6 +1,7 @@
 from pathlib import Path
 from ..util import *
 from lovely_utils.camera.calibrator.pinhole_calibrator import PinholeCalibrator
+from lovely_utils.camera.calibrator.undistort import UndistortMaps
 from lovely_utils.camera.detector.chessboard_detector import ChessboardDetector
 
 
@@ -68,3 +69,69 @@ def test_generate_map_transform_pixel_points_to_world_points(generate_pinhole_ca
         plane_z=-0.07,
     )
     assert np.allclose(xyz_map[290, 270], [2.50, 0.288, -0.07], atol=0.05)
+
+
+def test_undistort_maps_match_cv2_undistort(generate_pinhole_calibrator_intrinsic_params, tmp_path):
+    params = generate_pinhole_calibrator_intrinsic_params
+    path_img = sorted(Path(params["dir_calib_images"]).glob("intrinsic*.jpg"))[0]
+    img = cv2.imread(str(path_img))
+    h, w = img.shape[:2]
+
+    pinhole_calibrator = PinholeCalibrator()
+    pinhole_calibrator.set_intrinsic_matrix(params["K"])
+    pinhole_calibrator.set_intrinsic_dist(params["D"])
+    maps = pinhole_calibrator.get_undistort_maps((w, h), cache_dir=tmp_path)
+    assert maps.map1.dtype == np.int16 and maps.map1.shape == (h, w, 2)
+    assert pinhole_calibrator.get_undistort_maps((w, h)) is maps
+    assert len(list(tmp_path.glob("undistort_pinhole_*.npz"))) == 1
+
+    new_K, _ = cv2.getOptimalNewCameraMatrix(params["K"], params["D"], (w, h), 1, (w, h))
+    expected = cv2.undistort(img, params["K"], params["D"], None, new_K)
+    diff = np.abs(maps.undistort(img).astype(np.int16) - expected.astype(np.int16))
+    assert diff.mean() < 1.0
+
+    loaded = UndistortMaps.load(next(tmp_path.glob("*.npz")))
+    assert loaded.key == maps.key
+    assert np.array_equal(loaded.undistort(img), maps.undistort(img))
+
+    pinhole_calibrator.apply_intrinsic(images=[path_img], dir_save=tmp_path)
+    assert (tmp_path / f"{path_img.stem}_undistort{path_img.suffix}").exists()
+
+
+def test_undistort_maps_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(UndistortMaps, "_cache", type(UndistortMaps._cache)())
+    K = np.array([[100.0, 0.0, 32.0], [0.0, 100.0, 24.0], [0.0, 0.0, 1.0]])
+    D = np.zeros(5)
+    first = UndistortMaps.get(K, D, (64, 48))
+    for width in range(65, 65 + UndistortMaps.CACHE_SIZE - 1):
+        UndistortMaps.get(K, D, (width, 48))
+    # 最近使用过的 first 保留，最早未使用的 (65, 48) 被淘汰
+    assert UndistortMaps.get(K, D, (64, 48)) is first
+    UndistortMaps.get(K, D, (100, 48))
+    assert len(UndistortMaps._cache) == UndistortMaps.CACHE_SIZE
+    assert UndistortMaps.get(K, D, (64, 48)) is first
+    assert UndistortMaps.get(K, D, (65, 48)).image_size == (65, 48)
+
+
+def test_calibrate_intrinsic_parallel_reports_images_without_corners(
+    generate_pinhole_calibrator_intrinsic_params, tmp_path
+):
+    params = generate_pinhole_calibrator_intrinsic_params
+    path_imgs = sorted(Path(params["dir_calib_images"]).glob("intrinsic*.jpg"))
+    path_blank = tmp_path / "blank.jpg"
+    cv2.imwrite(str(path_blank), np.full((480, 640, 3), 255, dtype=np.uint8))
+    path_imgs.insert(1, path_blank)
+
+    serial = PinholeCalibrator(intrinsic_detector=ChessboardDetector(chessboard_size=(6, 7)))
+    rms, mtx, dist, _, _ = serial.calibrate_intrinsic(images=path_imgs)
+    parallel = PinholeCalibrator(intrinsic_detector=ChessboardDetector(chessboard_size=(6, 7)))
+    rms_parallel, mtx_parallel, dist_parallel, _, _ = parallel.calibrate_intrinsic(
+        images=path_imgs, num_workers=2
+    )
+
+    assert path_blank.exists()
+    assert serial.images_without_corners == parallel.images_without_corners == [path_blank]
+    assert rms_parallel == rms
+    assert np.array_equal(mtx_parallel, mtx)
+    assert np.array_equal(dist_parallel, dist)
+    assert np.allclose(mtx, params["K"], atol=1e-3)
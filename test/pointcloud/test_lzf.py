@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+import pytest
+
+from lovely_utils.pointcloud import lzf
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"a",
+        b"aaaa",
+        b"abcabcabcabcabcabc",
+        b"\0" * 10000,
+        os.urandom(5000),
+        np.arange(20000, dtype=np.float32).tobytes(),
+        np.random.default_rng(0).integers(0, 3, 20000, dtype=np.uint8).tobytes(),
+    ],
+)
+def test_lzf_round_trip(data):
+    compressed = lzf._compress(data)
+    assert lzf._decompress(compressed, len(data)) == data
+    assert lzf.decompress(lzf.compress(data), len(data)) == data
+
+
+def test_lzf_compresses_repetitive_data():
+    data = np.zeros(100000, dtype=np.float32).tobytes()
+    assert len(lzf._compress(data)) < len(data) // 50
+
+
+def test_lzf_decompress_rejects_bad_size():
+    compressed = lzf._compress(b"abcabcabcabc")
+    with pytest.raises(ValueError):
+        lzf._decompress(compressed, 5)
+
+
+def test_lzf_pure_python_fallback_warns_once(monkeypatch, recwarn):
+    monkeypatch.setattr(lzf, "_lzf", None)
+    monkeypatch.setattr(lzf, "_fallback_warned", False)
+    data = b"abcabcabcabc" * 10
+    assert lzf.decompress(lzf.compress(data), len(data)) == data
+    lzf.compress(data)
+    fallback = [w for w in recwarn if issubclass(w.category, RuntimeWarning)]
+    assert len(fallback) == 1
+    assert "python-lzf" in str(fallback[0].message)
@@ -0,0 +1,141 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from lovely_utils.pointcloud.convert import convert_directory, convert_file
+from lovely_utils.pointcloud.kitti import read_kitti_bin
+from lovely_utils.pointcloud.pcd import PcdHeader, encode_pcd, read_pcd, read_pcd_header, write_pcd
+
+
+def get_points(num_points: int = 200) -> np.ndarray:
+    """覆盖 I/U/F 各种 SIZE 及 COUNT > 1 字段的点云"""
+    rng = np.random.default_rng(0)
+    dtype = np.dtype(
+        [
+            ("x", "<f4"),
+            ("y", "<f4"),
+            ("z", "<f4"),
+            ("intensity", "<f4"),
+            ("ring", "<u2"),
+            ("label", "i1"),
+            ("timestamp", "<f8"),
+            ("rgb", "u1", (3,)),
+        ]
+    )
+    points = np.zeros(num_points, dtype=dtype)
+    for name in ["x", "y", "z"]:
+        points[name] = rng.uniform(-50, 50, num_points)
+    points["intensity"] = rng.uniform(0, 255, num_points)
+    points["ring"] = np.arange(num_points) % 128 + 60000
+    points["label"] = rng.integers(-100, 100, num_points)
+    points["timestamp"] = 1620000000.123456789 + np.arange(num_points) * 1e-5
+    points["rgb"] = rng.integers(0, 255, (num_points, 3))
+    return points
+
+
+@pytest.mark.parametrize("data_format", ["ascii", "binary", "binary_compressed"])
+def test_write_read_pcd_round_trip(tmp_path, data_format):
+    points = get_points()
+    path = write_pcd(tmp_path / "cloud.pcd", points, data_format)
+
+    header = read_pcd_header(path)
+    assert header.fields == list(points.dtype.names)
+    assert header.type == ["F", "F", "F", "F", "U", "I", "F", "U"]
+    assert header.size == [4, 4, 4, 4, 2, 1, 8, 1]
+    assert header.count == [1, 1, 1, 1, 1, 1, 1, 3]
+    assert header.data == data_format
+
+    loaded = read_pcd(path)
+    assert loaded.dtype == points.dtype
+    np.testing.assert_array_equal(loaded, points)
+
+
+def test_read_binary_pcd_is_memmap(tmp_path):
+    path = write_pcd(tmp_path / "cloud.pcd", get_points(), "binary")
+    assert isinstance(read_pcd(path), np.memmap)
+    assert not isinstance(read_pcd(path, mmap=False), np.memmap)
+
+
+def test_read_pcd_handwritten_ascii(tmp_path):
+    path = tmp_path / "cloud.pcd"
+    path.write_text(
+        "# .PCD v0.7\nVERSION 0.7\nFIELDS x y z intensity\nSIZE 4 4 4 2\nTYPE F F F U\n"
+        "COUNT 1 1 1 1\nWIDTH 2\nHEIGHT 1\nVIEWPOINT 0 0 0 1 0 0 0\nPOINTS 2\nDATA ascii\n"
+        "1.5 2 3 65535\n-1 nan 0 7\n"
+    )
+    points = read_pcd(path)
+    assert points.dtype["intensity"] == np.dtype("<u2")
+    assert points["intensity"].tolist() == [65535, 7]
+    assert points["x"].tolist() == [1.5, -1.0]
+    assert np.isnan(points["y"][1])
+
+
+def test_pcd_header_rejects_unknown_type():
+    header = PcdHeader(fields=["x"], size=[3], type=["F"], count=[1], width=1)
+    with pytest.raises(ValueError):
+        header.dtype
+
+
+def test_encode_pcd_converts_big_endian_and_padded_fields():
+    dtype = np.dtype({"names": ["x", "y"], "formats": [">f4", ">f4"], "offsets": [0, 8], "itemsize": 16})
+    points = np.zeros(3, dtype=dtype)
+    points["x"] = [1, 2, 3]
+    content = encode_pcd(points, "binary")
+    body = content[content.index(b"DATA binary\n") + 12 :]
+    np.testing.assert_array_equal(np.frombuffer(body, "<f4").reshape(3, 2)[:, 0], [1, 2, 3])
+
+
+def test_convert_directory_to_kitti_bin_in_parallel(tmp_path):
+    src_dir, dst_dir = tmp_path / "pcd", tmp_path / "bin"
+    src_dir.mkdir()
+    points = get_points()
+    for i, data_format in enumerate(["ascii", "binary", "binary_compressed"]):
+        write_pcd(src_dir / f"{i:06d}.pcd", points, data_format)
+    (src_dir / "broken.pcd").write_text("not a pcd")
+
+    succeeded, failed = convert_directory(
+        src_dir, dst_dir, "kitti_bin", num_workers=2, rotate_z_180=True, translate_x=30.0
+    )
+    assert [p.name for p in succeeded] == ["000000.pcd", "000001.pcd", "000002.pcd"]
+    assert [p.name for p, _ in failed] == ["broken.pcd"]
+
+    kitti = read_kitti_bin(dst_dir / "000002.bin")
+    np.testing.assert_allclose(kitti["x"], 30.0 - points["x"], rtol=1e-6)
+    np.testing.assert_array_equal(kitti["y"], -points["y"])
+    np.testing.assert_array_equal(kitti["z"], points["z"])
+    np.testing.assert_array_equal(kitti["intensity"], points["intensity"])
+
+    # KITTI .bin -> binary_compressed PCD
+    out = convert_file(dst_dir / "000002.bin", tmp_path / "back.pcd", "pcd", "binary_compressed")
+    np.testing.assert_array_equal(read_pcd(out)["z"], points["z"])
+
+
+def test_convert_directory_in_place_skips_own_outputs(tmp_path):
+    points = get_points()
+    write_pcd(tmp_path / "000000.pcd", points, "binary")
+    (tmp_path / "index.csv").write_text("not a point cloud")
+
+    for _ in range(2):
+        succeeded, failed = convert_directory(tmp_path, tmp_path, "kitti_bin", rotate_z_180=True)
+        assert [p.name for p in succeeded] == ["000000.pcd"]
+        assert failed == []
+    # 第二次运行不会把上次生成的 000000.bin 再旋转一次
+    np.testing.assert_array_equal(read_kitti_bin(tmp_path / "000000.bin")["x"], -points["x"])
+
+    succeeded, _ = convert_directory(tmp_path, tmp_path / "out", "pcd", pattern="*.bin")
+    assert [p.name for p in succeeded] == ["000000.bin"]
+
+
+def test_pointcloud_convert_cli(tmp_path):
+    src = write_pcd(tmp_path / "cloud.pcd", get_points(), "ascii")
+    dst = tmp_path / "cloud.bin"
+    result = subprocess.run(
+        [sys.executable, "-m", "lovely_utils.cli", "pointcloud", "convert",
+         "--input", str(src), "--output", str(dst)],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert len(read_kitti_bin(dst)) == 200
@@ -0,0 +1,139 @@
+from rosbags.rosbag2 import Writer as ROS2BagWriter
+from rosbags.rosbag2.writer import StoragePlugin
+from rosbags.typesys import Stores
+
+from lovely_utils.ros.bag_format import (
+    CachedAnyReader,
+    copy_typestore,
+    detect_bag_format,
+    resolve_bag_path,
+    select_typestore,
+)
+from lovely_utils.ros.rosbag_reader import RosbagReader
+from lovely_utils.ros.type import get_cached_typestore
+
+from .util import *
+
+
+def get_ros2_bag_dir(bag_dir, topic: str, num_messages: int = 5):
+    """生成只含 sensor_msgs/msg/Image 的 ROS2 bag 目录（mcap 存储）"""
+    typestore = get_cached_typestore(Stores.ROS2_HUMBLE)
+    msgtype = "sensor_msgs/msg/Image"
+    start_ns = 1620000000 * 1_000_000_000
+    with ROS2BagWriter(bag_dir, version=8, storage_plugin=StoragePlugin.MCAP) as writer:
+        connection = writer.add_connection(topic, msgtype, typestore=typestore)
+        for i in range(num_messages):
+            timestamp = start_ns + i * 100_000_000
+            Time = typestore.types["builtin_interfaces/msg/Time"]
+            Header = typestore.types["std_msgs/msg/Header"]
+            Image = typestore.types[msgtype]
+            msg = Image(
+                header=Header(
+                    stamp=Time(sec=timestamp // 1_000_000_000, nanosec=timestamp % 1_000_000_000),
+                    frame_id="test_camera",
+                ),
+                height=4,
+                width=6,
+                encoding="rgb8",
+                is_bigendian=0,
+                step=6 * 3,
+                data=np.zeros(4 * 6 * 3, dtype=np.uint8),
+            )
+            writer.write(connection, timestamp, typestore.serialize_cdr(msg, msgtype))
+    return bag_dir
+
+
+def test_detect_bag_format_and_select_typestore(setup_typestore, setup_temp_dir):
+    bag_path = setup_temp_dir / "test.bag"
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=["/camera/color/image_raw"],
+        msg_types=["sensor_msgs/msg/Image"],
+        typestore=setup_typestore,
+        duration=0.1,
+    )
+    ros2_dir = get_ros2_bag_dir(setup_temp_dir / "ros2_bag", "/camera/color/image_raw")
+    (mcap_file,) = ros2_dir.glob("*.mcap")
+
+    assert detect_bag_format(bag_path) == "ros1"
+    assert detect_bag_format(ros2_dir) == "ros2"
+    assert detect_bag_format(mcap_file) == "ros2"
+    assert resolve_bag_path(mcap_file) == ros2_dir
+    assert resolve_bag_path(bag_path) == bag_path
+
+    assert select_typestore(bag_path) is get_cached_typestore(Stores.ROS1_NOETIC)
+    assert select_typestore(ros2_dir, "auto").types["sensor_msgs/msg/Image"]
+    assert select_typestore(bag_path, "ros2_humble") is get_cached_typestore(Stores.ROS2_HUMBLE)
+    assert select_typestore(bag_path, setup_typestore) is setup_typestore
+
+    not_a_bag = setup_temp_dir / "not_a_bag.bag"
+    not_a_bag.write_bytes(b"garbage")
+    with pytest.raises(ValueError):
+        detect_bag_format(not_a_bag)
+
+
+def test_rosbag_reader_reads_ros2_bag(setup_temp_dir):
+    topic = "/camera/color/image_raw"
+    ros2_dir = get_ros2_bag_dir(setup_temp_dir / "ros2_bag", topic)
+    (mcap_file,) = ros2_dir.glob("*.mcap")
+
+    info = RosbagReader._get_info_dict(mcap_file)
+    assert info["path"] == str(ros2_dir)
+    assert info["topics"][topic]["message_count"] == 5
+
+    samples = list(RosbagReader(mcap_file, [topic]).iter_samples())
+    assert len(samples) == 5
+    assert samples[0].data.shape == (4, 6, 3)
+
+
+def test_cached_any_reader_registers_embedded_definitions_once(setup_typestore, setup_temp_dir):
+    topics = ["/camera/color/image_raw", "/lidar/points"]
+    paths = []
+    for name in ["a", "b"]:
+        path = setup_temp_dir / f"{name}.bag"
+        get_ros1_bag_file(
+            bag_filename=str(path),
+            topics=topics,
+            msg_types=["sensor_msgs/msg/Image", "sensor_msgs/msg/PointCloud2"],
+            typestore=setup_typestore,
+            duration=0.1,
+        )
+        paths.append(path)
+
+    with CachedAnyReader([paths[0]]) as reader_a, CachedAnyReader([paths[1]]) as reader_b:
+        # 定义只注册一次：两个 reader 共享生成的消息类，但 typestore 各自独立
+        assert reader_a.typestore is not reader_b.typestore
+        msgtype = "sensor_msgs/msg/PointCloud2"
+        assert reader_a.typestore.types[msgtype] is reader_b.typestore.types[msgtype]
+        msgs = [reader_b.deserialize(raw, conn.msgtype) for conn, _, raw in reader_b.messages()]
+        assert len(msgs) == 2
+
+
+def test_cached_any_reader_typestore_register_is_isolated(setup_typestore, setup_temp_dir):
+    from rosbags.typesys import get_types_from_msg
+
+    topics = ["/camera/color/image_raw"]
+    paths = []
+    for name in ["a", "b"]:
+        path = setup_temp_dir / f"{name}.bag"
+        get_ros1_bag_file(
+            bag_filename=str(path),
+            topics=topics,
+            msg_types=["sensor_msgs/msg/Image"],
+            typestore=setup_typestore,
+            duration=0.1,
+        )
+        paths.append(path)
+    custom = get_types_from_msg("int32 value", "custom_msgs/msg/Value")
+    default = get_cached_typestore(Stores.ROS1_NOETIC)
+
+    with CachedAnyReader([paths[0]], default_typestore=default) as reader:
+        reader.typestore.register(custom)
+        assert "custom_msgs/msg/Value" in reader.typestore.types
+    with CachedAnyReader([paths[1]], default_typestore=default) as reader:
+        assert "custom_msgs/msg/Value" not in reader.typestore.types
+    assert "custom_msgs/msg/Value" not in default.types
+
+    copied = copy_typestore(default)
+    copied.register(custom)
+    assert "custom_msgs/msg/Value" not in default.types
@@ -0,0 +1,81 @@
+from rosbags.highlevel import AnyReader
+
+from lovely_utils.ros.rosbag_reader import RosbagReader
+from lovely_utils.ros.message_saver import MessageSaver
+from lovely_utils.ros.chunk_parallel import iter_index_entries, plan_tasks
+
+from .util import *
+
+
+def _make_bag(typestore, bag_path, compression="bz2"):
+    topics = ["/camera/color/image_raw", "/lidar/points"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image", "sensor_msgs/msg/PointCloud2"],
+        typestore=typestore,
+        duration=2.0,
+        compression=compression,
+        chunk_threshold=256 * 1024,
+    )
+    return topics
+
+
+def test_plan_tasks_splits_on_chunk_boundaries(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    bag_path = setup_temp_dir / "test.bag"
+    topics = _make_bag(typestore, bag_path)
+
+    with AnyReader([bag_path], default_typestore=typestore) as reader:
+        entries = list(iter_index_entries(reader, reader.connections))
+        tasks = list(plan_tasks(iter(entries), chunks_per_task=2))
+
+    assert len(entries) == 40
+    assert len(tasks) > 1
+    assert [seq for task in tasks for seq, *_ in task] == list(range(40))
+    for task in tasks:
+        assert len({entry.chunk_pos for *_, entry in task}) <= 2
+
+
+def test_iter_samples_multiprocess_matches_serial(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    bag_path = setup_temp_dir / "test.bag"
+    topics = _make_bag(typestore, bag_path)
+    reader = RosbagReader(bag_path, topics, typestore)
+
+    serial = list(reader.iter_samples())
+    parallel = list(reader.iter_samples(num_processes=2))
+    assert [(s.topic, s.timestamp) for s in parallel] == [
+        (s.topic, s.timestamp) for s in serial
+    ]
+    assert all(np.array_equal(a.data, b.data) for a, b in zip(parallel, serial))
+
+    unordered = list(reader.iter_samples(num_processes=2, ordered=False))
+    assert sorted((s.topic, s.timestamp) for s in unordered) == sorted(
+        (s.topic, s.timestamp) for s in serial
+    )
+
+
+def test_save_msg_multiprocess_same_output(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = _make_bag(typestore, bag_path, compression="lz4")
+
+    RosbagReader(bag_path, topics, typestore, MessageSaver()).save_msg(
+        tmp_dir / "serial"
+    )
+    RosbagReader(
+        bag_path, topics, typestore, MessageSaver(), decimation={"/lidar/points": 1}
+    ).save_msg(tmp_dir / "parallel", num_processes=2)
+
+    def read_outputs(root):
+        return {
+            p.relative_to(root): p.read_bytes()
+            for p in root.rglob("*")
+            if p.is_file() and not p.name.startswith("manifest")
+        }
+
+    serial = read_outputs(tmp_dir / "serial")
+    assert len(serial) == 42  # 40 个消息文件 + 每个话题一个 index.npy
+    assert read_outputs(tmp_dir / "parallel") == serial
@@ -0,0 +1,94 @@
+import sys
+import types
+
+from lovely_utils.ros.rosbag_reader import RosbagReader
+from lovely_utils.ros.dataset import RosbagDataset
+from lovely_utils.ros.samples import prefetch
+
+from .util import *
+
+
+def test_iter_samples_decodes_arrays(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    bag_path = setup_temp_dir / "test.bag"
+    topics = ["/camera/color/image_raw", "/lidar/points"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image", "sensor_msgs/msg/PointCloud2"],
+        typestore=typestore,
+        duration=1.0,
+    )
+    reader = RosbagReader(bag_path, topics, typestore)
+
+    samples = list(reader.iter_samples())
+    assert len(samples) == 20
+    assert [s.timestamp for s in samples] == sorted(s.timestamp for s in samples)
+
+    image = next(s for s in samples if s.topic == "/camera/color/image_raw")
+    assert image.msgtype == "sensor_msgs/msg/Image"
+    assert image.data.shape == (240, 320, 3) and image.data.dtype == np.uint8
+    assert image.timestamp == 1620000000 * 1_000_000_000 + 123456789
+
+    points = next(s for s in samples if s.topic == "/lidar/points")
+    assert points.data.shape == (100,)
+    assert points.data.dtype.names == ("x", "y", "z", "intensity", "ring")
+
+    # 后台预读的结果与同步遍历一致
+    prefetched = list(reader.iter_samples(prefetch_size=2))
+    assert [(s.topic, s.timestamp) for s in prefetched] == [
+        (s.topic, s.timestamp) for s in samples
+    ]
+    assert all(
+        np.array_equal(a.data, b.data) for a, b in zip(prefetched, samples)
+    )
+
+
+def test_prefetch_early_stop_and_errors():
+    consumed = []
+
+    def produce():
+        for i in range(1000):
+            consumed.append(i)
+            yield i
+
+    iterator = prefetch(produce(), 4)
+    assert [next(iterator) for _ in range(3)] == [0, 1, 2]
+    iterator.close()
+    # 停止后后台线程不再继续读取
+    assert len(consumed) < 10
+
+    def failing():
+        yield 1
+        raise RuntimeError("broken bag")
+
+    with pytest.raises(RuntimeError, match="broken bag"):
+        list(prefetch(failing(), 2))
+
+
+def test_rosbag_dataset_shards_bags_across_workers(
+    setup_typestore, setup_temp_dir, monkeypatch
+):
+    typestore = setup_typestore
+    topics = ["/camera/color/image_raw"]
+    bag_paths = []
+    for i in range(3):
+        bag_path = setup_temp_dir / f"test_{i}.bag"
+        get_ros1_bag_file(
+            bag_filename=str(bag_path),
+            topics=topics,
+            msg_types=["sensor_msgs/msg/Image"],
+            typestore=typestore,
+            duration=0.5,
+        )
+        bag_paths.append(bag_path)
+
+    dataset = RosbagDataset(bag_paths, topics, typestore, decimation=5)
+    assert len(list(dataset)) == 3
+
+    # 模拟 DataLoader worker：worker 1/2 只读取第 2 个 bag
+    torch_data = types.SimpleNamespace(
+        get_worker_info=lambda: types.SimpleNamespace(id=1, num_workers=2)
+    )
+    monkeypatch.setitem(sys.modules, "torch.utils.data", torch_data)
+    assert len(list(dataset)) == 1
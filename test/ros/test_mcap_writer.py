@@ -0,0 +1,74 @@
+from rosbags.highlevel import AnyReader
+from rosbags.rosbag2.storage_mcap import MCAPFile
+
+from lovely_utils.ros.rosbag_reader import RosbagReader
+
+from .util import *
+
+
+def test_save_mcap_filters_and_round_trips(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    bag_path = setup_temp_dir / "test.bag"
+    topics = ["/camera/color/image_raw", "/lidar/points"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image", "sensor_msgs/msg/PointCloud2"],
+        typestore=typestore,
+        duration=2.0,
+    )
+    start_time = 1620000000.123456789 + 0.5
+
+    reader = RosbagReader(bag_path, [topics[0]], start_time=start_time, decimation=2)
+    out_path = reader.save_mcap(setup_temp_dir / "out")
+    assert out_path == setup_temp_dir / "out" / "msg_test_mcap"
+
+    with AnyReader([bag_path], default_typestore=typestore) as src:
+        conns = [c for c in src.connections if c.topic == topics[0]]
+        expected = [
+            (ts, src.deserialize(raw, c.msgtype))
+            for c, ts, raw in src.messages(connections=conns, start=int(start_time * 1e9))
+        ][::2]
+
+    with AnyReader([out_path]) as dst:
+        assert dst.is2
+        assert {c.topic for c in dst.connections} == {topics[0]}
+        actual = [(ts, dst.deserialize(raw, c.msgtype)) for c, ts, raw in dst.messages()]
+
+    assert len(actual) == len(expected) == 8
+    for (ts, msg), (expected_ts, expected_msg) in zip(actual, expected):
+        assert ts == expected_ts
+        assert msg.header.stamp == expected_msg.header.stamp
+        assert msg.encoding == expected_msg.encoding
+        assert np.array_equal(msg.data, expected_msg.data)
+
+    mcap = MCAPFile(out_path / "msg_test_mcap.mcap")
+    mcap.open()
+    try:
+        assert mcap.chunks
+        assert all(chunk.compression == "zstd" for chunk in mcap.chunks)
+    finally:
+        mcap.close()
+
+    with pytest.raises(FileExistsError):
+        reader.save_mcap(setup_temp_dir / "out")
+
+
+def test_save_mcap_without_compression(setup_typestore, setup_temp_dir):
+    bag_path = setup_temp_dir / "test.bag"
+    topics = ["/camera/color/image_raw", "/lidar/points"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image", "sensor_msgs/msg/PointCloud2"],
+        typestore=setup_typestore,
+        duration=0.5,
+    )
+    out_path = RosbagReader(bag_path, topics).save_mcap(compression="none")
+    assert out_path == setup_temp_dir / "msg_test_mcap"
+
+    info = RosbagReader._get_info_dict(out_path)
+    assert info["total_messages"] == 10
+    samples = list(RosbagReader(out_path, [topics[1]]).iter_samples())
+    assert len(samples) == 5
+    assert samples[0].data.dtype.names
@@ -1,8 +1,10 @@
 import os
+import struct
 
 from .util import *
 
 from lovely_utils.ros.message_handler import *
+from lovely_utils.ros.timestamp_index import TimestampIndex, load_timestamp_index
 
 
 def test_SensorMsgsMsgImageHandler_can_handle_is_true(setup_typestore):
@@ -39,3 +41,236 @@ def test_GenericMessageHandler_save_json(setup_typestore, setup_temp_dir):
     path_imu = msg_handler.save(msg_imu, tmp_dir, "/imu")
 
     assert os.path.isfile(path_imu)
+
+
+def _convert_to_pcd_reference(msg, data_format):
+    """逐点struct解析的参考实现，用于校验向量化输出"""
+    fmt = {1: "b", 2: "B", 3: "h", 4: "H", 5: "i", 6: "I", 7: "f", 8: "d"}
+    handler = SensorMsgsMsgPointCloud2Handler(data_format=data_format)
+    body_bytes = bytearray()
+    body_lines = []
+    for i in range(msg.width * msg.height):
+        values = []
+        for field in msg.fields:
+            code = "<" + fmt[field.datatype]
+            value = struct.unpack_from(code, msg.data, i * msg.point_step + field.offset)[0]
+            body_bytes.extend(struct.pack(code, value))
+            values.append(str(value))
+        body_lines.append(" ".join(values))
+    header = handler._convert_to_pcd(msg)
+    if data_format == "binary":
+        return header[: header.index(b"DATA binary\n") + 12] + bytes(body_bytes)
+    return header[: header.index("DATA ascii\n") + 11] + "\n".join(body_lines)
+
+
+def test_SensorMsgsMsgPointCloud2Handler_can_handle_is_true(setup_typestore):
+    typestore = setup_typestore
+    msg_cloud = get_msg_sensor_msgs_msg_PointCloud2(typestore)
+    msg_handler = SensorMsgsMsgPointCloud2Handler()
+
+    assert msg_handler.can_handle(msg_cloud) == True
+
+
+def test_SensorMsgsMsgPointCloud2Handler_convert_to_pcd_ascii(setup_typestore):
+    typestore = setup_typestore
+    msg_cloud = get_msg_sensor_msgs_msg_PointCloud2(typestore)
+    msg_handler = SensorMsgsMsgPointCloud2Handler(data_format="ascii")
+
+    assert msg_handler._convert_to_pcd(msg_cloud) == _convert_to_pcd_reference(
+        msg_cloud, "ascii"
+    )
+
+
+def test_SensorMsgsMsgPointCloud2Handler_convert_to_pcd_binary(setup_typestore):
+    typestore = setup_typestore
+    msg_cloud = get_msg_sensor_msgs_msg_PointCloud2(typestore)
+    msg_handler = SensorMsgsMsgPointCloud2Handler(data_format="binary")
+
+    assert msg_handler._convert_to_pcd(msg_cloud) == _convert_to_pcd_reference(
+        msg_cloud, "binary"
+    )
+
+
+def test_GenericMessageStreamHandler_save_jsonl(setup_typestore, setup_temp_dir):
+    import json
+
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    msg_handler = GenericMessageStreamHandler("jsonl")
+    for sec in range(3):
+        msg_imu = get_msg_sensor_msgs_msg_Imu(typestore, timestamp=(sec, 0))
+        path_imu = msg_handler.save(msg_imu, tmp_dir, "/imu")
+    msg_handler.close()
+
+    with open(path_imu) as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 3
+    assert [row["header.stamp.sec"] for row in rows] == [0, 1, 2]
+    assert rows[0]["linear_acceleration.z"] == 9.81
+    assert rows[0]["orientation_covariance"] == [0.0] * 9
+
+
+def test_GenericMessageStreamHandler_save_csv(setup_typestore, setup_temp_dir):
+    import csv
+
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    msg_handler = GenericMessageStreamHandler("csv")
+    for sec in range(3):
+        msg_imu = get_msg_sensor_msgs_msg_Imu(typestore, timestamp=(sec, 0))
+        path_imu = msg_handler.save(msg_imu, tmp_dir, "/imu")
+    msg_handler.close()
+
+    with open(path_imu, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 3
+    assert rows[2]["header.stamp.sec"] == "2"
+
+
+def test_SensorMsgsMsgImageHandler_save_threaded(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    msg_handler = SensorMsgsMsgImageHandler("png", num_threads=4)
+    msg_handler.index = TimestampIndex()
+    for sec in range(10):
+        # 线程模式下写盘在之后按顺序提交，save 不返回尚未写出的路径
+        msg = get_msg_sensor_msgs_msg_Image(typestore, timestamp=(sec, 0))
+        assert msg_handler.save(msg, tmp_dir, "/image") is None
+    msg_handler.close()
+    msg_handler.index.close()
+
+    topic_dir = tmp_dir / "image"
+    index = load_timestamp_index(topic_dir)
+    assert index["timestamp_ns"].tolist() == [sec * 1_000_000_000 for sec in range(10)]
+    paths = [topic_dir / path for path in index["path"]]
+    assert all(os.path.isfile(path) for path in paths)
+    assert is_image_equal(str(paths[0]), str(paths[-1]), pixel_tolerance=0)
+
+
+def test_SensorMsgsMsgImageHandler_save_threaded_skips_failed_frames(
+    setup_typestore, setup_temp_dir
+):
+    # 编码失败的图像不应出现在索引中
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    msg_handler = SensorMsgsMsgImageHandler("png", num_threads=2)
+    msg_handler.index = TimestampIndex()
+    encode = msg_handler.encode
+
+    def flaky_encode(msg):
+        if msg.header.stamp.sec == 1:
+            raise IOError("磁盘已满")
+        return encode(msg)
+
+    msg_handler.encode = flaky_encode
+    for sec in range(3):
+        msg = get_msg_sensor_msgs_msg_Image(typestore, timestamp=(sec, 0))
+        msg_handler.save(msg, tmp_dir, "/image")
+    msg_handler.close()
+    msg_handler.index.close()
+
+    index = load_timestamp_index(tmp_dir / "image")
+    assert index["timestamp_ns"].tolist() == [0, 2_000_000_000]
+    assert sorted(os.listdir(tmp_dir / "image")) == sorted(list(index["path"]) + ["index.npy"])
+
+
+def test_SensorMsgsMsgImageHandler_save_raw(setup_typestore, setup_temp_dir):
+    import json
+
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    msg_image = get_msg_sensor_msgs_msg_Image(typestore)
+    msg_handler = SensorMsgsMsgImageHandler("raw")
+    msg_handler.index = TimestampIndex()
+    path_raw = msg_handler.save(msg_image, tmp_dir, "/image")
+    msg_handler.index.close()
+
+    with open(path_raw, "rb") as f:
+        assert f.read() == bytes(msg_image.data)
+    with open(os.path.splitext(path_raw)[0] + ".json") as f:
+        header = json.load(f)
+    assert header["encoding"] == "rgb8"
+    assert header["step"] == msg_image.step
+    # 只索引图像数据文件，.json 头信息与其同名相邻
+    index = load_timestamp_index(os.path.dirname(path_raw))
+    assert index["path"].tolist() == [os.path.basename(path_raw)]
+
+
+def test_MessageHandler_topic_dir_is_cached(setup_typestore, setup_temp_dir, monkeypatch):
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    msg_handler = GenericMessageHandler()
+    calls = []
+    makedirs = os.makedirs
+    monkeypatch.setattr(
+        os, "makedirs", lambda *args, **kwargs: calls.append(args) or makedirs(*args, **kwargs)
+    )
+    for sec in range(5):
+        msg_imu = get_msg_sensor_msgs_msg_Imu(typestore, timestamp=(sec, 0))
+        path_imu = msg_handler.save(msg_imu, str(tmp_dir), "/imu/data")
+    assert len(calls) == 1
+    assert os.path.basename(path_imu) == "sensor_msgs__msg__Imu_4_0.json"
+
+    msg_handler.close()
+    msg_handler.save(msg_imu, str(tmp_dir), "/imu/data")
+    assert len(calls) == 2
+
+
+def test_SensorMsgsMsgPointCloud2Handler_convert_to_pcd_binary_compressed(setup_typestore):
+    from lovely_utils.pointcloud import lzf
+
+    typestore = setup_typestore
+    msg_cloud = get_msg_sensor_msgs_msg_PointCloud2(typestore)
+    msg_handler = SensorMsgsMsgPointCloud2Handler(data_format="binary_compressed")
+    content = msg_handler._convert_to_pcd(msg_cloud)
+
+    marker = b"DATA binary_compressed\n"
+    header = content[: content.index(marker)].decode()
+    assert "TYPE F F F F U" in header
+    data = content[content.index(marker) + len(marker) :]
+    compressed_size, raw_size = struct.unpack_from("<II", data)
+    assert len(data) == 8 + compressed_size
+    raw = lzf.decompress(data[8:], raw_size)
+
+    expected = pointcloud2_to_array(msg_cloud)
+    offset = 0
+    for name in expected.dtype.names:
+        column = np.frombuffer(raw, expected.dtype[name], len(expected), offset)
+        np.testing.assert_array_equal(column, expected[name])
+        offset += column.nbytes
+    assert offset == raw_size
+
+
+def test_SensorMsgsMsgPointCloud2Handler_save_kitti_bin(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    msg_cloud = get_msg_sensor_msgs_msg_PointCloud2(typestore)
+    msg_handler = SensorMsgsMsgPointCloud2Handler(
+        "kitti_bin", rotate_z_180=True, translate_x=30.0
+    )
+    path_bin = msg_handler.save(msg_cloud, setup_temp_dir, "/lidar")
+
+    assert path_bin.endswith(".bin")
+    kitti_points = np.fromfile(path_bin, dtype=np.float32).reshape(-1, 4)
+    points = pointcloud2_to_array(msg_cloud)
+    np.testing.assert_allclose(kitti_points[:, 0], 30.0 - points["x"], rtol=1e-6)
+    np.testing.assert_array_equal(kitti_points[:, 1], -points["y"])
+    np.testing.assert_array_equal(kitti_points[:, 2], points["z"])
+    np.testing.assert_array_equal(kitti_points[:, 3], points["intensity"])
+
+
+def test_SensorMsgsMsgPointCloud2Handler_unknown_field_zero_filled_as_integer(setup_typestore):
+    typestore = setup_typestore
+    msg_cloud = get_msg_sensor_msgs_msg_PointCloud2(typestore)
+    PointField = typestore.types["sensor_msgs/msg/PointField"]
+    msg_cloud.fields.append(PointField(name="unknown", offset=18, datatype=0, count=1))
+    msg_handler = SensorMsgsMsgPointCloud2Handler(data_format="ascii")
+    content = msg_handler._convert_to_pcd(msg_cloud)
+
+    header, body = content.split("DATA ascii\n")
+    assert "FIELDS x y z intensity ring unknown" in header
+    assert "TYPE F F F F U I" in header
+    assert all(line.split()[-1] == "0" for line in body.splitlines())
+
+
+def test_SensorMsgsMsgPointCloud2Handler_defaults_to_binary():
+    assert SensorMsgsMsgPointCloud2Handler().data_format == "binary"
@@ -10,3 +10,22 @@ def test_get_handler_is_sensor_msgs_msg_Image(setup_typestore):
     handler = msg_saver.get_handler(msg_image)
     assert isinstance(handler, SensorMsgsMsgImageHandler)
 
+
+
+def test_get_handler_is_cached_by_msgtype(setup_typestore):
+    typestore = setup_typestore
+    msg_image = get_msg_sensor_msgs_msg_Image(typestore)
+    msg_saver = MessageSaver()
+    handler = msg_saver.get_handler(msg_image, "sensor_msgs/msg/Image")
+    assert msg_saver._handler_cache["sensor_msgs/msg/Image"] is handler
+    assert msg_saver.get_handler(msg_image) is handler
+
+
+def test_register_type_handler(setup_typestore):
+    typestore = setup_typestore
+    msg_image = get_msg_sensor_msgs_msg_Image(typestore)
+    msg_saver = MessageSaver()
+    msg_saver.get_handler(msg_image)
+    generic_handler = GenericMessageHandler()
+    msg_saver.register_type_handler("sensor_msgs/msg/Image", generic_handler)
+    assert msg_saver.get_handler(msg_image) is generic_handler
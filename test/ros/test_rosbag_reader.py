@@ -1,5 +1,7 @@
 from lovely_utils.ros.rosbag_reader import RosbagReader
 from lovely_utils.ros.message_saver import MessageSaver
+from lovely_utils.ros.message_handler import SensorMsgsMsgImageHandler
+from lovely_utils.ros.timestamp_index import load_timestamp_index
 
 from .util import *
 
@@ -101,3 +103,254 @@ def test_save_msg_sensor_msgs_msg_Image(setup_typestore, setup_temp_dir):
 #     message_saver = MessageSaver()
 #     reader = RosbagReader(bag_path, topics, typestore, message_saver)
 #     reader.save_msg("/home/ubuntu/Desktop/project/utils_python/tmp")
+
+
+def test_save_msg_pipelined_matches_serial(setup_typestore, setup_temp_dir):
+    # 多线程流水线保存的结果应与串行保存一致
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/camera/color/image_raw", "/camera/depth/image_raw"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image", "sensor_msgs/msg/Image"],
+        typestore=typestore,
+    )
+    reader = RosbagReader(bag_path, topics, typestore, MessageSaver())
+    reader.save_msg(tmp_dir / "serial")
+    reader.save_msg(tmp_dir / "pipelined", num_workers=4, queue_size=2)
+
+    serial_files = sorted(
+        p.relative_to(tmp_dir / "serial") for p in (tmp_dir / "serial").rglob("*.jpg")
+    )
+    pipelined_files = sorted(
+        p.relative_to(tmp_dir / "pipelined")
+        for p in (tmp_dir / "pipelined").rglob("*.jpg")
+    )
+    assert len(serial_files) == 200
+    assert serial_files == pipelined_files
+
+
+def test_save_msg_pipelined_keeps_stream_order_and_shards(setup_typestore, setup_temp_dir):
+    # 多线程编码时，jsonl 行顺序与分片归属应与串行保存完全一致
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/camera/color/image_raw", "/imu/data"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image", "sensor_msgs/msg/Imu"],
+        typestore=typestore,
+        duration=3.0,
+    )
+    for name, num_workers in [("serial", 1), ("pipelined", 4)]:
+        saver = MessageSaver(shard_size=7, pack="tar")
+        reader = RosbagReader(bag_path, topics, typestore, saver)
+        reader.save_msg(tmp_dir / name, num_workers=num_workers, queue_size=3)
+
+    serial_dir = tmp_dir / "serial" / "msg_test"
+    pipelined_dir = tmp_dir / "pipelined" / "msg_test"
+    serial_rows = (serial_dir / "imu_data" / "sensor_msgs__msg__Imu.jsonl").read_text()
+    pipelined_rows = (pipelined_dir / "imu_data" / "sensor_msgs__msg__Imu.jsonl").read_text()
+    assert len(serial_rows.splitlines()) == 30
+    assert pipelined_rows == serial_rows
+
+    serial_index = load_timestamp_index(serial_dir / "camera_color_image_raw")
+    pipelined_index = load_timestamp_index(pipelined_dir / "camera_color_image_raw")
+    assert len(serial_index) == 30
+    assert pipelined_index["path"].tolist() == serial_index["path"].tolist()
+    assert pipelined_index["offset"].tolist() == serial_index["offset"].tolist()
+
+
+def test_save_msg_failed_frame_retried_on_resume(setup_typestore, setup_temp_dir):
+    # 写出失败的图像不计入清单，续跑时重新保存
+    import json
+
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/camera/color/image_raw"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image"],
+        typestore=typestore,
+        duration=2.0,
+    )
+    failed_sec = []
+
+    class FlakyImageHandler(SensorMsgsMsgImageHandler):
+        def encode(self, msg):
+            if msg.header.stamp.nanosec // 100_000_000 == 5 and not failed_sec:
+                failed_sec.append(msg.header.stamp.sec)
+                raise IOError("磁盘已满")
+            return super().encode(msg)
+
+    saver = MessageSaver(image_threads=4)
+    saver.register_type_handler("sensor_msgs/msg/Image", FlakyImageHandler())
+    reader = RosbagReader(bag_path, topics, typestore, saver)
+    reader.save_msg(tmp_dir)
+
+    save_dir = tmp_dir / "msg_test"
+    topic_dir = save_dir / "camera_color_image_raw"
+    assert len(failed_sec) == 1
+    assert len(list(topic_dir.glob("*.jpg"))) == 19
+    state = json.loads((save_dir / "manifest.json").read_text())["topics"][topics[0]]
+    assert state["message_count"] == 19
+    assert len(state["failed_timestamps"]) == 1
+    assert not state["complete"]
+
+    reader.save_msg(tmp_dir, resume=True)
+    assert len(list(topic_dir.glob("*.jpg"))) == 20
+    state = json.loads((save_dir / "manifest.json").read_text())["topics"][topics[0]]
+    assert state["message_count"] == 20
+    assert state["failed_timestamps"] == []
+    assert state["complete"]
+    assert len((save_dir / "manifest_files.txt").read_text().splitlines()) == 20
+
+
+def test_get_info_dict_message_count_from_index(setup_typestore, setup_temp_dir):
+    # 消息数应来自索引，且与实际消息数一致
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/camera/color/image_raw", "/camera/depth/image_raw"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image", "sensor_msgs/msg/Image"],
+        typestore=typestore,
+        duration=2.0,
+    )
+
+    info = RosbagReader._get_info_dict(bag_path, typestore)
+
+    assert info["total_topics"] == 2
+    assert info["total_messages"] == 40
+    for topic in topics:
+        assert info["topics"][topic]["message_count"] == 20
+        assert info["topics"][topic]["connections"] == 1
+
+
+def test_save_msg_time_window_and_decimation(setup_typestore, setup_temp_dir):
+    # 时间窗口 + 抽帧：10Hz、10s 的数据，取 [2s, 4s) 窗口并每 5 条保留 1 条
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/camera/color/image_raw"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image"],
+        typestore=typestore,
+    )
+    bag_start = 1620000000.123456789
+    reader = RosbagReader(
+        bag_path,
+        topics,
+        typestore,
+        MessageSaver(),
+        start_time=bag_start + 2.0 - 0.05,
+        end_time=bag_start + 4.0 - 0.05,
+        decimation={"/camera/color/image_raw": 5},
+    )
+    reader.save_msg(tmp_dir)
+
+    saved = list((tmp_dir / "msg_test" / "camera_color_image_raw").glob("*.jpg"))
+    assert len(saved) == 4
+
+
+def test_save_msg_max_rate(setup_typestore, setup_temp_dir):
+    # 10Hz 数据限制为 2Hz
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/camera/color/image_raw"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image"],
+        typestore=typestore,
+    )
+    reader = RosbagReader(bag_path, topics, typestore, MessageSaver(), max_rate=2.0)
+    reader.save_msg(tmp_dir)
+
+    saved = list((tmp_dir / "msg_test" / "camera_color_image_raw").glob("*.jpg"))
+    assert len(saved) == 20
+
+
+class _FailingImageHandler(SensorMsgsMsgImageHandler):
+    """保存指定条数后中断（KeyboardInterrupt 不会被当作单条消息保存失败），模拟提取中断"""
+
+    def __init__(self, fail_after: int):
+        super().__init__()
+        self.fail_after = fail_after
+        self.saved = 0
+
+    def commit(self, msg, output_dir, topic_name, encoded):
+        if self.saved >= self.fail_after:
+            raise KeyboardInterrupt("simulated crash")
+        self.saved += 1
+        return super().commit(msg, output_dir, topic_name, encoded)
+
+
+def test_save_msg_resume_from_manifest(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/camera/color/image_raw"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image"],
+        typestore=typestore,
+    )
+
+    # 第一次提取在第 35 条消息时中断，最后一个检查点在第 30 条
+    failing_saver = MessageSaver()
+    failing_saver.register_handler(_FailingImageHandler(fail_after=35))
+    reader = RosbagReader(bag_path, topics, typestore, failing_saver)
+    with pytest.raises(KeyboardInterrupt):
+        reader.save_msg(tmp_dir, resume=True, checkpoint_interval=10)
+
+    # 续跑只保存检查点之后的 70 条
+    resumed_handler = _FailingImageHandler(fail_after=1000)
+    resumed_saver = MessageSaver()
+    resumed_saver.register_handler(resumed_handler)
+    reader = RosbagReader(bag_path, topics, typestore, resumed_saver)
+    reader.save_msg(tmp_dir, resume=True, checkpoint_interval=10)
+    assert resumed_handler.saved == 70
+
+    saved = list((tmp_dir / "msg_test" / "camera_color_image_raw").glob("*.jpg"))
+    assert len(saved) == 100
+    with open(tmp_dir / "msg_test" / "manifest_files.txt") as f:
+        assert len(f.read().splitlines()) == 100
+
+    # 已完成的 bag 再次续跑时直接跳过
+    reader.save_msg(tmp_dir, resume=True)
+    assert resumed_handler.saved == 70
+
+
+def test_default_typestore_cached_and_saver_not_shared(setup_typestore, setup_temp_dir):
+    from rosbags.typesys import Stores
+    from lovely_utils.ros.type import get_cached_typestore
+
+    assert get_cached_typestore("ros1_noetic") is get_cached_typestore(Stores.ROS1_NOETIC)
+    assert get_cached_typestore("ros2_kilted") is get_cached_typestore(Stores.ROS2_KILTED)
+
+    topics = ["/camera/color/image_raw"]
+    for name in ["a", "b"]:
+        get_ros1_bag_file(
+            bag_filename=str(setup_temp_dir / f"{name}.bag"),
+            topics=topics,
+            msg_types=["sensor_msgs/msg/Image"],
+            typestore=setup_typestore,
+            duration=0.1,
+        )
+    reader_a = RosbagReader(setup_temp_dir / "a.bag", topics)
+    reader_b = RosbagReader(setup_temp_dir / "b.bag", topics)
+    assert reader_a.typestore is reader_b.typestore
+    assert reader_a.typestore is get_cached_typestore(Stores.ROS1_NOETIC)
+    assert reader_a.message_saver is not reader_b.message_saver
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+
+import lovely_utils
+
+
+def test_rosbag_help_does_not_import_heavy_dependencies():
+    code = (
+        "import sys\n"
+        "from lovely_utils.cli import app\n"
+        "try:\n"
+        "    app(['rosbag', 'info', '--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "heavy = ['cv2', 'rosbags.highlevel', 'reportlab', 'pyx']\n"
+        "print('heavy=' + ','.join(m for m in heavy if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.path.dirname(lovely_utils.__path__[0])},
+    )
+    assert "--typestore" in result.stdout
+    assert result.stdout.strip().splitlines()[-1] == "heavy="
+
+
+def test_save_keeps_explicit_zero_sync_tolerance(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+
+    from lovely_utils.ros import rosbag_reader_cli
+
+    calls = []
+    monkeypatch.setattr(
+        rosbag_reader_cli, "_save_bag", lambda bag_path, **kwargs: calls.append(kwargs)
+    )
+    runner = CliRunner()
+    for tolerance, expected in [(["--sync-tolerance", "0"], 0.0), ([], 0.05)]:
+        result = runner.invoke(
+            rosbag_reader_cli.app,
+            [
+                "save",
+                "--bag-paths",
+                str(tmp_path / "test.bag"),
+                "--topics",
+                "/lidar",
+                "--sync-topic",
+                "/lidar",
+                *tolerance,
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        sync_options = calls[-1]["sync_options"]
+        assert sync_options["tolerance"] == expected
+
+
+def test_save_workers_prefixes_logs_and_keeps_input_order(tmp_path):
+    from rosbags.typesys import Stores, get_typestore
+
+    from .util import get_ros1_bag_file
+
+    typestore = get_typestore(Stores.ROS1_NOETIC)
+    bag_paths = []
+    for name, duration in [("b_long", 2.0), ("a_short", 1.0)]:
+        bag_path = tmp_path / f"{name}.bag"
+        get_ros1_bag_file(
+            bag_filename=str(bag_path),
+            topics=["/lidar/points"],
+            msg_types=["sensor_msgs/msg/PointCloud2"],
+            typestore=typestore,
+            duration=duration,
+        )
+        bag_paths.append(bag_path)
+
+    save_dir = tmp_path / "out"
+    result = subprocess.run(
+        [sys.executable, "-m", "lovely_utils.cli", "rosbag", "save",
+         "--bag-paths", str(bag_paths[0]), "--bag-paths", str(bag_paths[1]),
+         "--topics", "/lidar/points", "--sync-topic", "/lidar/points",
+         "--workers", "2", "--save-dir", str(save_dir)],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.path.dirname(lovely_utils.__path__[0])},
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    lines = result.stdout.splitlines()
+
+    # 每个 bag 的输出树与串行处理一致
+    for name, count in [("b_long", 20), ("a_short", 10)]:
+        synced = save_dir / f"msg_{name}" / "synced"
+        assert len(list((synced / "lidar_points").glob("*.pcd"))) == count
+        # 子进程的日志行带上 bag 名前缀
+        assert f"[{name}.bag] Synced: {count} 组, 丢弃: 0 条参考消息" in lines
+
+    # 状态行编号为输入顺序，汇总在所有状态行之后
+    status = sorted(line for line in lines if "成功: " in line and ".bag" in line)
+    assert status == [
+        f"[1/2] 成功: b_long.bag 保存至:{save_dir}",
+        f"[2/2] 成功: a_short.bag 保存至:{save_dir}",
+    ]
+    summary = lines.index("处理完成: 共 2 个bag")
+    assert max(lines.index(line) for line in status) < summary
+    assert lines[summary + 1 :] == ["成功: 2 个", "失败: 0 个"]
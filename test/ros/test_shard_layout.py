@@ -0,0 +1,129 @@
+import os
+import tarfile
+
+from lovely_utils.ros.message_saver import MessageSaver
+from lovely_utils.ros.rosbag_reader import RosbagReader
+from lovely_utils.ros.shard_layout import ShardedOutputLayout
+from lovely_utils.ros.timestamp_index import load_timestamp_index
+
+from .util import *
+
+
+def _read_index(topic_dir):
+    return load_timestamp_index(topic_dir, mmap=False)
+
+
+def test_directory_shards_roll_over_by_count(setup_temp_dir):
+    tmp_dir = setup_temp_dir
+    layout = ShardedOutputLayout(shard_size=4)
+    for i in range(10):
+        layout.write(str(tmp_dir), f"{i}.bin", i, bytes([i]) * 10)
+    layout.close()
+
+    assert sorted(p.name for p in tmp_dir.iterdir() if p.is_dir()) == [
+        "000000",
+        "000001",
+        "000002",
+    ]
+    rows = _read_index(tmp_dir)
+    assert len(rows) == 10
+    assert rows[5]["path"] == "000001/5.bin"
+    assert (tmp_dir / rows[5]["path"]).read_bytes() == bytes([5]) * 10
+
+
+def test_directory_shards_by_time_bucket(setup_temp_dir):
+    tmp_dir = setup_temp_dir
+    layout = ShardedOutputLayout(shard_seconds=10)
+    for sec in [0, 5, 12, 25]:
+        layout.write(str(tmp_dir), f"{sec}.bin", sec * 1_000_000_000, b"x")
+    layout.close()
+
+    rows = _read_index(tmp_dir)
+    assert [row["path"].split("/")[0] for row in rows] == [
+        "0_000000",
+        "0_000000",
+        "10_000001",
+        "20_000002",
+    ]
+
+
+def test_tar_time_buckets_do_not_leak_file_handles(setup_temp_dir):
+    # 进入新时间桶时应关闭上一个桶的 tar，桶数远超文件句柄上限时也不会 EMFILE
+    resource = pytest.importorskip("resource")
+    tmp_dir = setup_temp_dir
+    num_buckets = 200
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    limit = len(os.listdir("/proc/self/fd")) + 32
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+    try:
+        layout = ShardedOutputLayout(shard_seconds=1, pack="tar")
+        for sec in range(num_buckets):
+            for topic in ("a", "b"):
+                os.makedirs(tmp_dir / topic, exist_ok=True)
+                layout.write(str(tmp_dir / topic), f"{sec}.bin", sec * 1_000_000_000, b"x")
+        layout.close()
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    for topic in ("a", "b"):
+        assert len(list((tmp_dir / topic).glob("shard-*.tar"))) == num_buckets
+        assert len(_read_index(tmp_dir / topic)) == num_buckets
+
+
+def test_tar_shards_index_offsets(setup_temp_dir):
+    tmp_dir = setup_temp_dir
+    layout = ShardedOutputLayout(shard_bytes=2048, pack="tar")
+    payloads = [bytes([i]) * (300 + i) for i in range(10)]
+    for i, payload in enumerate(payloads):
+        layout.write(str(tmp_dir), f"sample_{i}.bin", i, payload)
+    layout.close()
+
+    rows = _read_index(tmp_dir)
+    assert len(rows) == 10
+    assert len(list(tmp_dir.glob("shard-*.tar"))) > 1
+    for row, payload in zip(rows, payloads):
+        tar_name, member = row["path"].split("/")
+        with open(tmp_dir / tar_name, "rb") as f:
+            f.seek(int(row["offset"]))
+            assert f.read(int(row["size"])) == payload
+        with tarfile.open(tmp_dir / tar_name) as tar:
+            assert tar.extractfile(member).read() == payload
+
+
+def test_save_msg_with_tar_shards(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/camera/color/image_raw"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image"],
+        typestore=typestore,
+    )
+    message_saver = MessageSaver(shard_size=30, pack="tar", image_threads=2)
+    reader = RosbagReader(bag_path, topics, typestore, message_saver)
+    reader.save_msg(tmp_dir)
+
+    topic_dir = tmp_dir / "msg_test" / "camera_color_image_raw"
+    assert len(list(topic_dir.glob("shard-*.tar"))) == 4
+    assert len(_read_index(topic_dir)) == 100
+
+
+def test_save_msg_resume_rejects_tar_shards(setup_typestore, setup_temp_dir):
+    # tar 分片无法截断到检查点，续跑应直接报错而不是写出重复成员
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/camera/color/image_raw"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image"],
+        typestore=typestore,
+        duration=1.0,
+    )
+    reader = RosbagReader(bag_path, topics, typestore, MessageSaver(pack="tar"))
+    with pytest.raises(ValueError, match="tar"):
+        reader.save_msg(tmp_dir, resume=True)
+    assert not (tmp_dir / "msg_test").exists()
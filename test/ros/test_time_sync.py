@@ -0,0 +1,79 @@
+import csv
+
+from lovely_utils.ros.rosbag_reader import RosbagReader
+from lovely_utils.ros.message_saver import MessageSaver
+from lovely_utils.ros.time_sync import NearestTimeSynchronizer
+
+from .util import *
+
+
+def _run(synchronizer, stream):
+    results = []
+    for topic, ts in sorted(stream, key=lambda x: x[1]):
+        results.extend(synchronizer.add(topic, ts, f"{topic}@{ts}"))
+    results.extend(synchronizer.flush())
+    return results
+
+
+def test_nearest_time_synchronizer_matches_within_tolerance():
+    # 参考话题 10Hz，相机 a 30Hz 偏移 3ms，相机 b 10Hz 偏移 40ms 且缺少一帧
+    stream = [("/lidar", i * 100) for i in range(10)]
+    stream += [("/a", i * 33 + 3) for i in range(31)]
+    stream += [("/b", i * 100 + 40) for i in range(10) if i != 5]
+    synchronizer = NearestTimeSynchronizer("/lidar", ["/lidar", "/a", "/b"], 50, max_buffer=8)
+
+    results = _run(synchronizer, stream)
+
+    assert [ref_ts for ref_ts, _ in results] == [i * 100 for i in range(10) if i != 5]
+    assert synchronizer.matched == 9 and synchronizer.dropped == 1
+    for ref_ts, group in results:
+        assert abs(group["/a"][0] - ref_ts) <= 17
+        assert group["/b"][0] == ref_ts + 40
+        assert group["/lidar"] == (ref_ts, f"/lidar@{ref_ts}")
+
+
+def test_nearest_time_synchronizer_bounded_buffers():
+    stream = [("/lidar", i * 100) for i in range(100)]
+    stream += [("/a", i) for i in range(10000)]
+    synchronizer = NearestTimeSynchronizer("/lidar", ["/a"], 0, max_buffer=4)
+
+    results = _run(synchronizer, stream)
+
+    assert len(results) == 100
+    assert all(group["/a"][0] == ref_ts for ref_ts, group in results)
+    assert len(synchronizer._buffers["/a"]) <= 4
+
+
+def test_save_synced(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/lidar/points", "/camera/color/image_raw"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/PointCloud2", "sensor_msgs/msg/Image"],
+        typestore=typestore,
+        duration=2.0,
+    )
+
+    reader = RosbagReader(
+        bag_path, topics, typestore, MessageSaver(), decimation={"/lidar/points": 2}
+    )
+    stats = reader.save_synced("/lidar/points", tmp_dir, tolerance=0.01)
+    assert stats == {"matched": 10, "dropped": 0}
+
+    synced_dir = tmp_dir / "msg_test" / "synced"
+    with open(synced_dir / "synced.csv") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["timestamp_ns", "/lidar/points", "/camera/color/image_raw"]
+    assert len(rows) == 11
+    for row in rows[1:]:
+        pcd, image = synced_dir / row[1], synced_dir / row[2]
+        assert pcd.exists() and image.exists()
+        # 同一时刻发布，文件名中的时间戳一致
+        assert pcd.name.split("_")[:2] == image.name.split("_")[:2]
+
+    # 按 bag 时间同步，结果一致
+    groups = list(reader.iter_synced("/lidar/points", tolerance=0.01, stamp="bag"))
+    assert [ref_ts for ref_ts, _ in groups] == [int(row[0]) for row in rows[1:]]
@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+
+from lovely_utils.ros.message_saver import MessageSaver
+from lovely_utils.ros.rosbag_reader import RosbagReader
+from lovely_utils.ros.timestamp_index import TimestampIndex, load_timestamp_index
+from lovely_utils.sync.files import index_directory, parse_timestamp
+
+from .util import *
+
+
+def test_index_sorted_by_timestamp(setup_temp_dir):
+    tmp_dir = setup_temp_dir
+    index = TimestampIndex()
+    for ts in [30, 10, 20]:
+        index.record(str(tmp_dir), ts, f"{ts}.bin", ts * 2)
+    index.close()
+
+    loaded = load_timestamp_index(tmp_dir)
+    assert isinstance(loaded, np.memmap)
+    assert loaded["timestamp_ns"].tolist() == [10, 20, 30]
+    assert loaded["path"].tolist() == ["10.bin", "20.bin", "30.bin"]
+    assert loaded["size"].tolist() == [20, 40, 60]
+    assert not os.path.exists(tmp_dir / (TimestampIndex.INDEX_NAME + ".tmp"))
+
+
+def test_index_append_merges_and_keeps_last(setup_temp_dir):
+    tmp_dir = setup_temp_dir
+    index = TimestampIndex()
+    index.record(str(tmp_dir), 1, "a.bin", 1)
+    index.record(str(tmp_dir), 2, "b.bin", 1)
+    index.close()
+
+    resumed = TimestampIndex()
+    resumed.append = True
+    resumed.record(str(tmp_dir), 2, "b.bin", 5)
+    resumed.record(str(tmp_dir), 3, "a_much_longer_name.bin", 1)
+    resumed.close()
+
+    loaded = load_timestamp_index(tmp_dir, mmap=False)
+    assert loaded["path"].tolist() == ["a.bin", "b.bin", "a_much_longer_name.bin"]
+    assert loaded["size"].tolist() == [1, 5, 1]
+
+
+def test_index_flush_appends_journal_and_close_writes_index(setup_temp_dir):
+    tmp_dir = setup_temp_dir
+    journal = tmp_dir / TimestampIndex.JOURNAL_NAME
+    index = TimestampIndex()
+    index.record(str(tmp_dir), 20, "20.bin", 1)
+    index.flush()
+    index.record(str(tmp_dir), 10, "10.bin", 1)
+    index.flush()
+    index.flush()
+    # 检查点只追加新记录，不合并、不重写 index.npy
+    assert not os.path.exists(tmp_dir / TimestampIndex.INDEX_NAME)
+    assert journal.read_text().splitlines() == ["20\t1\t0\t20.bin", "10\t1\t0\t10.bin"]
+    assert load_timestamp_index(tmp_dir)["path"].tolist() == ["10.bin", "20.bin"]
+
+    index.close()
+    assert not journal.exists()
+    assert load_timestamp_index(tmp_dir)["path"].tolist() == ["10.bin", "20.bin"]
+
+
+def test_index_resume_folds_in_journal_left_by_interrupted_run(setup_temp_dir):
+    tmp_dir = setup_temp_dir
+    index = TimestampIndex()
+    index.record(str(tmp_dir), 1, "a.bin", 1)
+    index.close()
+
+    interrupted = TimestampIndex()
+    interrupted.append = True
+    interrupted.record(str(tmp_dir), 2, "b.bin", 1)
+    interrupted.flush()
+    interrupted.record(str(tmp_dir), 3, "lost.bin", 1)  # 检查点之后的记录随中断丢失
+    with open(tmp_dir / TimestampIndex.JOURNAL_NAME, "a") as f:
+        f.write("4\t1\t0\thalf")  # 中断时写了一半的行
+
+    resumed = TimestampIndex()
+    resumed.append = True
+    resumed.record(str(tmp_dir), 3, "c.bin", 1)
+    resumed.close()
+
+    loaded = load_timestamp_index(tmp_dir, mmap=False)
+    assert loaded["path"].tolist() == ["a.bin", "b.bin", "c.bin"]
+    assert not os.path.exists(tmp_dir / TimestampIndex.JOURNAL_NAME)
+
+    fresh = TimestampIndex()
+    fresh.record(str(tmp_dir), 9, "z.bin", 1)
+    fresh.close()
+    assert load_timestamp_index(tmp_dir)["path"].tolist() == ["z.bin"]
+
+
+def test_save_msg_writes_timestamp_index(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/lidar/points"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/PointCloud2"],
+        typestore=typestore,
+        duration=2.0,
+    )
+    reader = RosbagReader(bag_path, topics, typestore, MessageSaver())
+    reader.save_msg(tmp_dir)
+
+    topic_dir = tmp_dir / "msg_test" / "lidar_points"
+    index = load_timestamp_index(topic_dir)
+    files = sorted(topic_dir.glob("*.pcd"))
+    assert len(index) == len(files) == 20
+    assert np.all(np.diff(index["timestamp_ns"]) >= 0)
+    for ts, size, path in zip(index["timestamp_ns"], index["size"], index["path"]):
+        assert parse_timestamp(path) == ts
+        assert (topic_dir / path).stat().st_size == size
+
+    timestamps, paths = index_directory(topic_dir, "*.pcd")
+    assert timestamps.tolist() == index["timestamp_ns"].tolist()
+    assert paths == [topic_dir / path for path in index["path"]]
+
+
+def test_save_msg_tar_shards_index_offsets(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/lidar/points"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/PointCloud2"],
+        typestore=typestore,
+        duration=2.0,
+    )
+    reader = RosbagReader(bag_path, topics, typestore, MessageSaver(shard_size=8, pack="tar"))
+    reader.save_msg(tmp_dir)
+
+    topic_dir = tmp_dir / "msg_test" / "lidar_points"
+    index = load_timestamp_index(topic_dir)
+    assert len(index) == 20
+    for offset, size, path in zip(index["offset"], index["size"], index["path"]):
+        tar_name, member = path.split("/")
+        with open(topic_dir / tar_name, "rb") as f:
+            f.seek(offset)
+            assert f.read(size)[:11] == b"# .PCD v0.7"
+
+
+def test_timestamp_index_disabled(setup_temp_dir):
+    saver = MessageSaver(timestamp_index=False)
+    assert saver.index is None
+    assert all(handler.index is None for handler in saver.handlers)
@@ -0,0 +1,87 @@
+from rosbags.highlevel import AnyReader
+
+from lovely_utils.ros.rosbag_reader import RosbagReader
+from lovely_utils.ros.message_saver import MessageSaver
+from lovely_utils.ros.zero_copy import (
+    ZERO_COPY_DESERIALIZERS,
+    Ros1MmapMessages,
+    is_zero_copy_supported,
+)
+
+from .util import *
+
+
+def test_zero_copy_deserialize_matches_rosbags(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    bag_path = setup_temp_dir / "test.bag"
+    topics = ["/camera/color/image_raw", "/lidar/points"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image", "sensor_msgs/msg/PointCloud2"],
+        typestore=typestore,
+        duration=1.0,
+    )
+
+    with AnyReader([bag_path], default_typestore=typestore) as reader:
+        assert is_zero_copy_supported(reader)
+        expected = list(reader.messages())
+        source = Ros1MmapMessages(reader)
+        actual = list(source.messages())
+        assert len(actual) == len(expected) == 20
+
+        for (conn, ts, rawdata), (conn_mm, ts_mm, view) in zip(expected, actual):
+            assert conn_mm.topic == conn.topic
+            assert ts_mm == ts
+            assert bytes(view) == rawdata
+
+            msg = reader.deserialize(rawdata, conn.msgtype)
+            fast = ZERO_COPY_DESERIALIZERS[conn.msgtype](view, reader.typestore)
+            assert fast.header.stamp.sec == msg.header.stamp.sec
+            assert fast.header.stamp.nanosec == msg.header.stamp.nanosec
+            assert fast.header.frame_id == msg.header.frame_id
+            assert fast.height == msg.height and fast.width == msg.width
+            assert np.array_equal(fast.data, msg.data)
+            # data 为 mmap 上的只读视图
+            assert not fast.data.flags.writeable
+            if conn.msgtype == "sensor_msgs/msg/PointCloud2":
+                assert [f.name for f in fast.fields] == [f.name for f in msg.fields]
+                assert fast.point_step == msg.point_step
+            else:
+                assert fast.encoding == msg.encoding and fast.step == msg.step
+        del fast, actual, view
+        source.close()
+
+
+def test_save_msg_zero_copy_same_output(setup_typestore, setup_temp_dir):
+    typestore = setup_typestore
+    tmp_dir = setup_temp_dir
+    bag_path = tmp_dir / "test.bag"
+    topics = ["/camera/color/image_raw", "/lidar/points"]
+    get_ros1_bag_file(
+        bag_filename=str(bag_path),
+        topics=topics,
+        msg_types=["sensor_msgs/msg/Image", "sensor_msgs/msg/PointCloud2"],
+        typestore=typestore,
+        duration=1.0,
+    )
+
+    RosbagReader(bag_path, topics, typestore, MessageSaver()).save_msg(
+        tmp_dir / "normal"
+    )
+    RosbagReader(
+        bag_path, topics, typestore, MessageSaver(), zero_copy=True
+    ).save_msg(tmp_dir / "zero_copy", num_workers=2)
+
+    normal = {
+        p.relative_to(tmp_dir / "normal"): p.read_bytes()
+        for p in (tmp_dir / "normal").rglob("*")
+        if p.is_file() and not p.name.startswith("manifest")
+    }
+    zero_copy = {
+        p.relative_to(tmp_dir / "zero_copy"): p.read_bytes()
+        for p in (tmp_dir / "zero_copy").rglob("*")
+        if p.is_file() and not p.name.startswith("manifest")
+    }
+    assert len(normal) == 22  # 20 个消息文件 + 每个话题一个 index.npy
+    assert normal == zero_copy
@@ -37,12 +37,25 @@ def get_msg_sensor_msgs_msg_Header(
     """创建sensor_msgs/Header消息头"""
     Time = typestore.types["builtin_interfaces/msg/Time"]
     Header = typestore.types["std_msgs/msg/Header"]
-    header = Header(
-        seq=0,
-        stamp=Time(sec=timestamp[0], nanosec=timestamp[1]),
-        frame_id=frame_id,
-    )
-    return header
+    fields = {
+        "stamp": Time(sec=timestamp[0], nanosec=timestamp[1]),
+        "frame_id": frame_id,
+    }
+    if _has_header_seq(typestore):  # ROS2 的 Header 没有 seq
+        fields["seq"] = 0
+    return Header(**fields)
+
+
+def _has_header_seq(typestore) -> bool:
+    _, fields = typestore.fielddefs["std_msgs/msg/Header"]
+    return any(name == "seq" for name, _ in fields)
+
+
+def get_ros1_bag_typestore(typestore):
+    """ROS1 bag 只能包含 ROS1 消息定义：参数化为 ROS2 typestore 时改用 ros1_noetic 写 bag"""
+    if _has_header_seq(typestore):
+        return typestore
+    return get_typestore(Stores.ROS1_NOETIC)
 
 
 def get_msg_sensor_msgs_msg_Image(
@@ -139,20 +152,20 @@ def get_msg_sensor_msgs_msg_Imu(
     orientation_msg = Quaternion(
         x=orientation[0], y=orientation[1], z=orientation[2], w=orientation[3]
     )
-    orientation_covariance = [0.0] * 9
+    orientation_covariance = np.zeros(9, dtype=np.float64)
 
     # 创建角速度
     Vector3 = typestore.types["geometry_msgs/msg/Vector3"]
     angular_velocity_msg = Vector3(
         x=angular_velocity[0], y=angular_velocity[1], z=angular_velocity[2]
     )
-    angular_velocity_covariance = [0.0] * 9
+    angular_velocity_covariance = np.zeros(9, dtype=np.float64)
 
     # 创建线性加速度
     linear_acceleration_msg = Vector3(
         x=linear_acceleration[0], y=linear_acceleration[1], z=linear_acceleration[2]
     )
-    linear_acceleration_covariance = [0.0] * 9
+    linear_acceleration_covariance = np.zeros(9, dtype=np.float64)
 
     # 创建IMU消息
     Imu = typestore.types["sensor_msgs/msg/Imu"]
@@ -169,6 +182,55 @@ def get_msg_sensor_msgs_msg_Imu(
     return imu_msg
 
 
+def get_msg_sensor_msgs_msg_PointCloud2(
+    typestore,
+    num_points: int = 100,
+    frame_id: str = "test_lidar",
+    timestamp: Tuple[int, int] = (1620000000, 123456789),
+):
+    """构建ROS sensor_msgs/PointCloud2消息（x, y, z, intensity, ring，含4字节填充）"""
+    PointField = typestore.types["sensor_msgs/msg/PointField"]
+    fields = [
+        PointField(name="x", offset=0, datatype=7, count=1),
+        PointField(name="y", offset=4, datatype=7, count=1),
+        PointField(name="z", offset=8, datatype=7, count=1),
+        PointField(name="intensity", offset=12, datatype=7, count=1),
+        PointField(name="ring", offset=16, datatype=4, count=1),
+    ]
+    point_step = 24
+
+    rng = np.random.default_rng(0)
+    points = np.zeros(
+        num_points,
+        dtype=np.dtype(
+            {
+                "names": ["x", "y", "z", "intensity", "ring"],
+                "formats": ["<f4", "<f4", "<f4", "<f4", "<u2"],
+                "offsets": [0, 4, 8, 12, 16],
+                "itemsize": point_step,
+            }
+        ),
+    )
+    for name in ["x", "y", "z"]:
+        points[name] = rng.uniform(-50, 50, num_points)
+    points["intensity"] = rng.uniform(0, 255, num_points)
+    points["ring"] = np.arange(num_points) % 128
+
+    header = get_msg_sensor_msgs_msg_Header(typestore, timestamp, frame_id)
+    PointCloud2 = typestore.types["sensor_msgs/msg/PointCloud2"]
+    return PointCloud2(
+        header=header,
+        height=1,
+        width=num_points,
+        fields=fields,
+        is_bigendian=False,
+        point_step=point_step,
+        row_step=point_step * num_points,
+        data=np.frombuffer(points.tobytes(), dtype=np.uint8),
+        is_dense=True,
+    )
+
+
 def get_ros1_bag_file(
     bag_filename: str,
     topics: List[str],
@@ -178,6 +240,8 @@ def get_ros1_bag_file(
     frequency: float = 10.0,  # 发布频率（Hz）
     image_params: dict = None,  # 图像消息自定义参数
     imu_params: dict = None,  # IMU消息自定义参数
+    compression: str = None,  # chunk 压缩格式："bz2" / "lz4"，默认不压缩
+    chunk_threshold: int = None,  # chunk 大小阈值（字节），默认使用 rosbags 的 1MB
 ) -> None:
     """
     生成包含 sensor_msgs/msg/Image 和 sensor_msgs/msg/Imu 的 ROS1 bag 文件
@@ -188,10 +252,16 @@ def get_ros1_bag_file(
     imu_params = imu_params or {}
 
     # 1. 输入验证
+    typestore = get_ros1_bag_typestore(typestore)
+
     if len(topics) != len(msg_types):
         raise ValueError("topics与msg_types长度必须一致")
 
-    supported_types = {"sensor_msgs/msg/Image", "sensor_msgs/msg/Imu"}
+    supported_types = {
+        "sensor_msgs/msg/Image",
+        "sensor_msgs/msg/Imu",
+        "sensor_msgs/msg/PointCloud2",
+    }
     for msg_type in msg_types:
         if msg_type not in supported_types:
             raise ValueError(f"仅支持{supported_types}，不支持{msg_type}")
@@ -215,7 +285,12 @@ def get_ros1_bag_file(
         timestamps.append((sec, nsec))
 
     # 4. 打开ROS1 bag写入器
-    with ROS1BagWriter(bag_filename) as writer:
+    writer = ROS1BagWriter(bag_filename)
+    if compression:
+        writer.set_compression(ROS1BagWriter.CompressionFormat[compression.upper()])
+    if chunk_threshold:
+        writer.chunk_threshold = chunk_threshold
+    with writer:
         # 4.1 创建话题连接（存储连接对象和消息类型）
         connections = {}
         for topic, msg_type in zip(topics, msg_types):
@@ -266,6 +341,13 @@ def get_ros1_bag_file(
                         )
                         msg.header.seq = seq  # 更新序列号
 
+                    elif msg_type == "sensor_msgs/msg/PointCloud2":
+                        # 生成点云消息
+                        msg = get_msg_sensor_msgs_msg_PointCloud2(
+                            typestore=typestore, timestamp=timestamp
+                        )
+                        msg.header.seq = seq  # 更新序列号
+
                     # 序列化消息并写入（关键修复：依赖Image消息的data为numpy数组）
                     writer.write(
                         conn,
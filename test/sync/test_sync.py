@@ -0,0 +1,123 @@
+import csv
+import time
+
+import numpy as np
+import pytest
+
+from lovely_utils.sync.files import parse_timestamp, sync_directories
+from lovely_utils.sync.matcher import match_nearest, nearest, sync_streams
+
+
+def brute_force_nearest(reference, timestamps):
+    diffs = np.abs(timestamps[None, :] - reference[:, None])
+    return diffs.argmin(axis=1)
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(0)
+    reference = np.sort(rng.integers(0, 10**10, 500))
+    timestamps = np.sort(rng.integers(0, 10**10, 300))
+    idx, diff = nearest(reference, timestamps)
+    expected = brute_force_nearest(reference, timestamps)
+    np.testing.assert_array_equal(
+        np.abs(timestamps[idx] - reference), np.abs(timestamps[expected] - reference)
+    )
+    np.testing.assert_array_equal(diff, timestamps[idx] - reference)
+
+
+def test_match_nearest_tolerance_and_offset():
+    reference = np.array([1000, 2000, 3000, 4000])
+    camera = np.array([950, 2120, 3500])
+    idx, diff = match_nearest(reference, camera, tolerance_ns=100)
+    assert idx.tolist() == [0, -1, -1, -1]
+    assert diff.tolist() == [-50, 0, 0, 0]
+
+    idx, diff = match_nearest(reference, camera, tolerance_ns=100, offset_ns=-100)
+    assert idx.tolist() == [-1, 1, -1, -1]
+    assert diff.tolist() == [0, 20, 0, 0]
+
+
+def test_match_nearest_one_to_one():
+    reference = np.array([1000, 1010, 1020, 2000])
+    camera = np.array([1005, 1990])
+    idx, _ = match_nearest(reference, camera)
+    assert idx.tolist() == [0, 0, 0, 1]
+
+    idx, diff = match_nearest(reference, camera, one_to_one=True)
+    assert idx.tolist() == [0, -1, -1, 1]
+    assert diff.tolist() == [5, 0, 0, -10]
+
+    rng = np.random.default_rng(1)
+    reference = np.sort(rng.integers(0, 10**6, 2000))
+    camera = np.sort(rng.integers(0, 10**6, 1500))
+    idx, _ = match_nearest(reference, camera, tolerance_ns=200, one_to_one=True)
+    used = idx[idx >= 0]
+    assert len(used) == len(np.unique(used))
+    assert np.all(np.abs(camera[used] - reference[idx >= 0]) <= 200)
+
+
+def test_sync_streams_drops_incomplete_groups():
+    reference = np.arange(10) * 100_000_000
+    streams = {
+        "front": reference + 5_000_000,
+        "left": np.delete(reference, [3, 4]) - 20_000_000,
+    }
+    result = sync_streams(reference, streams, tolerance_ns={"front": 10_000_000, "left": 30_000_000})
+    assert len(result) == 8
+    assert result.dropped == 2
+    assert 3 not in result.reference.tolist()
+    assert result.stats["left"]["max_error_ms"] == pytest.approx(20.0)
+
+    with pytest.raises(ValueError):
+        sync_streams(reference[::-1], streams)
+
+
+def test_sync_streams_scales_to_100k_frames():
+    rng = np.random.default_rng(2)
+    reference = np.cumsum(rng.integers(90_000_000, 110_000_000, 100_000))
+    streams = {
+        name: np.sort(reference + rng.integers(-20_000_000, 20_000_000, len(reference)))
+        for name in ["front", "left", "right"]
+    }
+    start = time.perf_counter()
+    result = sync_streams(reference, streams, tolerance_ns=50_000_000, one_to_one=True)
+    assert time.perf_counter() - start < 10
+    assert len(result) > 90_000
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("sensor_msgs__msg__PointCloud2_1768372206_973804235.pcd") == 1768372206973804235
+    assert parse_timestamp("1768372206_5_sensor_msgs__msg__Image.jpg") == 1768372206000000005
+    with pytest.raises(ValueError):
+        parse_timestamp("image.jpg")
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "manifest"])
+def test_sync_directories(tmp_path, mode):
+    lidar, front = tmp_path / "lidar", tmp_path / "front"
+    lidar.mkdir()
+    front.mkdir()
+    for i in range(5):
+        (lidar / f"sensor_msgs__msg__PointCloud2_100_{i * 100_000_000}.pcd").write_text(f"pcd{i}")
+    for i in [0, 1, 2, 4]:
+        (front / f"sensor_msgs__msg__Image_100_{i * 100_000_000 + 10_000_000}.jpg").write_text(f"jpg{i}")
+    (front / "notes.txt").write_text("ignored")
+
+    output = tmp_path / "synced"
+    result = sync_directories(lidar, {"front": front}, output, tolerance_ns=20_000_000, mode=mode)
+    assert len(result) == 4
+    assert result.dropped == 1
+
+    with open(output / "sync.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [int(r["timestamp_ns"]) for r in rows] == [100_000_000_000 + i * 100_000_000 for i in [0, 1, 2, 4]]
+    assert all(r["front_dt_ns"] == "10000000" for r in rows)
+
+    front_file = output / rows[3]["front"]
+    assert front_file.read_text() == "jpg4"
+    if mode == "hardlink":
+        assert front_file.parent == output / "front"
+        assert front_file.stem == (output / rows[3]["lidar"]).stem
+        assert front_file.stat().st_nlink == 2
+    else:
+        assert not (output / "front").exists()